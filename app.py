@@ -6,12 +6,27 @@ import os
 import flask 
 import re
 from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user 
-from werkzeug.security import generate_password_hash, check_password_hash 
 import sqlite3 
+import threading
 import click 
 from flask.cli import with_appcontext 
+from werkzeug.middleware.proxy_fix import ProxyFix
 from components import navbar
+from services.passwords import get_hasher, HashingBusy
+from services.ratelimit import get_limiter
+from services.responses import get_engine
+from services.streaming import reply_events
+from services.backend import backend_stats # Enregistre aussi le moteur "backend"
+from services.answer_cache import answer_cache_stats
+from services.logs import dropped_messages, get_logger
+from storage.chat import save_messages
+from storage.db import get_pool
+from storage.migrations import upgrade, current_version, pending_migrations
+from storage.reclamations import init_reclamations_table, get_reclamation_document, cache_stats as reclamations_cache_stats
+from storage.users import get_cached_user, user_cache_stats
+from storage.user_import import import_users, IMPORT_BATCH_SIZE
 server = flask.Flask(__name__)
+logger = get_logger(__name__)
 PREFERENCES_FILE = "preferences.json"
 try:
     with open(PREFERENCES_FILE, "r") as f:
@@ -24,38 +39,54 @@ server.config.update(
     SECRET_KEY=os.environ.get('SECRET_KEY', os.urandom(24)),
 )
 
+# Proxys de confiance devant l'application (ex. 1 derrière nginx) : l'adresse du client est alors lue dans
+# X-Forwarded-For (request.remote_addr, clé des limites de tentatives) au lieu de celle du proxy.
+# 0 sans proxy : l'en-tête, posé par n'importe quel client, n'est pas pris en compte.
+PROXY_FIX_X_FOR = int(os.environ.get('CIRACBOT_PROXY_FIX_X_FOR', '0'))
+if PROXY_FIX_X_FOR > 0:
+    server.wsgi_app = ProxyFix(server.wsgi_app, x_for=PROXY_FIX_X_FOR)
+
 DATABASE = 'ciracbot.db'
 
 def get_db():
+    # Connexion empruntée au pool (storage/db.py) pour la durée du contexte Flask
     db = getattr(flask.g, '_database', None)
     if db is None:
-        db = flask.g._database = sqlite3.connect(DATABASE)
-        db.row_factory = sqlite3.Row
+        db = flask.g._database = get_pool(DATABASE).acquire()
     return db
 
 @server.teardown_appcontext
 def close_connection(exception):
-    db = getattr(flask.g, '_database', None)
+    db = flask.g.pop('_database', None)
     if db is not None:
-        db.close()
+        get_pool(DATABASE).release(db) # Rendue au pool (transaction éventuelle annulée), pas fermée
 
 def init_db():
+    """Applique les migrations en attente et crée la table des réclamations. Retourne False en cas d'erreur."""
     db = get_db()
     try:
-        print("Attempting to create users table...")
-        db.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT UNIQUE NOT NULL,
-                username TEXT NOT NULL,
-                password_hash TEXT NOT NULL,
-                role TEXT NOT NULL DEFAULT 'user' CHECK(role IN ('user', 'admin'))
-            );
-        ''')
-        db.commit()
-        print("Table 'users' checked/created successfully.")
-    except sqlite3.Error as e:
-        print(f"An error occurred during DB initialization: {e}")
+        upgrade(db) # Table 'users' et ses index/colonnes (storage/migrations.py)
+        logger.info("Schema up to date", extra={"schema_version": current_version(db)})
+        init_reclamations_table(db)
+        logger.info("Table 'reclamations' checked/created")
+        return True
+    except sqlite3.Error:
+        logger.exception("Database initialization failed")
+        return False
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+@server.before_request
+def ensure_schema():
+    # Une fois par processus, avant sa première requête : une base jamais migrée (ancienne ciracbot.db,
+    # `python app.py` sans `flask db-upgrade`) reçoit ses colonnes et tables (age, chat, index de recherche)
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            _schema_ready = init_db() # Échec : nouvel essai à la requête suivante
 
 @click.command('init-db')
 @with_appcontext
@@ -66,14 +97,65 @@ def init_db_command():
 
 server.cli.add_command(init_db_command)
 
+@click.command('db-upgrade')
+@click.option('--to', 'target', type=int, default=None, help="Version cible (défaut : la plus récente).")
+@click.option('--dry-run', is_flag=True, help="Lister les migrations en attente sans les appliquer.")
+@with_appcontext
+def db_upgrade_command(target, dry_run):
+    """Apply pending schema migrations, each in its own transaction."""
+    db = get_db()
+    pending = [(v, name) for v, name in pending_migrations(db) if target is None or v <= target]
+    if dry_run or not pending:
+        for version, name in pending:
+            click.echo(f"  en attente : {version:04d} {name}")
+        click.echo(f"Schéma en version {current_version(db)}, {len(pending)} migration(s) en attente.")
+        return
+    for version, name in upgrade(db, target=target):
+        click.echo(f"  appliquée : {version:04d} {name}")
+    click.echo(f"Schéma en version {current_version(db)}.")
+
+server.cli.add_command(db_upgrade_command)
+
+@click.command('import-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', type=int, default=None, help="Processus de hachage (défaut : nombre de cœurs).")
+@click.option('--batch-size', type=int, default=IMPORT_BATCH_SIZE, show_default=True, help="Lignes par transaction.")
+@click.option('--method', default=None, help="Méthode de hachage Werkzeug (défaut : CIRACBOT_PASSWORD_HASH).")
+@click.option('--max-report', type=int, default=50, show_default=True, help="Doublons/erreurs affichés au plus.")
+@with_appcontext
+def import_users_command(path, workers, batch_size, method, max_report):
+    """Import users from a CSV (header) or JSONL file: email, password or password_hash, username or first_name/last_name, role."""
+    reported = [0]
+
+    def report(line_number, email, reason):
+        reported[0] += 1
+        if reported[0] <= max_report:
+            where = f"ligne {line_number}" if line_number else "lot"
+            click.echo(f"  {where} : {email or '-'} ignoré ({reason})", err=True)
+
+    def progress(stats):
+        rate = stats['read'] / stats['seconds'] if stats['seconds'] else 0
+        click.echo(f"  {stats['read']} lignes lues, {stats['inserted']} insérées ({rate:.0f} lignes/s)", err=True)
+
+    stats = import_users(get_db(), path, workers=workers, batch_size=batch_size, method=method, report=report, progress=progress)
+    if reported[0] > max_report:
+        click.echo(f"  ... {reported[0] - max_report} autre(s) ligne(s) ignorée(s).", err=True)
+    rate = stats['read'] / stats['seconds'] if stats['seconds'] else 0
+    click.echo(
+        f"Import terminé en {stats['seconds']:.1f}s : {stats['inserted']} utilisateur(s) créé(s), "
+        f"{stats['duplicates']} doublon(s), {stats['invalid']} ligne(s) invalide(s) ({rate:.0f} lignes/s)."
+    )
+
+server.cli.add_command(import_users_command)
+
 # --- Fonctions d'accès aux données utilisateur ---
 def find_user_by_email(email):
     db = get_db()
     try:
         user = db.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
         return user
-    except sqlite3.Error as e:
-        print(f"Database error in find_user_by_email: {e}")
+    except sqlite3.Error:
+        logger.exception("Database error in find_user_by_email")
         return None
 
 def find_user_by_id(user_id):
@@ -81,8 +163,8 @@ def find_user_by_id(user_id):
     try:
         user = db.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
         return user
-    except sqlite3.Error as e:
-        print(f"Database error in find_user_by_id: {e}")
+    except sqlite3.Error:
+        logger.exception("Database error in find_user_by_id", extra={"user_id": user_id})
         return None
 
 # --- Classe Utilisateur pour Flask-Login ---
@@ -100,7 +182,8 @@ login_manager.login_view = "/login" # Chemin relatif vers la page de login
 
 @login_manager.user_loader
 def load_user(user_id):
-    user_data = find_user_by_id(user_id)
+    # Appelé à chaque requête (y compris chaque callback Dash) : servi par le cache utilisateurs (TTL + LRU)
+    user_data = get_cached_user(user_id, find_user_by_id)
     if user_data:
         return User(user_id=user_data['id'], email=user_data['email'], role=user_data['role'], username=user_data['username'])
     return None
@@ -116,119 +199,84 @@ app = dash.Dash(
 app.title = "CIRACbot"
 
 # --- Routes Flask pour l'Authentification ---
+def too_many_attempts(retry_after):
+    """Réponse 429 (avec Retry-After) pour une tentative refusée par le limiteur."""
+    try:
+        login_path = dash.page_registry['pages.login']['relative_path']
+    except KeyError:
+        login_path = '/login'
+    body = (
+        "<p>Trop de tentatives. Veuillez réessayer dans "
+        f"{retry_after} seconde{'s' if retry_after > 1 else ''}.</p>"
+        f'<p><a href="{login_path}">Retour à la connexion</a></p>'
+    )
+    return flask.Response(body, status=429, headers={'Retry-After': str(retry_after)}, mimetype='text/html')
+
+def _page_path(page_name, fallback):
+    # Chemin d'une page Dash depuis le registre (fallback si la page n'est pas enregistrée)
+    try:
+        return dash.page_registry[page_name]['relative_path']
+    except KeyError:
+        logger.warning("Page absente du registre, redirection par défaut", extra={"page": page_name, "fallback": fallback})
+        return fallback
+
 @server.route('/login', methods=['POST'])
 def login_post():
-    print("\n--- LOGIN POST START ---") # Marqueur de début clair
-
     # Chemin 1: Vérifier si l'utilisateur est déjà authentifié
     if current_user.is_authenticated:
-        print("User already authenticated, redirecting home.")
-        try:
-            # Essayer d'obtenir le chemin de la page d'accueil depuis le registre
-            home_path = dash.page_registry['pages.accueil']['relative_path']
-            print(f"Redirecting to (already auth): {home_path}")
-            print("--- LOGIN POST END (Already Auth) ---\n")
-            return flask.redirect(home_path)
-        except KeyError:
-            # Fallback si la page d'accueil n'est pas trouvée dans le registre
-            print("WARNING: 'pages.accueil' not found in page_registry. Redirecting to '/'.")
-            print("--- LOGIN POST END (Already Auth - Fallback) ---\n")
-            return flask.redirect('/')
+        logger.debug("Login: already authenticated", extra={"user_id": current_user.id})
+        return flask.redirect(_page_path('pages.accueil', '/'))
 
     # Récupérer les données du formulaire
     email = flask.request.form.get('email')
     password = flask.request.form.get('password')
-    print(f"Received data - Email: '{email}', Password provided: {'Yes' if password else 'No'}")
+
+    # Limitation des tentatives (par adresse client et par compte visé), avant tout hachage ou accès DB
+    retry_after = get_limiter().hit('login_ip', flask.request.remote_addr) or \
+        get_limiter().hit('login_email', (email or '').strip().casefold())
+    if retry_after:
+        logger.warning("Login throttled", extra={"email": email, "remote_addr": flask.request.remote_addr, "retry_after": retry_after})
+        return too_many_attempts(retry_after)
 
     # Vérifier si email et password ont été fournis
     if not email or not password:
-        print("Login FAILED: Email or Password not provided in form.")
+        logger.info("Login failed: missing email or password", extra={"remote_addr": flask.request.remote_addr})
         flask.flash('Adresse e-mail et mot de passe requis.', 'error')
-        try:
-            login_path = dash.page_registry['pages.login']['relative_path']
-            print(f"Redirecting back to login (missing data): {login_path}")
-            print("--- LOGIN POST END (Missing Data) ---\n")
-            return flask.redirect(login_path)
-        except KeyError:
-            print("WARNING: 'pages.login' not found in page_registry. Redirecting to '/login'.")
-            print("--- LOGIN POST END (Missing Data - Fallback) ---\n")
-            return flask.redirect('/login')
-
+        return flask.redirect(_page_path('pages.login', '/login'))
 
     # Rechercher l'utilisateur dans la base de données
-    print(f"Searching database for email: '{email}'")
     user_data = find_user_by_email(email)
-    # Afficher le résultat (None ou les données de l'utilisateur sans le hash!)
-    if user_data:
-         # Convertir Row en dict pour affichage sûr (sans le hash)
-         user_data_display = {key: user_data[key] for key in user_data.keys() if key != 'password_hash'}
-         print(f"Database result: User FOUND - {user_data_display}")
-    else:
-         print(f"Database result: User with email '{email}' NOT FOUND.")
-
 
     # Chemin 2: Essayer de valider si l'utilisateur a été trouvé
     if user_data:
-        # Comparer le mot de passe fourni avec le hash stocké
-        print("Comparing provided password with stored hash...")
-        password_match = check_password_hash(user_data['password_hash'], password)
-        print(f"Password check result: {password_match}") # True ou False
+        try:
+            # Hachage hors du worker web (pool de processus), rehash si les paramètres ont changé
+            password_match, new_password_hash = get_hasher().verify(user_data['password_hash'], password)
+        except HashingBusy as e:
+            logger.warning("Login deferred: password hashing busy", extra={"user_id": user_data['id'], "reason": str(e)})
+            flask.flash('Service momentanément surchargé, veuillez réessayer dans quelques secondes.', 'error')
+            return flask.redirect(_page_path('pages.login', '/login'))
+        if password_match and new_password_hash:
+            update_password_hash(user_data['id'], new_password_hash)
 
         if password_match:
             # Chemin 2a: Connexion réussie
             user_obj = User(user_id=user_data['id'], email=user_data['email'], role=user_data['role'], username=user_data['username'])
             login_user(user_obj) # Connecter l'utilisateur
-            print(f"Login SUCCESS for '{email}'. Role: '{user_obj.role}'. User session established.")
-
-            # Gérer la redirection après succès
+            get_limiter().reset('login_email', email.strip().casefold())
+            logger.info("Login success", extra={"user_id": user_obj.id, "role": user_obj.role})
+            # Utiliser 'next' s'il existe et est sûr (simplifié ici), sinon l'accueil
             next_page = flask.request.args.get('next')
-            print(f"Optional 'next' parameter from URL: {next_page}")
-            try:
-                home_path = dash.page_registry['pages.accueil']['relative_path']
-                # Utiliser 'next' s'il existe et est sûr (simplifié ici), sinon l'accueil
-                target_url = next_page or home_path
-                print(f"Redirecting to (success): {target_url}")
-                print("--- LOGIN POST END (Success) ---\n")
-                return flask.redirect(target_url)
-            except KeyError:
-                print("WARNING: 'pages.accueil' not found in page_registry. Redirecting to '/'.")
-                print("--- LOGIN POST END (Success - Fallback) ---\n")
-                return flask.redirect('/')
-        else:
-            # Chemin 2b: Mauvais mot de passe
-            print(f"Login FAILED for '{email}': Incorrect password.")
-            flask.flash('Adresse e-mail ou mot de passe incorrect.', 'error')
-            # Rediriger vers la page de login pour afficher l'erreur flash
-            try:
-                login_path = dash.page_registry['pages.login']['relative_path']
-                print(f"Redirecting back to login (incorrect password): {login_path}")
-                print("--- LOGIN POST END (Incorrect Password) ---\n")
-                return flask.redirect(login_path)
-            except KeyError:
-                 print("WARNING: 'pages.login' not found in page_registry. Redirecting to '/login'.")
-                 print("--- LOGIN POST END (Incorrect Password - Fallback) ---\n")
-                 return flask.redirect('/login')
-
-    # Chemin 3: Utilisateur non trouvé dans la base de données
+            return flask.redirect(next_page or _page_path('pages.accueil', '/'))
+        # Chemin 2b: Mauvais mot de passe
+        logger.info("Login failed: incorrect password", extra={"user_id": user_data['id'], "remote_addr": flask.request.remote_addr})
     else:
-        print(f"Login FAILED: User with email '{email}' not found in database.")
-        flask.flash('Adresse e-mail ou mot de passe incorrect.', 'error') # Message générique
-        # Rediriger vers la page de login pour afficher l'erreur flash
-        try:
-            login_path = dash.page_registry['pages.login']['relative_path']
-            print(f"Redirecting back to login (user not found): {login_path}")
-            print("--- LOGIN POST END (User Not Found) ---\n")
-            return flask.redirect(login_path)
-        except KeyError:
-             print("WARNING: 'pages.login' not found in page_registry. Redirecting to '/login'.")
-             print("--- LOGIN POST END (User Not Found - Fallback) ---\n")
-             return flask.redirect('/login')
-
-    # Note: Théoriquement, on ne devrait jamais atteindre ce point car tous les cas mènent à un return.
-    # Mais par sécurité, on peut ajouter un fallback final.
-    print("ERROR: Reached unexpected end of login_post function.")
-    print("--- LOGIN POST END (Unexpected Fallthrough) ---\n")
-    return flask.redirect('/login') # Fallback général
+        # Chemin 3: Utilisateur non trouvé dans la base de données
+        logger.info("Login failed: unknown email", extra={"remote_addr": flask.request.remote_addr})
+    flask.flash('Adresse e-mail ou mot de passe incorrect.', 'error') # Message générique
+    # Rediriger vers la page de login pour afficher l'erreur flash
+    return flask.redirect(_page_path('pages.login', '/login'))
+
 @server.route('/logout')
 def logout():
     logout_user()
@@ -237,7 +285,11 @@ def logout():
 
 @server.route('/register', methods=['POST'])
 def register_post():
-    print("\n--- REGISTER POST START ---")
+    # Limitation par adresse client, avant la vérification de l'email en DB et le hachage
+    retry_after = get_limiter().hit('register_ip', flask.request.remote_addr)
+    if retry_after:
+        logger.warning("Registration throttled", extra={"remote_addr": flask.request.remote_addr, "retry_after": retry_after})
+        return too_many_attempts(retry_after)
     # 1. Récupérer les données du formulaire
     first_name = flask.request.form.get('first_name')
     last_name = flask.request.form.get('last_name')
@@ -247,8 +299,6 @@ def register_post():
     confirm_password = flask.request.form.get('confirm_password')
     username = f"{first_name} {last_name}" if first_name and last_name else email # Créer un username
 
-    print(f"Registration attempt for: {email}")
-
     # 2. Valider les données (TRÈS IMPORTANT)
     error_messages = []
     email_regex = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
@@ -259,96 +309,154 @@ def register_post():
         error_messages.append("Email requis.")
     elif not re.match(email_regex, email.strip()):
         error_messages.append("Format d'email invalide.")
-    # Ajouter validation pour l'âge si nécessaire
-    # Exemple: if age and not age.isdigit(): error_messages.append("L'âge doit être un nombre.")
+    if age and age.strip():
+        if not age.strip().isdigit() or not 0 <= int(age.strip()) <= 150:
+            error_messages.append("L'âge doit être un nombre entre 0 et 150.")
+        else:
+            age = int(age.strip())
+    else:
+        age = None # Champ facultatif
 
     if not password: error_messages.append("Mot de passe requis.")
     elif len(password) < 6: error_messages.append("Le mot de passe doit faire au moins 6 caractères.")
     elif password != confirm_password: error_messages.append("Les mots de passe ne correspondent pas.")
 
-    # Vérifier si l'email existe déjà dans la DB (seulement si pas déjà d'autres erreurs)
-    # Et si l'email est valide
-    if not error_messages and email and re.match(email_regex, email.strip()):
-        if find_user_by_email(email.strip()): # Utilise la fonction existante
-             error_messages.append("Cette adresse e-mail est déjà utilisée.")
+    # L'unicité de l'email n'est pas vérifiée ici : l'INSERT s'appuie sur la contrainte UNIQUE
+    # (une seule requête, et pas de fenêtre entre vérification et insertion)
 
     # 3. Si erreurs, retourner à la page avec message(s) flash
     if error_messages:
         for msg in error_messages:
             # Utiliser une catégorie pour pouvoir cibler le bon Div avec le callback flash
             flask.flash(msg, 'register-error')
-        print(f"Registration FAILED for {email}: {error_messages}")
-        print("--- REGISTER POST END (Validation Fail) ---\n")
+        logger.info("Registration failed: validation", extra={"errors": error_messages})
         # Rediriger vers la page de login pour voir les messages
         # (Il faudrait idéalement aussi passer l'onglet 'register' comme actif)
-        try:
-            login_path = dash.page_registry['pages.login']['relative_path']
-            # Optionnel: ajouter un ?tab=register à l'URL pour essayer d'ouvrir le bon onglet
-            # return flask.redirect(f"{login_path}?tab=register")
-            return flask.redirect(login_path)
-        except KeyError:
-             return flask.redirect('/login')
-
+        # Optionnel: ajouter un ?tab=register à l'URL pour essayer d'ouvrir le bon onglet
+        return flask.redirect(_page_path('pages.login', '/login'))
 
     # 4. Si valide, créer l'utilisateur
     try:
-        print(f"Data validation passed for {email}. Attempting to create user.")
-        password_hash = generate_password_hash(password)
+        password_hash = get_hasher().hash(password) # Lève HashingBusy si le service est saturé
         # Assurez-vous que cette fonction existe et gère bien les erreurs
         new_user_id = create_user_in_db(email.strip(), username, password_hash, role='user', age=age)
 
         if new_user_id:
-             print(f"Registration SUCCESS for {email}. New user ID: {new_user_id}")
+             logger.info("Registration success", extra={"user_id": new_user_id})
              # Message de succès avec une catégorie différente
              flask.flash("Compte créé avec succès ! Vous pouvez maintenant vous connecter.", 'register-success')
-             print("--- REGISTER POST END (Success) ---\n")
-             try:
-                 login_path = dash.page_registry['pages.login']['relative_path']
-                 return flask.redirect(login_path) # Rediriger vers login après succès
-             except KeyError:
-                 return flask.redirect('/login')
+        elif new_user_id is False:
+             # Contrainte UNIQUE sur l'email
+             logger.info("Registration failed: email already in use")
+             flask.flash("Cette adresse e-mail est déjà utilisée.", 'register-error')
         else:
-             # Erreur lors de la création en DB (ex: email déjà pris malgré la vérif, ou autre)
-             print(f"Registration FAILED for {email}: Database insertion error (maybe email constraint?).")
-             flask.flash("Erreur lors de la création du compte (l'email est peut-être déjà pris). Veuillez réessayer.", 'register-error')
-             print("--- REGISTER POST END (DB Error) ---\n")
-             try:
-                 login_path = dash.page_registry['pages.login']['relative_path']
-                 return flask.redirect(login_path)
-             except KeyError:
-                 return flask.redirect('/login')
-
-    except Exception as e:
-        print(f"EXCEPTION during registration processing for {email}: {e}") # Log l'erreur serveur
+             logger.warning("Registration failed: database insertion error")
+             flask.flash("Erreur lors de la création du compte. Veuillez réessayer.", 'register-error')
+    except HashingBusy as e:
+        logger.warning("Registration deferred: password hashing busy", extra={"reason": str(e)})
+        flask.flash("Service momentanément surchargé, veuillez réessayer dans quelques secondes.", 'register-error')
+    except Exception:
+        logger.exception("Unexpected error during registration") # Log l'erreur serveur (trace incluse)
         flask.flash("Une erreur serveur inattendue s'est produite.", 'register-error')
-        print("--- REGISTER POST END (Exception) ---\n")
-        try:
-            login_path = dash.page_registry['pages.login']['relative_path']
-            return flask.redirect(login_path)
-        except KeyError:
-            return flask.redirect('/login')
+    return flask.redirect(_page_path('pages.login', '/login')) # Rediriger vers login (succès ou erreur)
 # --- FIN DE LA NOUVELLE ROUTE ---
 
 def create_user_in_db(email, username, password_hash, role='user', age=None):
-    """Insère un nouvel utilisateur dans la DB. Retourne l'ID ou None."""
+    """Insère un nouvel utilisateur dans la DB. Retourne l'ID, False si l'email existe déjà, None sinon."""
     db = get_db()
     try:
         cursor = db.execute(
-            'INSERT INTO users (email, username, password_hash, role) VALUES (?, ?, ?, ?)',
-            (email, username, password_hash, role)
+            'INSERT INTO users (email, username, password_hash, role, age) VALUES (?, ?, ?, ?, ?)',
+            (email, username, password_hash, role, age)
         )
         db.commit()
-        print(f"DB: User {email} inserted with ID: {cursor.lastrowid}")
+        logger.debug("User inserted", extra={"user_id": cursor.lastrowid})
         return cursor.lastrowid
     except sqlite3.IntegrityError: # Email déjà pris (contrainte UNIQUE)
-        print(f"DB ERROR: Email {email} already exists (IntegrityError).")
         db.rollback() # Annuler la transaction
-        return None
-    except sqlite3.Error as e: # Autre erreur SQLite
-        print(f"DB ERROR in create_user_in_db for {email}: {e}")
+        return False
+    except sqlite3.Error: # Autre erreur SQLite
+        logger.exception("Database error in create_user_in_db")
         db.rollback()
         return None
 
+def update_password_hash(user_id, password_hash):
+    """Remplace le hash d'un utilisateur (rehash aux paramètres courants). Retourne True si réussi."""
+    db = get_db()
+    try:
+        db.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
+        db.commit()
+        logger.info("Password hash upgraded", extra={"user_id": user_id})
+        return True
+    except sqlite3.Error: # Non bloquant : l'ancien hash reste valide
+        logger.exception("Database error in update_password_hash", extra={"user_id": user_id})
+        db.rollback()
+        return False
+
+# --- API JSON (interface agent) ---
+@server.route('/api/reclamations/<reclamation_id>', methods=['GET'])
+def reclamation_detail_api(reclamation_id):
+    """Détail d'une réclamation en JSON, réservé aux admins (ETag + revalidation à chaque ouverture)."""
+    if not current_user.is_authenticated:
+        return flask.jsonify(error="Authentification requise."), 401
+    if getattr(current_user, 'role', None) != 'admin':
+        return flask.jsonify(error="Accès réservé aux administrateurs."), 403
+    try:
+        document = get_reclamation_document(reclamation_id)
+    except (sqlite3.Error, OSError):
+        logger.exception("Erreur lors de la lecture de la réclamation", extra={"reclamation_id": reclamation_id})
+        return flask.jsonify(error="Erreur de lecture des réclamations."), 500
+    if document is None:
+        return flask.jsonify(error=f"Réclamation ID {reclamation_id} non trouvée."), 404
+    body, etag = document
+    response = flask.Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # 'private' : réponse propre à la session admin ; 'no-cache' : toujours revalidée (le statut peut changer)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    # If-None-Match identique -> 304 sans corps
+    return response.make_conditional(flask.request)
+
+# --- API du chatbot (mode flux) ---
+CHAT_MESSAGE_MAX_CHARS = 2000
+
+@server.route('/api/chat/stream', methods=['POST'])
+def chat_stream_api():
+    """Réponse du chatbot en server-sent events ('token' par morceau, puis 'done'), enregistrée dans l'historique."""
+    payload = flask.request.get_json(silent=True) or {} # JSON uniquement : pas de POST de formulaire d'un autre site
+    message = payload.get('message')
+    if not isinstance(message, str) or not message.strip():
+        return flask.jsonify(error="Message vide."), 400
+    if len(message) > CHAT_MESSAGE_MAX_CHARS:
+        return flask.jsonify(error=f"Message trop long (au plus {CHAT_MESSAGE_MAX_CHARS} caractères)."), 400
+    user_id = current_user.id if current_user.is_authenticated else None
+
+    def save_exchange(text):
+        if user_id is None:
+            return
+        try:
+            save_messages(user_id, [("user", message), ("bot", text)])
+        except sqlite3.Error: # Non bloquant : la réponse est déjà affichée
+            logger.exception("Erreur lors de l'enregistrement des messages de chat", extra={"user_id": user_id})
+
+    events = reply_events(get_engine(), message, on_complete=save_exchange)
+    response = flask.Response(flask.stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no' # Proxy nginx : transmettre chaque morceau sans tampon
+    return response
+
+@server.route('/api/metrics/caches', methods=['GET'])
+def cache_metrics_api():
+    """Compteurs des caches du worker courant (hits, misses, taux de hit), du service de réponse et logs perdus, réservé aux admins."""
+    if not current_user.is_authenticated:
+        return flask.jsonify(error="Authentification requise."), 401
+    if getattr(current_user, 'role', None) != 'admin':
+        return flask.jsonify(error="Accès réservé aux administrateurs."), 403
+    response = flask.jsonify(pid=os.getpid(), users=user_cache_stats(), reclamations=reclamations_cache_stats(),
+                             answers=answer_cache_stats(), backend=backend_stats(), logs_dropped=dropped_messages())
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 app.layout = html.Div(
     [
         dcc.Location(id='url', refresh=True), # refresh peut être utile
@@ -398,12 +506,11 @@ def display_flash_messages_login(pathname):
     Input('theme-store', 'data')
 )
 def update_theme_class(theme_value):
-    print(f"APP.PY Callback: Received from theme-store: {theme_value}")
+    # Appelé à chaque chargement de page : message DEBUG échantillonné
+    logger.debug("Theme applied", extra={"theme": theme_value, "sample_rate": 0.01})
     if theme_value == 'dark':
-        print(f"APP.PY Callback: Applying className: theme-dark")
         return 'theme-dark'
     else:
-        print(f"APP.PY Callback: Applying className: theme-light")
         return 'theme-light'
 
 # Callback pour le Toggler de la Navbar (si vous avez un menu burger)
@@ -450,8 +557,8 @@ def display_flash_messages_register(pathname):
 
 
 # --- Lancement de l'Application ---
+# Développement uniquement (un processus, rechargement automatique).
+# En production : gunicorn -c gunicorn.conf.py wsgi:server (voir wsgi.py)
 if __name__ == '__main__':
-    # Initialiser la DB si nécessaire (mieux via 'flask init-db' en terminal)
-    # with server.app_context():
-    #    init_db()
+    # Schéma mis à jour avant la première requête (ensure_schema) ; 'flask db-upgrade' pour le faire à la main
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,69 @@
+/* --- Interface agent : chargement paresseux du détail d'une réclamation --- */
+(function () {
+  // id -> {etag, data} : une réponse 304 réutilise l'objet déjà décodé (aucun nouveau parsing)
+  const detailCache = new Map();
+  const noUpdate = () => window.dash_clientside.no_update;
+
+  function listItem(text) {
+    return {namespace: "dash_html_components", type: "Li", props: {children: text}};
+  }
+
+  function detailOutputs(data) {
+    const historique = (data.historique || []).map((h) => listItem(`${h.statut} le ${h.date}`));
+    return [
+      true,
+      `Détails - ${data.nom || "N/A"}`,
+      data.date || "N/A",
+      data.email || "N/A",
+      data.statut || "N/A",
+      historique.length ? historique : [listItem("Aucune transition.")],
+      data.description || "N/A",
+    ];
+  }
+
+  function errorOutputs(message) {
+    return [true, "Réclamation indisponible", "", "", "", [], message];
+  }
+
+  async function fetchDetail(reclamationId) {
+    const cached = detailCache.get(reclamationId);
+    const headers = cached ? {"If-None-Match": cached.etag} : {};
+    // 'no-store' : la revalidation est gérée ici, pas par le cache HTTP du navigateur
+    const response = await fetch(`/api/reclamations/${encodeURIComponent(reclamationId)}`, {
+      headers: headers,
+      cache: "no-store",
+      credentials: "same-origin",
+    });
+    if (response.status === 304 && cached) {
+      return cached.data;
+    }
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({}));
+      throw new Error(error.error || `Erreur ${response.status}`);
+    }
+    const data = await response.json();
+    const etag = response.headers.get("ETag");
+    if (etag) {
+      detailCache.set(reclamationId, {etag: etag, data: data});
+    }
+    return data;
+  }
+
+  window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    agent: {
+      showReclamationDetail: function (nClicks, searchNClicks, closeClicks) {
+        // Le contexte du callback n'est disponible que pendant l'appel synchrone
+        const triggered = window.dash_clientside.callback_context.triggered_id;
+        const outputsCount = 7;
+        if (triggered === "agent-close-modal-button") {
+          return [false].concat(Array(outputsCount - 1).fill(noUpdate()));
+        }
+        // Le re-rendu de la table déclenche aussi ce callback : on n'ouvre que sur un vrai clic
+        if (!triggered || !triggered.index || ![...nClicks, ...searchNClicks].some((click) => click)) {
+          return Array(outputsCount).fill(noUpdate());
+        }
+        return fetchDetail(triggered.index).then(detailOutputs, (error) => errorOutputs(error.message));
+      },
+    },
+  });
+})();
@@ -0,0 +1,94 @@
+/* --- Accueil : réponse du chatbot affichée au fil de sa génération (server-sent events) --- */
+(function () {
+  const STREAM_URL = "/api/chat/stream";
+  let streamCount = 0; // Chaque réponse en cours a son propre id de bulle
+
+  function bubble(text, className, id) {
+    const props = {children: text, className: className};
+    if (id) {
+      props.id = id;
+    }
+    return {namespace: "dash_html_components", type: "Div", props: props};
+  }
+
+  function parseEvent(block) {
+    // "event: <nom>" puis "data: <json>" ; les lignes de commentaire (":") sont ignorées
+    let name = "message";
+    const data = [];
+    for (const line of block.split("\n")) {
+      if (line.startsWith("event:")) {
+        name = line.slice(6).trim();
+      } else if (line.startsWith("data:")) {
+        data.push(line.slice(5).trimStart());
+      }
+    }
+    return {name: name, data: data.length ? JSON.parse(data.join("\n")) : null};
+  }
+
+  async function readStream(message, onToken) {
+    // fetch plutôt qu'EventSource : POST (le message n'apparaît pas dans l'URL ni les logs d'accès)
+    const response = await fetch(STREAM_URL, {
+      method: "POST",
+      headers: {"Content-Type": "application/json", "Accept": "text/event-stream"},
+      body: JSON.stringify({message: message}),
+      cache: "no-store",
+      credentials: "same-origin",
+    });
+    if (!response.ok || !response.body) {
+      const error = await response.json().catch(() => ({}));
+      throw new Error(error.error || `Erreur ${response.status}`);
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const {value, done} = await reader.read();
+      if (done) {
+        throw new Error("Réponse interrompue.");
+      }
+      buffer += decoder.decode(value, {stream: true});
+      let end;
+      while ((end = buffer.indexOf("\n\n")) >= 0) {
+        const event = parseEvent(buffer.slice(0, end));
+        buffer = buffer.slice(end + 2);
+        if (event.name === "token") {
+          onToken(event.data.text);
+        } else if (event.name === "done") {
+          return;
+        } else if (event.name === "error") {
+          throw new Error(event.data.error);
+        }
+      }
+    }
+  }
+
+  window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    chat: {
+      streamReply: function (nClicks, message, messageCount, maxMessages) {
+        const dc = window.dash_clientside;
+        if (!nClicks || !message || !message.trim()) {
+          return dc.no_update;
+        }
+        // Message de l'utilisateur et bulle de réponse affichés tout de suite (Patch : pas de renvoi de l'historique)
+        const replyId = `chat-stream-reply-${++streamCount}`;
+        const patch = new dc.Patch()
+          .append([], bubble(`Vous: ${message}`, "user-message chatbot-message-right"))
+          .append([], bubble("…", "chatbot-message chatbot-message-left", replyId));
+        let count = (messageCount || 0) + 2;
+        while (count > maxMessages) { // Même fenêtre glissante que le callback update_chat
+          patch.delete([0]);
+          count -= 1;
+        }
+        dc.set_props("chatbot-container", {children: patch.build()});
+        let text = "";
+        readStream(message, (chunk) => {
+          text += chunk;
+          dc.set_props(replyId, {children: text});
+        }).catch((error) => {
+          dc.set_props(replyId, {children: text ? `${text} […]` : `⚠️ ${error.message}`});
+        });
+        return count;
+      },
+    },
+  });
+})();
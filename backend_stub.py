@@ -0,0 +1,73 @@
+"""Service de réponse factice pour tester le moteur "backend" (services/backend.py) en local.
+
+Répond à POST /reply {"message", "language"} par {"answer"} (réponse de la FAQ),
+avec une latence et un taux d'erreur réglables pour simuler un service lent ou instable.
+
+    python backend_stub.py --port 8099 --delay 0.5 --fail-rate 0.1
+    CIRACBOT_RESPONSE_ENGINE=backend CIRACBOT_BACKEND_URL=http://127.0.0.1:8099/reply python app.py
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_handler(engine, delay, jitter, fail_rate):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, data):
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != "/reply":
+                return self._send_json(404, {"error": "not found"})
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(max(0.0, delay + random.uniform(-jitter, jitter)))
+            if random.random() < fail_rate:
+                return self._send_json(503, {"error": "simulated failure"})
+            self._send_json(200, {"answer": engine.reply(payload.get("message", "")).text})
+
+        def log_message(self, format, *args):
+            pass # Une ligne par requête : trop bavard sous charge
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay", type=float, default=0.2, help="latence moyenne en secondes")
+    parser.add_argument("--jitter", type=float, default=0.05, help="variation de latence (+/- secondes)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="part des requêtes en erreur 503")
+    args = parser.parse_args()
+
+    os.environ.setdefault("CIRACBOT_LOG_LEVEL", "WARNING")
+    sys.path.insert(0, REPO_DIR)
+    from services.responses import FaqEngine
+
+    engine = FaqEngine(os.path.join(REPO_DIR, "faq.json"))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(engine, args.delay, args.jitter, args.fail_rate))
+    print(f"Service de réponse factice sur http://{args.host}:{args.port}/reply "
+          f"(latence {args.delay}s, erreurs {args.fail_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
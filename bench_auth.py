@@ -0,0 +1,195 @@
+"""Benchmark d'une rafale de connexions : débit de /login et latence des autres requêtes.
+
+Pour chaque mode de hachage (dans le thread de la requête, ou dans le pool de
+processus de services/passwords.py), un processus neuf démarre l'application
+sur un serveur WSGI local multi-thread, mesure la latence d'une requête sans
+rapport (GET /_dash-layout) au repos, puis pendant que plusieurs clients
+enchaînent les POST /login. Les résultats sont écrits en JSON.
+
+    python bench_auth.py --clients 16 --duration 10 --output bench_auth.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_PASSWORD = "motdepasse-bench"
+MODES = {
+    "inline": {"CIRACBOT_HASH_WORKERS": "0"},
+    "process_pool": {},
+}
+
+
+def percentiles(samples_ms):
+    samples_ms = sorted(samples_ms)
+    if not samples_ms:
+        return {"samples": 0}
+    pick = lambda q: round(samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * q))], 3)
+    return {"samples": len(samples_ms), "p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(samples_ms[-1], 3)}
+
+
+def probe_latencies(port, stop, results):
+    """Requête sans rapport avec l'authentification, répétée jusqu'à 'stop'."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.request("GET", "/_dash-layout")
+        conn.getresponse().read()
+        results.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+    conn.close()
+
+
+def login_client(port, users, stop, counters, latencies, retry_delay):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    i = 0
+    while not stop.is_set():
+        body = urlencode({"email": users[i % len(users)], "password": BENCH_PASSWORD})
+        start = time.perf_counter()
+        conn.request("POST", "/login", body=body, headers={"Content-Type": "application/x-www-form-urlencoded"})
+        response = conn.getresponse()
+        response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        # Redirection vers l'accueil = succès ; vers /login = refus (service saturé, flash)
+        if response.getheader("Location", "").rstrip("/") in ("", "/"):
+            counters["ok"] += 1
+        else:
+            counters["rejected"] += 1
+            time.sleep(retry_delay) # Un vrai client attend avant de réessayer
+        i += 1
+    conn.close()
+
+
+def run_mode(mode, clients, duration, users_count, retry_delay, queue):
+    workdir = tempfile.mkdtemp(prefix="ciracbot-bench-auth-")
+    os.chdir(workdir)
+    os.environ.update(MODES[mode])
+    os.environ.setdefault("CIRACBOT_LOG_LEVEL", "WARNING") # Pas de ligne de log par opération mesurée
+    sys.path.insert(0, REPO_DIR)
+    devnull = open(os.devnull, "w")
+    sys.stdout = devnull # Les handlers affichent plusieurs lignes par requête
+    try:
+        from werkzeug.serving import make_server
+        import app
+        from services.passwords import HASH_WORKERS, HASH_METHOD, get_hasher
+
+        with app.server.app_context():
+            app.init_db()
+            password_hash = get_hasher().hash(BENCH_PASSWORD)
+            db = app.get_db()
+            users = [f"bench{i}@example.com" for i in range(users_count)]
+            db.executemany(
+                'INSERT INTO users (email, username, password_hash, role) VALUES (?, ?, ?, ?)',
+                [(email, email, password_hash, "user") for email in users]
+            )
+            db.commit()
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR) # Pas de ligne d'accès par requête
+        server = make_server("127.0.0.1", 0, app.server, threaded=True)
+        port = server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        # Latence au repos
+        stop, idle = threading.Event(), []
+        probe = threading.Thread(target=probe_latencies, args=(port, stop, idle))
+        probe.start()
+        time.sleep(min(3.0, duration))
+        stop.set()
+        probe.join()
+
+        # Rafale de connexions
+        stop, storm, login_latencies = threading.Event(), [], []
+        counters = {"ok": 0, "rejected": 0}
+        threads = [threading.Thread(target=login_client, args=(port, users, stop, counters, login_latencies, retry_delay)) for _ in range(clients)]
+        threads.append(threading.Thread(target=probe_latencies, args=(port, stop, storm)))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+        get_hasher().shutdown()
+
+        cores = os.cpu_count() or 1
+        logins_per_s = counters["ok"] / elapsed
+        queue.put({
+            "mode": mode,
+            "hash_method": HASH_METHOD,
+            "hash_workers": HASH_WORKERS if mode != "inline" else 0,
+            "clients": clients,
+            "duration_s": round(elapsed, 2),
+            "logins_ok": counters["ok"],
+            "logins_rejected_busy": counters["rejected"],
+            "logins_per_s": round(logins_per_s, 2),
+            "logins_per_s_per_core": round(logins_per_s / cores, 2),
+            "login_latency": percentiles(login_latencies),
+            "unrelated_request_idle": percentiles(idle),
+            "unrelated_request_during_storm": percentiles(storm),
+        })
+    except Exception as e:
+        queue.put({"mode": mode, "error": repr(e)})
+    finally:
+        sys.stdout = sys.__stdout__
+        devnull.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16, help="Clients enchaînant les POST /login")
+    parser.add_argument("--duration", type=float, default=10, help="Durée de la rafale (secondes)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--retry-delay", type=float, default=0.5, help="Pause d'un client après un refus (service saturé)")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Modes séparés par des virgules ({', '.join(MODES)})")
+    parser.add_argument("--output", default="bench_auth.json", help="Fichier JSON de résultats ('-' pour la sortie standard)")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for mode in args.modes.split(","):
+        print(f"Benchmark connexion : mode {mode}...", file=sys.stderr)
+        queue = context.Queue()
+        process = context.Process(target=run_mode, args=(mode, args.clients, args.duration, args.users, args.retry_delay, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        results.append(result)
+        if "error" in result:
+            print(f"  Erreur : {result['error']}", file=sys.stderr)
+            continue
+        print(f"  {result['logins_per_s']} connexions/s ({result['logins_per_s_per_core']} par cœur), "
+              f"{result['logins_rejected_busy']} refusées ; requête annexe p99 "
+              f"{result['unrelated_request_idle'].get('p99_ms')} ms au repos -> "
+              f"{result['unrelated_request_during_storm'].get('p99_ms')} ms pendant la rafale", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Résultats écrits dans {args.output}", file=sys.stderr)
+    sys.exit(1 if any("error" in result for result in results) else 0)
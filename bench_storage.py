@@ -0,0 +1,254 @@
+"""Benchmarks du stockage : réclamations (SQLite et journal), notes et utilisateurs.
+
+Pour chaque taille de jeu de données et chaque mode de stockage des réclamations,
+un processus neuf est lancé dans un dossier temporaire : il génère les données,
+puis mesure la latence d'écriture, le rendu de l'onglet de suivi, les tris, la
+lecture d'une réclamation, l'enregistrement d'une note, la recherche d'un
+utilisateur par email et le pic mémoire de chaque opération. Les résultats sont
+écrits en JSON pour comparer les versions entre elles.
+
+    python bench_storage.py --sizes 1000,100000 --output bench_storage.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+try:
+    import resource
+except ImportError: # Windows : pas de ru_maxrss
+    resource = None
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = "1000,100000,1000000"
+SEED_BATCH_SIZE = 10000
+NOMS = ["Dupont", "Martin", "Bernard", "Durand", "Lefèvre", "Moreau", "Élodie Roux", "Girard", "Bonnet", "Mercier"]
+MOTS = ["carte", "bloquée", "virement", "frais", "prélèvement", "plafond", "opposition", "agence", "chèque", "découvert"]
+
+
+def synthetic_reclamation(i, base_date):
+    return {
+        "id": str(uuid.UUID(int=i)),
+        "nom": f"{NOMS[i % len(NOMS)]} {i}",
+        "email": f"client{i}@example.com",
+        "description": " ".join(MOTS[(i * k) % len(MOTS)] for k in range(1, 9)),
+        "date": (base_date + timedelta(minutes=i)).strftime("%d/%m/%Y %H:%M"),
+        "statut": "En attente",
+    }
+
+
+def seed(size, storage_mode):
+    """Génère 'size' réclamations, notes et utilisateurs dans le dossier courant."""
+    import app
+    import storage.reclamations as reclamations
+    from storage.files import atomic_write_json
+
+    base_date = datetime(2020, 1, 1)
+    with app.server.app_context():
+        app.init_db()
+        db = app.get_db()
+        for start in range(0, size, SEED_BATCH_SIZE):
+            stop = min(start + SEED_BATCH_SIZE, size)
+            db.executemany(
+                'INSERT INTO users (email, username, password_hash, role) VALUES (?, ?, ?, ?)',
+                ((f"client{i}@example.com", f"client{i}", "bench-hash", "user") for i in range(start, stop))
+            )
+            if storage_mode == "sqlite":
+                db.executemany(
+                    'INSERT INTO reclamations (id, nom, email, description, date, statut, date_ts, nom_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (reclamations._to_db_row(synthetic_reclamation(i, base_date)) for i in range(start, stop))
+                )
+        db.commit()
+
+    if storage_mode == "journal":
+        from storage.reclamations_journal import SNAPSHOT_FILE
+        records = []
+        for i in range(size):
+            reclamation = synthetic_reclamation(i, base_date)
+            reclamation.update(reclamations.sort_keys(reclamation))
+            records.append(reclamation)
+        atomic_write_json(SNAPSHOT_FILE, records)
+        del records
+
+    from pages.accueil import RATING_FILE
+    atomic_write_json(RATING_FILE, [
+        {"rating": 1 + i % 5, "timestamp": (base_date + timedelta(minutes=i)).isoformat()} for i in range(size)
+    ])
+
+
+def summarize(durations, peak_bytes):
+    durations_ms = sorted(d * 1000 for d in durations)
+    return {
+        "samples": len(durations_ms),
+        "mean_ms": round(statistics.fmean(durations_ms), 4),
+        "p50_ms": round(durations_ms[len(durations_ms) // 2], 4),
+        "p95_ms": round(durations_ms[min(len(durations_ms) - 1, int(len(durations_ms) * 0.95))], 4),
+        "max_ms": round(durations_ms[-1], 4),
+        "peak_memory_kb": round(peak_bytes / 1024, 1),
+    }
+
+
+def measure(operation, samples, prepare=None):
+    """Chronomètre 'samples' appels, puis mesure le pic mémoire (tracemalloc) d'un appel supplémentaire."""
+    durations = []
+    for i in range(samples):
+        args = prepare(i) if prepare else ()
+        start = time.perf_counter()
+        operation(*args)
+        durations.append(time.perf_counter() - start)
+    # tracemalloc ralentit fortement les allocations : passe séparée, hors chronométrage
+    args = prepare(samples) if prepare else ()
+    tracemalloc.start()
+    try:
+        operation(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return summarize(durations, peak)
+
+
+def run_case(size, storage_mode, samples, heavy_samples, queue):
+    """Exécuté dans un processus neuf : génère les données puis mesure chaque opération."""
+    workdir = tempfile.mkdtemp(prefix="ciracbot-bench-")
+    os.chdir(workdir)
+    os.environ["RECLAMATIONS_STORAGE"] = storage_mode
+    os.environ.setdefault("CIRACBOT_LOG_LEVEL", "WARNING") # Pas de ligne de log par opération mesurée
+    sys.path.insert(0, REPO_DIR)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            queue.put(_run_case(size, storage_mode, samples, heavy_samples))
+    except Exception as e:
+        queue.put({"storage": storage_mode, "size": size, "error": repr(e)})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run_case(size, storage_mode, samples, heavy_samples):
+    start = time.perf_counter()
+    seed(size, storage_mode)
+    seed_seconds = time.perf_counter() - start
+
+    import app
+    import storage.reclamations as reclamations
+    from pages.accueil import save_rating
+    from pages.agent import DEFAULT_PAGE_STATE, suivi_reclamations_tab
+
+    rng = random.Random(42)
+    base_date = datetime(2020, 1, 1)
+    operations = {}
+
+    def cold_cache(*_):
+        reclamations._cache.clear()
+        return ()
+
+    # Premier accès : ouverture de la table, ou relecture complète du snapshot en mode journal
+    operations["cold_open"] = measure(lambda: reclamations.get_reclamation(str(uuid.UUID(int=0))), 1)
+    operations["write_reclamation"] = measure(
+        reclamations.add_reclamation, samples,
+        prepare=lambda i: (synthetic_reclamation(size + i, base_date) | {"id": str(uuid.uuid4())},)
+    )
+    operations["render_tab_cold"] = measure(
+        lambda: suivi_reclamations_tab({"column": "date", "direction": False}, DEFAULT_PAGE_STATE), samples, prepare=cold_cache
+    )
+    operations["render_tab_warm"] = measure(
+        lambda: suivi_reclamations_tab({"column": "date", "direction": False}, DEFAULT_PAGE_STATE), samples
+    )
+    operations["sort_page_nom_desc"] = measure(
+        lambda: reclamations.list_reclamations_page("nom", descending=True), samples, prepare=cold_cache
+    )
+    operations["list_all_date"] = measure(lambda: reclamations.list_reclamations("date"), heavy_samples)
+    operations["sort_all_nom_desc"] = measure(lambda: reclamations.list_reclamations("nom", descending=True), heavy_samples)
+    operations["detail_lookup"] = measure(
+        reclamations.get_reclamation, samples,
+        prepare=lambda i: cold_cache() + (str(uuid.UUID(int=rng.randrange(size))),)
+    )
+    operations["save_rating"] = measure(save_rating, heavy_samples, prepare=lambda i: (1 + i % 5,))
+    with app.server.app_context():
+        operations["find_user_by_email"] = measure(
+            app.find_user_by_email, samples, prepare=lambda i: (f"client{rng.randrange(size)}@example.com",)
+        )
+
+    result = {
+        "storage": storage_mode,
+        "size": size,
+        "seed_seconds": round(seed_seconds, 3),
+        "operations": operations,
+    }
+    if resource is not None:
+        # ru_maxrss : Ko sous Linux, octets sous macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result["peak_rss_kb"] = maxrss // 1024 if sys.platform == "darwin" else maxrss
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Tailles séparées par des virgules (défaut : {DEFAULT_SIZES})")
+    parser.add_argument("--storage", choices=["sqlite", "journal", "all"], default="all")
+    parser.add_argument("--samples", type=int, default=50, help="Mesures par opération unitaire")
+    parser.add_argument("--heavy-samples", type=int, default=3, help="Mesures par opération sur tout le jeu (listes complètes, notes)")
+    parser.add_argument("--output", default="bench_storage.json", help="Fichier JSON de résultats ('-' pour la sortie standard)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    modes = ["sqlite", "journal"] if args.storage == "all" else [args.storage]
+    # 'spawn' : chaque cas part d'un interpréteur vierge (caches, pic RSS)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for size in sizes:
+        for mode in modes:
+            print(f"Benchmark {mode} / {size} enregistrements...", file=sys.stderr)
+            queue = context.Queue()
+            process = context.Process(target=run_case, args=(size, mode, args.samples, args.heavy_samples, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append(result)
+            if "error" in result:
+                print(f"  Erreur : {result['error']}", file=sys.stderr)
+                continue
+            for name, stats in result["operations"].items():
+                print(f"  {name:<22} p50 {stats['p50_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms  "
+                      f"pic {stats['peak_memory_kb']:>10.1f} Ko", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "samples": args.samples,
+            "heavy_samples": args.heavy_samples,
+        },
+        "results": results,
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Résultats écrits dans {args.output}", file=sys.stderr)
+    sys.exit(1 if any("error" in result for result in results) else 0)
@@ -1,6 +1,7 @@
 import sqlite3
 import os
 from werkzeug.security import generate_password_hash
+from storage.db import get_pool
 
 # Assurez-vous que ce chemin est correct par rapport à l'emplacement où vous exécutez le script
 DATABASE = 'ciracbot.db'
@@ -18,7 +19,7 @@ if not os.path.exists(DATABASE):
 
 conn = None
 try:
-    conn = sqlite3.connect(DATABASE)
+    conn = get_pool(DATABASE).acquire() # Même pool/PRAGMA (WAL, busy timeout) que l'application
     cursor = conn.cursor()
 
     # Vérifier si l'admin existe déjà
@@ -54,7 +55,7 @@ except Exception as e:
      print(f"An unexpected error occurred: {e}")
 finally:
     if conn:
-        conn.close()
+        get_pool(DATABASE).release(conn)
         # print("Database connection closed.") # Optionnel
 
 print("Script finished.")
\ No newline at end of file
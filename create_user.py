@@ -1,6 +1,7 @@
 import sqlite3
 import os
 from werkzeug.security import generate_password_hash
+from storage.db import get_pool
 
 # --- Configuration ---
 DATABASE = 'ciracbot.db' # Assurez-vous que c'est le bon nom de fichier DB
@@ -21,7 +22,7 @@ if not os.path.exists(DATABASE):
 
 conn = None
 try:
-    conn = sqlite3.connect(DATABASE)
+    conn = get_pool(DATABASE).acquire() # Même pool/PRAGMA (WAL, busy timeout) que l'application
     cursor = conn.cursor()
 
     # Vérifier si l'email existe déjà
@@ -57,6 +58,6 @@ except Exception as e:
      print(f"An unexpected error occurred: {e}")
 finally:
     if conn:
-        conn.close()
+        get_pool(DATABASE).release(conn)
 
 print("Script finished.")
\ No newline at end of file
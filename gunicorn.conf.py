@@ -0,0 +1,60 @@
+# Configuration gunicorn de production (voir wsgi.py) :
+#
+#     gunicorn -c gunicorn.conf.py wsgi:server
+#
+# Variables d'environnement :
+#   CIRACBOT_BIND              adresse d'écoute (défaut 0.0.0.0:8050)
+#   CIRACBOT_WORKERS           processus workers (défaut : cœurs + 1)
+#   CIRACBOT_THREADS           threads de requête par worker (défaut 4) ; une réponse en flux
+#                              (/api/chat/stream) en occupe un jusqu'à son dernier morceau
+#   CIRACBOT_TIMEOUT           secondes avant qu'un worker bloqué soit tué (défaut 60)
+#   CIRACBOT_GRACEFUL_TIMEOUT  secondes laissées aux requêtes en cours lors d'un arrêt/redémarrage (défaut 30)
+#   CIRACBOT_MAX_REQUESTS      requêtes avant recyclage d'un worker (défaut 0 = jamais)
+#   CIRACBOT_PROXY_FIX_X_FOR   proxys de confiance devant gunicorn (défaut 0 ; 1 derrière nginx) : l'adresse
+#                              du client (limites de tentatives) est lue dans X-Forwarded-For (voir app.py)
+#
+# Redémarrage sans coupure :
+#   kill -HUP <pid maître>     nouveaux workers démarrés (et préchauffés) avant l'arrêt gracieux des anciens ;
+#                              le code de l'application n'est pas rechargé (préchargé dans le maître)
+#   kill -USR2 <pid maître>    nouveau maître (nouveau code) à côté de l'ancien, puis
+#   kill -QUIT <ancien pid>    arrêt gracieux de l'ancien maître et de ses workers
+import multiprocessing
+import os
+
+bind = os.environ.get("CIRACBOT_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("CIRACBOT_WORKERS", str(multiprocessing.cpu_count() + 1)))
+threads = int(os.environ.get("CIRACBOT_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = int(os.environ.get("CIRACBOT_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("CIRACBOT_GRACEFUL_TIMEOUT", "30"))
+max_requests = int(os.environ.get("CIRACBOT_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10 # Les workers ne sont pas recyclés tous en même temps
+keepalive = 5
+
+# Application importée une fois dans le maître (pages Dash, migrations, préchauffage) puis partagée
+# par les workers en copie sur écriture
+preload_app = True
+
+# Chaque worker doit pouvoir servir tous ses threads sans attendre une connexion SQLite. Une requête
+# peut en tenir deux à la fois : celle de get_db() (flask.g, gardée jusqu'à la fin de la requête,
+# flux SSE compris) et celle d'un helper de storage/ (connection()) appelé pendant ce temps.
+# Avec un pool de 'threads' connexions, tous les threads pourraient tenir la première et attendre
+# la seconde jusqu'à POOL_TIMEOUT (l'écriture groupée du chat passe aussi par un thread de requête).
+db_pool_size = 2 * threads
+if db_pool_size > int(os.environ.get("CIRACBOT_DB_POOL_SIZE", "8")):
+    os.environ["CIRACBOT_DB_POOL_SIZE"] = str(db_pool_size)
+# Les pools de hachage de tous les workers se partagent les cœurs
+os.environ.setdefault("CIRACBOT_HASH_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
+# Appels simultanés au service de réponse (moteur "backend") : un thread reste libre pour les autres requêtes
+os.environ.setdefault("CIRACBOT_BACKEND_MAX_CONCURRENCY", str(max(1, threads - 1)))
+
+
+def post_fork(server, worker):
+    # Avant la première requête du worker : connexions SQLite ouvertes, pool de hachage démarré
+    import wsgi
+    wsgi.warm_up_worker(threads)
+
+
+def worker_exit(server, worker):
+    from services.passwords import get_hasher
+    get_hasher().shutdown()
@@ -1,54 +1,42 @@
+import os
+
 import dash
-from dash import html, dcc, Input, Output, State, ALL, callback_context, callback
+from dash import html, dcc, Input, Output, State, ALL, callback_context, callback, Patch, clientside_callback, ClientsideFunction
 import dash_bootstrap_components as dbc
-import json
+import sqlite3
 from datetime import datetime
-import os
+from flask_login import current_user
+from services.answer_cache import cached_reply
+from services.logs import get_logger
+from services.responses import get_engine
+from storage.chat import CHAT_PAGE_SIZE, get_conversation, load_messages, save_messages
+from storage.files import get_json_writer
 
 # Assure-toi que Bootstrap Icons est chargé dans ton app principale :
 # app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.BOOTSTRAP], use_pages=True)
 # Le fichier CSS personnalisé dans assets/style.css sera chargé automatiquement.
 
 dash.register_page(__name__, path='/') # Enregistrement de la page d'accueil
+logger = get_logger(__name__)
 
 # --- Configuration ---
 RATING_FILE = 'conversation_ratings.json' # Nom du fichier pour stocker les notes
+# Messages gardés dans la page : au-delà, les plus anciens sont retirés à chaque nouvel échange
+CHAT_HISTORY_MAX_MESSAGES = int(os.environ.get("CIRACBOT_CHAT_HISTORY_MAX", "200"))
+WELCOME_MESSAGE = "👋 Bonjour ! Comment puis-je vous aider ?"
 
 # --- Fonction pour sauvegarder la note ---
 def save_rating(rating_value):
-    """Sauvegarde la note donnée dans un fichier JSON."""
+    """Ajoute la note donnée au fichier JSON (sûr entre workers, écriture atomique)."""
     timestamp = datetime.now().isoformat()
     new_rating = {"rating": rating_value, "timestamp": timestamp}
-
-    ratings_data = []
-    if os.path.exists(RATING_FILE):
-        try:
-            with open(RATING_FILE, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if content:
-                    ratings_data = json.loads(content)
-                    if not isinstance(ratings_data, list):
-                        print(f"Avertissement : Le contenu de {RATING_FILE} n'est pas une liste JSON valide. Il sera écrasé.")
-                        ratings_data = []
-                else:
-                     ratings_data = []
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            print(f"Avertissement : Erreur de lecture/décodage de {RATING_FILE} ({e}). Un nouveau fichier sera créé ou le contenu sera écrasé.")
-            ratings_data = []
-        except Exception as e:
-             print(f"Erreur inattendue lors de la lecture de {RATING_FILE}: {e}")
-             ratings_data = []
-
-    ratings_data.append(new_rating)
-
     try:
-        with open(RATING_FILE, 'w', encoding='utf-8') as f:
-            json.dump(ratings_data, f, indent=4, ensure_ascii=False)
-        print(f"Note ({rating_value}) sauvegardée avec succès dans {RATING_FILE}")
-    except IOError as e:
-        print(f"Erreur lors de l'écriture dans le fichier {RATING_FILE}: {e}")
-    except Exception as e:
-        print(f"Erreur inattendue lors de l'écriture dans {RATING_FILE}: {e}")
+        get_json_writer(RATING_FILE, list).update(lambda ratings_data: ratings_data.append(new_rating))
+        logger.debug("Note sauvegardée", extra={"rating": rating_value})
+    except OSError:
+        logger.exception("Erreur lors de l'écriture des notes", extra={"file": RATING_FILE})
+    except Exception:
+        logger.exception("Erreur inattendue lors de l'écriture des notes", extra={"file": RATING_FILE})
 
 
 # --- Contenu initial du widget de notation ---
@@ -70,112 +58,189 @@ def create_rating_stars():
         ])
     ]
 
-# --- Layout de l'application ---
-layout = dbc.Container([
-    html.H1("Bienvenue sur CIRACbot", className="text-center mt-4"),
-    html.P("Votre assistant bancaire intelligent", className="text-center"),
-
-    # Chatbot Section
-    dbc.Row([
-        dbc.Col([
-            html.Div(id="chatbot-container", children=[
-                html.Div("👋 Bonjour ! Comment puis-je vous aider ?", className="chatbot-message chatbot-message-left"),
-            ], className="chatbot-box chatbot-scroll-area"),
-        ], width=12, md=10, lg=8)
-    ], justify="center", className="mb-3"),
-
-    # --- MODIFICATION ICI: Zone de saisie et icône "Envoyer" (Style comme l'image) ---
-    html.Div(
+def render_message(sender, body):
+    """Bulle de chat d'un message enregistré ou nouveau ('user' à droite, 'bot' à gauche)."""
+    if sender == "user":
+        return html.Div(f"Vous: {body}", className="user-message chatbot-message-right")
+    return html.Div(body, className="chatbot-message chatbot-message-left")
+
+def load_history():
+    """Dernière page de la conversation de l'utilisateur connecté : (bulles, curseur des messages précédents)."""
+    if not current_user.is_authenticated:
+        return [], None
+    try:
+        page = load_messages(get_conversation(current_user.id))
+    except sqlite3.Error:
+        logger.exception("Erreur lors de la lecture de l'historique de chat", extra={"user_id": current_user.id})
+        return [], None
+    return [render_message(m["sender"], m["body"]) for m in page["messages"]], page["older"]
+
+# --- Layout de l'application (fonction : l'historique dépend de l'utilisateur connecté) ---
+def layout():
+    history, older_cursor = load_history()
+    messages = history or [html.Div(WELCOME_MESSAGE, className="chatbot-message chatbot-message-left")]
+    # Moteur génératif : réponse affichée au fil de l'eau par assets/chat.js (/api/chat/stream)
+    # au lieu du callback update_chat, qui attend la réponse complète
+    send_button_id = "send-stream-btn" if get_engine().streaming else "send-btn"
+    return dbc.Container([
+        html.H1("Bienvenue sur CIRACbot", className="text-center mt-4"),
+        html.P("Votre assistant bancaire intelligent", className="text-center"),
+
+        # Chatbot Section
         dbc.Row([
             dbc.Col([
-                # Conteneur spécial pour l'input et l'icône (utilise les classes CSS de assets/style.css)
-                html.Div(
-                    [
-                        dbc.Input(
-                            id="user-input",      # ID pour récupérer la valeur dans le callback State
-                            type="text",
-                            placeholder="Écrivez votre message...",
-                            autocomplete="off",
-                            # La classe form-control est ajoutée par défaut par dbc.Input
-                            # Le style (arrondi, padding) est géré par le CSS
-                        ),
-                        # L'icône cliquable, positionnée par CSS
-                        html.I(
-                            className="bi bi-send-fill send-icon", # Icône Bootstrap + classe CSS perso
-                            id="send-btn",        # IMPORTANT: L'ID du bouton est maintenant sur l'icône
-                            n_clicks=0,           # Nécessaire pour que l'icône déclenche le callback Input
-                        )
-                    ],
-                    className="input-icon-container" # Applique la classe au conteneur
-                )
-            ], width=12, md=10, lg=8) # Ajuste la largeur comme avant
-        ],
-        justify="center" # Centre la colonne
+                dbc.Button(
+                    "Afficher les messages précédents", id="chat-load-older", color="link", size="sm",
+                    className="d-block mx-auto", style={} if older_cursor else {'display': 'none'}
+                ),
+                html.Div(id="chatbot-container", children=messages, className="chatbot-box chatbot-scroll-area"),
+                dcc.Store(id="chat-message-count", data=len(messages)), # Messages affichés (le contenu n'est jamais renvoyé au serveur)
+                dcc.Store(id="chat-older-cursor", data=older_cursor), # Curseur de la page précédente de l'historique
+                dcc.Store(id="chat-max-messages", data=CHAT_HISTORY_MAX_MESSAGES),
+            ], width=12, md=10, lg=8)
+        ], justify="center", className="mb-3"),
+
+        # --- MODIFICATION ICI: Zone de saisie et icône "Envoyer" (Style comme l'image) ---
+        html.Div(
+            dbc.Row([
+                dbc.Col([
+                    # Conteneur spécial pour l'input et l'icône (utilise les classes CSS de assets/style.css)
+                    html.Div(
+                        [
+                            dbc.Input(
+                                id="user-input",      # ID pour récupérer la valeur dans le callback State
+                                type="text",
+                                placeholder="Écrivez votre message...",
+                                autocomplete="off",
+                                # La classe form-control est ajoutée par défaut par dbc.Input
+                                # Le style (arrondi, padding) est géré par le CSS
+                            ),
+                            # L'icône cliquable, positionnée par CSS
+                            html.I(
+                                className="bi bi-send-fill send-icon", # Icône Bootstrap + classe CSS perso
+                                id=send_button_id,    # IMPORTANT: L'ID du bouton est maintenant sur l'icône
+                                n_clicks=0,           # Nécessaire pour que l'icône déclenche le callback Input
+                            )
+                        ],
+                        className="input-icon-container" # Applique la classe au conteneur
+                    )
+                ], width=12, md=10, lg=8) # Ajuste la largeur comme avant
+            ],
+            justify="center" # Centre la colonne
+            ),
+            # Style pour fixer en bas (ajusté légèrement pour le padding)
+            style={
+                'position': 'fixed',
+                'bottom': '0',
+                'left': '0',
+                'right': '0',
+                'padding': '15px 10px', # Espace autour de l'input
+                # 'backgroundColor': 'rgba(255, 255, 255, 0.95)', # Fond légèrement transparent
+                # 'borderTop': '1px solid #e0e0e0', # Ligne de séparation
+                'zIndex': '1000'
+            }
+        ),
+        # --- FIN DE LA MODIFICATION ---
+
+        # --- Section de Notation (Conteneur Principal) ---
+        # Assure-toi que 'bottom' est suffisant pour être au-dessus de la barre de saisie
+        html.Div(
+            id="rating-widget",
+            children=create_rating_stars(), # Contenu initial avec les étoiles
+            style={
+                'position': 'fixed',
+                'bottom': '90px',  # REMONTÉ pour être au-dessus de la barre de saisie (ajuste si nécessaire)
+                'right': '20px',
+                'padding': '10px',
+                'backgroundColor': '#f8f9fa',
+                'border': '1px solid #ccc',
+                'borderRadius': '5px',
+                'zIndex': '1001',
+                'textAlign': 'center',
+                'minWidth': '180px'
+            }
         ),
-        # Style pour fixer en bas (ajusté légèrement pour le padding)
-        style={
-            'position': 'fixed',
-            'bottom': '0',
-            'left': '0',
-            'right': '0',
-            'padding': '15px 10px', # Espace autour de l'input
-            # 'backgroundColor': 'rgba(255, 255, 255, 0.95)', # Fond légèrement transparent
-            # 'borderTop': '1px solid #e0e0e0', # Ligne de séparation
-            'zIndex': '1000'
-        }
-    ),
-    # --- FIN DE LA MODIFICATION ---
-
-    # --- Section de Notation (Conteneur Principal) ---
-    # Assure-toi que 'bottom' est suffisant pour être au-dessus de la barre de saisie
-    html.Div(
-        id="rating-widget",
-        children=create_rating_stars(), # Contenu initial avec les étoiles
-        style={
-            'position': 'fixed',
-            'bottom': '90px',  # REMONTÉ pour être au-dessus de la barre de saisie (ajuste si nécessaire)
-            'right': '20px',
-            'padding': '10px',
-            'backgroundColor': '#f8f9fa',
-            'border': '1px solid #ccc',
-            'borderRadius': '5px',
-            'zIndex': '1001',
-            'textAlign': 'center',
-            'minWidth': '180px'
-        }
-    ),
-
-], fluid=True) # Ajoute du padding en bas du container principal pour éviter que le dernier message soit caché
-
-# --- Callbacks (Inchangés car les IDs sont conservés) ---
+
+    ], fluid=True) # Ajoute du padding en bas du container principal pour éviter que le dernier message soit caché
+
+# --- Callbacks ---
 @callback(
     Output("chatbot-container", "children"),
+    Output("chat-message-count", "data"),
     Input("send-btn", "n_clicks"), # Déclenché par le clic sur l'icône html.I(id="send-btn")
-    [State("user-input", "value"), # Récupère la valeur de dbc.Input(id="user-input")
-    State("chatbot-container", "children")],
+    State("user-input", "value"), # Récupère la valeur de dbc.Input(id="user-input")
+    State("chat-message-count", "data"),
     prevent_initial_call=True
 )
-def update_chat(n_clicks, user_input, current_children):
-    print("-" * 20)
-    print(f"CALLBACK 'update_chat' DÉCLENCHÉ!")
-    print(f"  n_clicks='{n_clicks}' (sur l'icône)")
-    print(f"  user_input='{user_input}'")
-    print(f"  Type initial de current_children: {type(current_children)}")
-    print("-" * 20)
-    if n_clicks and user_input:
-        if not isinstance(current_children, list):
-            print(f"  WARNING: current_children n'était pas une liste ({type(current_children)}). Conversion.")
-            current_children = [current_children] if current_children else []
-        user_message_div = html.Div(f"Vous: {user_input}", className="user-message chatbot-message-right")
-        bot_response_div = html.Div("🤖 Bonjour et bienvenue sur CIRACBot, votre assistant bancaire intelligent disponible 24/7. Je suis actuellement en développement, revenez plus tard !", className="chatbot-message chatbot-message-left")
-        current_children.append(user_message_div)
-        current_children.append(bot_response_div)
-        print(f"  Nouveaux messages ajoutés. Total enfants: {len(current_children)}")
-        # Penser à ajouter un scroll automatique vers le bas si nécessaire (avec callback JS côté client)
-        return current_children
-    else:
-        print("  Callback 'update_chat': Condition non remplie, retour dash.no_update")
-        return dash.no_update
+def update_chat(n_clicks, user_input, message_count):
+    # Mise à jour partielle (Patch) : seuls les nouveaux messages transitent, quelle que soit
+    # la longueur de la conversation ; l'historique affiché n'est jamais renvoyé au serveur
+    if not (n_clicks and user_input):
+        return dash.no_update, dash.no_update
+    # Questions déjà posées (même texte normalisé) servies sans passer par le moteur
+    reply = cached_reply(get_engine(), user_input)
+    logger.debug("Réponse du chatbot", extra={"intent": reply.intent, "score": round(reply.score, 3)})
+    new_messages = [("user", user_input), ("bot", reply.text)]
+    if current_user.is_authenticated:
+        try:
+            # Écriture groupée avec les messages envoyés au même moment par les autres threads
+            save_messages(current_user.id, new_messages)
+        except sqlite3.Error:
+            # Non bloquant : la réponse s'affiche même si l'historique n'a pas pu être enregistré
+            logger.exception("Erreur lors de l'enregistrement des messages de chat", extra={"user_id": current_user.id})
+    children = Patch()
+    for sender, body in new_messages:
+        children.append(render_message(sender, body))
+    message_count = (message_count or 0) + len(new_messages)
+    # Fenêtre glissante : on retire les plus anciens messages au-delà de CHAT_HISTORY_MAX_MESSAGES
+    while message_count > CHAT_HISTORY_MAX_MESSAGES:
+        del children[0]
+        message_count -= 1
+    # Pas le texte du message (donnée client) : seulement sa taille, échantillonné
+    logger.debug("Message de chat traité", extra={"input_chars": len(user_input), "children": message_count})
+    return children, message_count
+
+# Mode flux : bulles ajoutées côté navigateur, réponse lue morceau par morceau (assets/chat.js)
+clientside_callback(
+    ClientsideFunction(namespace="chat", function_name="streamReply"),
+    Output("chat-message-count", "data", allow_duplicate=True),
+    Input("send-stream-btn", "n_clicks"),
+    State("user-input", "value"),
+    State("chat-message-count", "data"),
+    State("chat-max-messages", "data"),
+    prevent_initial_call=True
+)
+
+@callback(
+    Output("chatbot-container", "children", allow_duplicate=True),
+    Output("chat-message-count", "data", allow_duplicate=True),
+    Output("chat-older-cursor", "data"),
+    Output("chat-load-older", "style"),
+    Input("chat-load-older", "n_clicks"),
+    State("chat-older-cursor", "data"),
+    State("chat-message-count", "data"),
+    prevent_initial_call=True
+)
+def load_older_messages(n_clicks, older_cursor, message_count):
+    # Page précédente de l'historique, insérée en tête sans renvoyer les messages déjà affichés
+    if not (n_clicks and older_cursor and current_user.is_authenticated):
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+    # Même plafond que la fenêtre glissante : une fois atteint, plus de messages précédents proposés
+    # (retirer les plus récents pour faire de la place masquerait la fin de la conversation)
+    room = CHAT_HISTORY_MAX_MESSAGES - (message_count or 0)
+    if room <= 0:
+        return dash.no_update, dash.no_update, dash.no_update, {'display': 'none'}
+    try:
+        page = load_messages(get_conversation(current_user.id), before=older_cursor, limit=min(room, CHAT_PAGE_SIZE))
+    except sqlite3.Error:
+        logger.exception("Erreur lors de la lecture de l'historique de chat", extra={"user_id": current_user.id})
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+    children = Patch()
+    for message in reversed(page["messages"]):
+        children.prepend(render_message(message["sender"], message["body"]))
+    message_count = (message_count or 0) + len(page["messages"])
+    style = {} if page["older"] and message_count < CHAT_HISTORY_MAX_MESSAGES else {'display': 'none'}
+    return children, message_count, page["older"], style
 
 @callback(
     Output("rating-widget", "children"),
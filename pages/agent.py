@@ -1,24 +1,40 @@
 import dash
 
-from dash import html, dcc, Input, Output, State, ALL, callback, no_update, callback_context, MATCH
+from dash import html, dcc, Input, Output, State, ALL, callback, no_update, callback_context, MATCH, clientside_callback, ClientsideFunction
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate 
 from flask_login import current_user
 import json
-import os
-import uuid
-from datetime import datetime
 import sqlite3 
+from services.logs import get_logger
+from storage.db import get_pool
+from storage.users import invalidate_user
+from storage.user_import import VALID_ROLES
+from storage.user_search import search_users, DEFAULT_SEARCH_PAGE_SIZE
+from storage.reclamations import (
+    list_reclamations_page, search_reclamations, transition_reclamations,
+    Statut, DEFAULT_PAGE_SIZE, HIGHLIGHT_START, HIGHLIGHT_END,
+)
 # --- Enregistrement de la page ---
 dash.register_page(__name__, path='/agent')
+logger = get_logger(__name__)
 
-DATA_FILE = "reclamations.json"
 DB_FILE = "ciracbot.db" # <-- Chemin vers ta base de données SQLite
 DEFAULT_SORT_COLUMN = "date"
 DEFAULT_SORT_DIRECTION = False
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+DEFAULT_PAGE_STATE = {"page_size": DEFAULT_PAGE_SIZE, "after": None, "before": None}
+STATUT_COLORS = {
+    Statut.EN_ATTENTE.value: "secondary",
+    Statut.EN_COURS.value: "info",
+    Statut.RESOLUE.value: "success",
+    Statut.REJETEE.value: "danger",
+}
 
 # --- Définition des rôles possibles ---
-AVAILABLE_ROLES = ['utilisateur', 'admin'] # Adapte si tes rôles sont différents
+AVAILABLE_ROLES = list(VALID_ROLES) # Valeurs autorisées par la contrainte CHECK de la table users
+ROLE_COLORS = {"user": "secondary", "admin": "danger"}
+DEFAULT_ACCOUNT_SEARCH = {"query": None, "field": "email", "mode": "prefix", "role": None, "cursors": [None], "next": None}
 def layout():
     # ... (code du layout inchangé, s'assurer qu'il contient les stores et modals nécessaires) ...
     if not current_user.is_authenticated:
@@ -48,7 +64,31 @@ def layout():
             ], id="agent-tabs", active_tab="suivi-reclamations"),
             html.Div(id="agent-content", className="mt-3"),
             dcc.Store(id="sort-state", data={"column": DEFAULT_SORT_COLUMN, "direction": DEFAULT_SORT_DIRECTION}),
-            html.Div(id="modal-container"), # Pour le modal des détails réclamation
+            dcc.Store(id="reclamations-page-state", data=DEFAULT_PAGE_STATE),
+            dcc.Store(id="reclamations-refresh", data=0), # Incrémenté après un changement de statut
+            html.Div(id="reclamations-bulk-feedback"), # Hors de l'onglet pour survivre à son re-rendu
+            # Modal des détails réclamation : rempli côté navigateur depuis /api/reclamations/<id>
+            dbc.Modal(
+                [
+                    dbc.ModalHeader(dbc.ModalTitle(id="reclamation-detail-title")),
+                    dbc.ModalBody([
+                        html.Strong("Date: "), html.P(id="reclamation-detail-date"),
+                        html.Strong("Email: "), html.P(id="reclamation-detail-email"),
+                        html.Strong("Statut: "), html.P(id="reclamation-detail-statut"),
+                        html.Strong("Historique: "),
+                        html.Ul(id="reclamation-detail-historique"),
+                        html.Hr(),
+                        html.Strong("Description:"),
+                        html.P(id="reclamation-detail-description", style={'whiteSpace': 'pre-wrap'})
+                    ]),
+                    dbc.ModalFooter(
+                        dbc.Button("Fermer", id="agent-close-modal-button", className="ms-auto")
+                    ),
+                ],
+                id="agent-reclamation-detail-modal",
+                is_open=False,
+                size="lg"
+            ),
             # Stores et Modals pour la suppression (inchangés)
             dcc.Store(id='store-delete-target-client-id', data=None),
             dbc.Modal(
@@ -88,40 +128,52 @@ def gestion_comptes_tab():
      return dbc.Card(
         dbc.CardBody([
             html.H4("Gestion des comptes clients", className="card-title"),
-            dbc.Label("Rechercher un compte par email :"),
-            dbc.Input(type="email", id="recherche-email", placeholder="Email du client", className="mb-3"),
-            dbc.Button("Rechercher", id="bouton-rechercher", color="primary", className="mr-1"),
+            dbc.Label("Rechercher des comptes (début ou partie de l'email ou du nom) :"),
+            dbc.InputGroup([
+                dbc.Select(
+                    id="recherche-comptes-champ",
+                    options=[{'label': "Email", 'value': "email"}, {'label': "Nom d'utilisateur", 'value': "username"}],
+                    value="email", style={'maxWidth': '180px'}
+                ),
+                dbc.Select(
+                    id="recherche-comptes-mode",
+                    options=[{'label': "Commence par", 'value': "prefix"}, {'label': "Contient", 'value': "contains"}],
+                    value="prefix", style={'maxWidth': '160px'}
+                ),
+                dbc.Input(type="search", id="recherche-email", placeholder="ex. @banque.fr, Dup..."),
+                dbc.Select(
+                    id="recherche-comptes-role",
+                    options=[{'label': "Tous les rôles", 'value': ""}] + [{'label': role.capitalize(), 'value': role} for role in AVAILABLE_ROLES],
+                    value="", style={'maxWidth': '160px'}
+                ),
+                dbc.Button("Rechercher", id="bouton-rechercher", color="primary"),
+            ], className="mb-3"),
             html.Div(id="resultat-recherche", className="mt-3"),
+            html.Div([
+                dbc.Button("Précédent", id="comptes-prev-btn", color="secondary", size="sm", outline=True, disabled=True, className="me-2"),
+                dbc.Button("Suivant", id="comptes-next-btn", color="secondary", size="sm", outline=True, disabled=True),
+            ], className="d-flex justify-content-end mt-2"),
+            dcc.Store(id="comptes-search-state", data=DEFAULT_ACCOUNT_SEARCH),
         ])
     )
 
-def suivi_reclamations_tab(sort_state):
-    # ... (code inchangé) ...
+def suivi_reclamations_tab(sort_state, page_state):
+    # Une seule page est lue et sérialisée à chaque rendu (pagination keyset sur (date, id) / (nom, id))
     sort_column = sort_state.get("column", DEFAULT_SORT_COLUMN)
     sort_direction = sort_state.get("direction", DEFAULT_SORT_DIRECTION)
-    reclamations = []
-    if os.path.exists(DATA_FILE):
-        if os.path.getsize(DATA_FILE) > 0:
-             with open(DATA_FILE, "r", encoding='utf-8') as f:
-                try:
-                    reclamations = json.load(f)
-                    if not isinstance(reclamations, list): reclamations = []
-                except json.JSONDecodeError: reclamations = []
+    page_size = page_state.get("page_size", DEFAULT_PAGE_SIZE)
     try:
-        reclamations.sort(
-            key=lambda r: (
-                datetime.strptime(r.get("date", "01/01/1900 00:00"), "%d/%m/%Y %H:%M")
-                if sort_column == "date" and r.get("date")
-                else str(val) if (val := r.get(sort_column)) is not None and isinstance(val, (int, float))
-                else str(val).lower() if (val := r.get(sort_column)) is not None
-                else ""
-            ),
-            reverse=sort_direction
+        page = list_reclamations_page(
+            sort_column, descending=sort_direction, page_size=page_size,
+            after=page_state.get("after"), before=page_state.get("before")
         )
-    except (ValueError, TypeError, AttributeError) as e:
-        print(f"Erreur lors du tri dans agent.py : {e}")
+    except (sqlite3.Error, OSError):
+        logger.exception("Erreur lors de la lecture des réclamations")
+        page = {"items": [], "first": None, "last": None, "has_previous": False, "has_next": False}
+    reclamations = page["items"]
     table_header = [
         html.Thead(html.Tr([
+            html.Th(dbc.Checkbox(id="select-all-reclamations", value=False)),
             html.Th(dbc.Button("Nom", id={'type': 'sort-button', 'column': 'nom'}, color="link", className="p-0")),
             html.Th(dbc.Button("Date", id={'type': 'sort-button', 'column': 'date'}, color="link", className="p-0")),
             html.Th("Statut"),
@@ -129,106 +181,144 @@ def suivi_reclamations_tab(sort_state):
         ]))
     ]
     if not reclamations:
-         table_body = [html.Tbody(html.Tr(html.Td("Aucune réclamation trouvée.", colSpan=4, className="text-center")))]
+         table_body = [html.Tbody(html.Tr(html.Td("Aucune réclamation trouvée.", colSpan=5, className="text-center")))]
     else:
         table_body = [
             html.Tbody([
                 html.Tr([
+                    html.Td(dbc.Checkbox(id={"type": "select-reclamation", "index": r.get("id", f"gen-{i}")}, value=False)),
                     html.Td(r.get("nom", "N/A")),
                     html.Td(r.get("date", "N/A")),
-                    html.Td(r.get("statut", "N/A")),
+                    html.Td(dbc.Badge(r.get("statut", "N/A"), color=STATUT_COLORS.get(r.get("statut"), "light"))),
                     html.Td(dbc.Button("Voir", color="primary", size="sm", id={"type": "voir-reclamation", "index": r.get("id", f"gen-{i}")}))
                 ], key=r.get("id", f"row-{i}")) for i, r in enumerate(reclamations)
             ])
         ]
     table = dbc.Table(table_header + table_body, bordered=True, striped=True, hover=True, responsive=True)
-    return dbc.Card(dbc.CardBody([html.H4("Suivi des réclamations"), table]))
+    pagination = dbc.Row([
+        dbc.Col([
+            dbc.Label("Lignes par page :", className="me-2 mb-0"),
+            dbc.Select(
+                id="reclamations-page-size",
+                options=[{'label': str(size), 'value': str(size)} for size in PAGE_SIZE_OPTIONS],
+                value=str(page_size),
+                size="sm",
+                style={'display': 'inline-block', 'width': 'auto'}
+            ),
+        ], width="auto", className="d-flex align-items-center"),
+        dbc.Col([
+            dbc.Button("Précédent", id="reclamations-prev-btn", color="secondary", size="sm", outline=True,
+                       disabled=not page["has_previous"], className="me-2"),
+            dbc.Button("Suivant", id="reclamations-next-btn", color="secondary", size="sm", outline=True,
+                       disabled=not page["has_next"]),
+        ], width="auto", className="ms-auto"),
+    ], className="align-items-center")
+    # Curseurs de la page affichée, relus par le callback de navigation
+    page_cursors = dcc.Store(id="reclamations-page-cursors", data={"first": page["first"], "last": page["last"]})
+    bulk_actions = dbc.InputGroup([
+        dbc.InputGroupText("Sélection :"),
+        dbc.Select(
+            id="bulk-statut-select",
+            options=[{'label': f"Passer en « {statut.value} »", 'value': statut.value} for statut in Statut if statut != Statut.EN_ATTENTE],
+            value=Statut.EN_COURS.value,
+        ),
+        dbc.Button("Appliquer", id="bulk-statut-apply", color="primary"),
+    ], size="sm", className="mb-2", style={'maxWidth': '480px'})
+    search_bar = dbc.InputGroup([
+        dbc.Input(id="recherche-reclamation", type="search", placeholder="Rechercher (nom, email, description)..."),
+        dbc.Button("Rechercher", id="bouton-rechercher-reclamation", color="primary"),
+    ], className="mb-2")
+    return dbc.Card(dbc.CardBody([
+        html.H4("Suivi des réclamations"),
+        search_bar,
+        html.Div(id="resultats-recherche-reclamation", className="mb-3"),
+        bulk_actions, table, pagination, page_cursors
+    ]))
+
+
+def is_admin():
+    # Vérifié dans chaque callback : ils restent appelables directement (POST /_dash-update-component)
+    return current_user.is_authenticated and getattr(current_user, 'role', None) == 'admin'
+
+def refused_alert(action):
+    logger.warning("Action réservée aux administrateurs refusée", extra={"action": action, "user_id": current_user.get_id()})
+    return dbc.Alert("Action réservée aux administrateurs.", color="danger", className="mt-2")
+
+def highlighted_excerpt(extrait):
+    # Les termes trouvés sont entourés de HIGHLIGHT_START / HIGHLIGHT_END par le stockage
+    children = []
+    for i, part in enumerate(extrait.replace(HIGHLIGHT_END, HIGHLIGHT_START).split(HIGHLIGHT_START)):
+        if part:
+            children.append(html.Mark(part) if i % 2 else part)
+    return html.Small(children, className="text-muted")
 
 # =======================================================================
 # === FONCTIONS DE BASE DE DONNÉES (Recherche + MAJ Rôle + Suppression) ===
 # =======================================================================
 
-def find_client_by_email(email_address):
-    # ... (Fonction find_client_by_email précédente, utilisant sqlite3, inchangée) ...
+def search_client_accounts(query, field, mode, role, after):
+    """Une page de comptes correspondant à la recherche (voir storage/user_search.py). Lève ValueError si invalide."""
     conn = None
-    TABLE_NAME = 'users' # Adapte si nécessaire
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        sql_query = f"""
-            SELECT id, username, email, role
-            FROM {TABLE_NAME} WHERE email = ?
-        """
-        cursor.execute(sql_query, (email_address,))
-        result_row = cursor.fetchone()
-        if result_row:
-            account_data = {
-                "id_client": result_row["id"],
-                "username": result_row["username"],
-                "email": result_row["email"],
-                "role": result_row["role"]
-            }
-            print(f"Données trouvées en BDD : {account_data}")
-            return account_data
-        else:
-            print(f"Email {email_address} non trouvé dans la table '{TABLE_NAME}'.")
-            return None
-    except sqlite3.Error as e:
-        print(f"Erreur lors de l'accès à la base de données SQLite ('{TABLE_NAME}') : {e}")
+        conn = get_pool(DB_FILE).acquire()
+        return search_users(conn, query, field=field, mode=mode, role=role or None, after=after, page_size=DEFAULT_SEARCH_PAGE_SIZE)
+    except sqlite3.Error:
+        logger.exception("Erreur lors de la recherche de comptes clients")
         return None
     finally:
         if conn:
-            conn.close()
+            get_pool(DB_FILE).release(conn)
 
 def delete_client_by_id(client_id):
-    # ... (Fonction delete_client_by_id précédente, utilisant sqlite3, inchangée) ...
+    # ... (Fonction delete_client_by_id précédente, via le pool SQLite partagé) ...
     conn = None
     TABLE_NAME = 'users' # Adapte si nécessaire
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_pool(DB_FILE).acquire()
         cursor = conn.cursor()
         sql_query = f"DELETE FROM {TABLE_NAME} WHERE id = ?"
         cursor.execute(sql_query, (client_id,))
         conn.commit()
+        invalidate_user(client_id) # La session du client supprimé ne doit plus être chargée depuis le cache
         if cursor.rowcount > 0:
-            print(f"Client ID {client_id} supprimé avec succès de la table '{TABLE_NAME}'.")
+            logger.info("Compte client supprimé", extra={"client_id": client_id, "agent_id": current_user.get_id()})
             return True
         else:
-            print(f"Aucun client trouvé avec l'ID {client_id} dans '{TABLE_NAME}' pour suppression.")
+            logger.warning("Compte client à supprimer introuvable", extra={"client_id": client_id})
             return False
-    except sqlite3.Error as e:
-        print(f"Erreur lors de la suppression dans la base de données SQLite ('{TABLE_NAME}') : {e}")
+    except sqlite3.Error:
+        logger.exception("Erreur lors de la suppression d'un compte client", extra={"client_id": client_id})
         return False
     finally:
         if conn:
-            conn.close()
+            get_pool(DB_FILE).release(conn)
 
 def update_client_role_in_db(client_id, new_role):
-    # ... (Fonction update_client_role_in_db précédente, utilisant sqlite3, inchangée) ...
+    # ... (Fonction update_client_role_in_db précédente, via le pool SQLite partagé) ...
     if new_role not in AVAILABLE_ROLES:
-        print(f"Erreur: Rôle '{new_role}' non valide.")
+        logger.warning("Rôle non valide", extra={"role": new_role})
         return False
     conn = None
     TABLE_NAME = 'users' # Adapte si nécessaire
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_pool(DB_FILE).acquire()
         cursor = conn.cursor()
         sql_query = f"UPDATE {TABLE_NAME} SET role = ? WHERE id = ?"
         cursor.execute(sql_query, (new_role, client_id))
         conn.commit()
+        invalidate_user(client_id) # Nouveau rôle effectif dès la requête suivante, dans tous les workers
         if cursor.rowcount > 0:
-            print(f"Rôle du client ID {client_id} mis à jour à '{new_role}' dans '{TABLE_NAME}'.")
+            logger.info("Rôle client mis à jour", extra={"client_id": client_id, "role": new_role, "agent_id": current_user.get_id()})
             return True
         else:
-            print(f"Aucun client trouvé avec l'ID {client_id} dans '{TABLE_NAME}' pour mise à jour du rôle.")
+            logger.warning("Compte client à modifier introuvable", extra={"client_id": client_id})
             return False
-    except sqlite3.Error as e:
-        print(f"Erreur lors de la mise à jour du rôle dans la BDD SQLite ('{TABLE_NAME}') : {e}")
+    except sqlite3.Error:
+        logger.exception("Erreur lors de la mise à jour du rôle", extra={"client_id": client_id})
         return False
     finally:
         if conn:
-            conn.close()
+            get_pool(DB_FILE).release(conn)
 
 # --- Callbacks ---
 
@@ -237,103 +327,61 @@ def update_client_role_in_db(client_id, new_role):
     Output("agent-content", "children"),
     Input("agent-tabs", "active_tab"),
     Input("sort-state", "data"),
+    Input("reclamations-page-state", "data"),
+    Input("reclamations-refresh", "data"),
 )
-def render_tab_content(active_tab, sort_state):
+def render_tab_content(active_tab, sort_state, page_state, _refresh):
     # ... (code inchangé) ...
-    if not current_user.is_authenticated or current_user.role != 'admin':
+    if not is_admin():
          return no_update
     if active_tab == "dashboard":
         return dashboard_tab()
     elif active_tab == "gestion-comptes":
         return gestion_comptes_tab()
     elif active_tab == "suivi-reclamations":
-        return suivi_reclamations_tab(sort_state or {"column": DEFAULT_SORT_COLUMN, "direction": DEFAULT_SORT_DIRECTION})
+        return suivi_reclamations_tab(
+            sort_state or {"column": DEFAULT_SORT_COLUMN, "direction": DEFAULT_SORT_DIRECTION},
+            page_state or DEFAULT_PAGE_STATE
+        )
     return html.P("Onglet non trouvé")
 
-# Callbacks pour le modal de détails réclamation (INCHANGÉS)
-@callback(
-    Output("modal-container", "children"),
-    Input({"type": "voir-reclamation", "index": ALL}, "n_clicks"),
-    prevent_initial_call=True
-)
-def display_reclamation_modal(n_clicks):
-     # ... (code inchangé) ...
-    ctx = callback_context
-    if not ctx.triggered or not any(click for click in n_clicks if click):
-        return no_update
-    triggered_id_str = ctx.triggered[0]['prop_id'].split('.')[0]
-    try:
-        triggered_id_dict = json.loads(triggered_id_str.replace("'", "\""))
-        if isinstance(triggered_id_dict, dict) and triggered_id_dict.get("type") == "voir-reclamation":
-            reclamation_id = triggered_id_dict.get("index")
-            if not reclamation_id: return no_update
-            reclamations = []
-            if os.path.exists(DATA_FILE):
-                 if os.path.getsize(DATA_FILE) > 0:
-                    with open(DATA_FILE, "r", encoding='utf-8') as f:
-                        try:
-                            reclamations = json.load(f)
-                            if not isinstance(reclamations, list): reclamations = []
-                        except json.JSONDecodeError: reclamations = []
-            reclamation = next((r for r in reclamations if r.get("id") == reclamation_id), None)
-            if not reclamation:
-                return dbc.Alert(f"Réclamation ID {reclamation_id} non trouvée.", color="warning", duration=4000)
-            modal = dbc.Modal(
-                [
-                    dbc.ModalHeader(dbc.ModalTitle(f"Détails - {reclamation.get('nom', 'N/A')}")),
-                    dbc.ModalBody([
-                        html.Strong("Date: "), html.P(reclamation.get('date', 'N/A')),
-                        html.Strong("Email: "), html.P(reclamation.get('email', 'N/A')),
-                        html.Strong("Statut: "), html.P(reclamation.get('statut', 'N/A')),
-                        html.Hr(),
-                        html.Strong("Description:"),
-                        html.P(reclamation.get('description', 'N/A'), style={'whiteSpace': 'pre-wrap'})
-                    ]),
-                    dbc.ModalFooter(
-                        dbc.Button("Fermer", id="agent-close-modal-button", className="ms-auto")
-                    ),
-                ],
-                id="agent-reclamation-detail-modal",
-                is_open=True,
-                size="lg"
-            )
-            return modal
-        else:
-            return no_update
-    except (json.JSONDecodeError, TypeError, ValueError) as e:
-        print(f"Erreur parsing ID modal: {e}, triggered_id: {triggered_id_str}")
-        return no_update
-
-@callback(
+# Modal de détails réclamation : chargé à la demande par le navigateur (assets/agent.js).
+# Une réouverture ne coûte qu'un 304 (If-None-Match) et réutilise l'objet déjà décodé.
+clientside_callback(
+    ClientsideFunction(namespace="agent", function_name="showReclamationDetail"),
     Output("agent-reclamation-detail-modal", "is_open"),
+    Output("reclamation-detail-title", "children"),
+    Output("reclamation-detail-date", "children"),
+    Output("reclamation-detail-email", "children"),
+    Output("reclamation-detail-statut", "children"),
+    Output("reclamation-detail-historique", "children"),
+    Output("reclamation-detail-description", "children"),
+    Input({"type": "voir-reclamation", "index": ALL}, "n_clicks"),
+    Input({"type": "voir-reclamation-recherche", "index": ALL}, "n_clicks"),
     Input("agent-close-modal-button", "n_clicks"),
-    State("agent-reclamation-detail-modal", "is_open"),
     prevent_initial_call=True
 )
-def close_reclamation_modal(n_clicks, is_open):
-     # ... (code inchangé) ...
-    if n_clicks and is_open:
-        return False
-    return no_update
 
 # Callback pour le tri de la table (INCHANGÉ)
 @callback(
     Output("sort-state", "data"),
+    Output("reclamations-page-state", "data", allow_duplicate=True),
     Input({'type': 'sort-button', 'column': ALL}, 'n_clicks'),
     State("sort-state", "data"),
+    State("reclamations-page-state", "data"),
     prevent_initial_call=True
 )
-def sort_table(sort_clicks, sort_state):
-    # ... (code inchangé) ...
+def sort_table(sort_clicks, sort_state, page_state):
+    # Un changement de tri ramène à la première page (les curseurs dépendent de la colonne)
     ctx = callback_context
     if not ctx.triggered or not any(click for click in sort_clicks if click):
-        return no_update
+        return no_update, no_update
     triggered_id_str = ctx.triggered[0]["prop_id"].split(".")[0]
     try:
         triggered_id_dict = json.loads(triggered_id_str.replace("'", "\""))
         if isinstance(triggered_id_dict, dict) and triggered_id_dict.get("type") == "sort-button":
             column = triggered_id_dict.get("column")
-            if not column: return no_update
+            if not column: return no_update, no_update
             current_column = sort_state.get("column", DEFAULT_SORT_COLUMN)
             current_direction = sort_state.get("direction", DEFAULT_SORT_DIRECTION)
             if column == current_column:
@@ -341,77 +389,194 @@ def sort_table(sort_clicks, sort_state):
             else:
                 new_direction = False
             new_sort_state = {"column": column, "direction": new_direction}
-            print(f"Nouveau tri demandé (Agent): {new_sort_state}")
-            return new_sort_state
+            page_size = (page_state or DEFAULT_PAGE_STATE).get("page_size", DEFAULT_PAGE_SIZE)
+            return new_sort_state, {"page_size": page_size, "after": None, "before": None}
         else:
-            return no_update
-    except (json.JSONDecodeError, TypeError, ValueError) as e:
-         print(f"Erreur parsing ID sort: {e}, triggered_id: {triggered_id_str}")
-         return no_update
+            return no_update, no_update
+    except (json.JSONDecodeError, TypeError, ValueError):
+         logger.warning("Identifiant de tri illisible", extra={"triggered_id": triggered_id_str})
+         return no_update, no_update
+
+# Callback pour la recherche plein texte dans les réclamations
+@callback(
+    Output("resultats-recherche-reclamation", "children"),
+    Input("bouton-rechercher-reclamation", "n_clicks"),
+    Input("recherche-reclamation", "n_submit"),
+    State("recherche-reclamation", "value"),
+    prevent_initial_call=True
+)
+def search_reclamations_callback(n_clicks, n_submit, query):
+    if not (n_clicks or n_submit):
+        return no_update
+    if not is_admin():
+        return refused_alert("recherche_reclamations")
+    if not query or not query.strip():
+        return ""
+    try:
+        results = search_reclamations(query)
+    except (sqlite3.Error, OSError):
+        logger.exception("Erreur lors de la recherche de réclamations")
+        return dbc.Alert("Erreur lors de la recherche.", color="danger", className="mt-2")
+    if not results:
+        return dbc.Alert(f"Aucune réclamation ne correspond à « {query} ».", color="info", className="mt-2")
+    return dbc.ListGroup([
+        dbc.ListGroupItem([
+            html.Div([
+                html.Strong(r.get("nom", "N/A")),
+                html.Span(f" — {r.get('email', '')} — {r.get('date', '')} — {r.get('statut', '')}", className="text-muted"),
+                dbc.Button("Voir", color="primary", size="sm", className="float-end",
+                           id={"type": "voir-reclamation-recherche", "index": r["id"]}),
+            ]),
+            highlighted_excerpt(r.get("extrait", "")),
+        ]) for r in results
+    ], className="mt-2")
+
+# Callbacks pour la sélection multiple et le changement de statut groupé
+@callback(
+    Output({"type": "select-reclamation", "index": ALL}, "value"),
+    Input("select-all-reclamations", "value"),
+    State({"type": "select-reclamation", "index": ALL}, "id"),
+    prevent_initial_call=True
+)
+def select_all_reclamations(select_all, checkbox_ids):
+    return [bool(select_all)] * len(checkbox_ids)
+
+@callback(
+    Output("reclamations-bulk-feedback", "children"),
+    Output("reclamations-refresh", "data"),
+    Input("bulk-statut-apply", "n_clicks"),
+    State("bulk-statut-select", "value"),
+    State({"type": "select-reclamation", "index": ALL}, "value"),
+    State({"type": "select-reclamation", "index": ALL}, "id"),
+    State("reclamations-refresh", "data"),
+    prevent_initial_call=True
+)
+def apply_bulk_transition(n_clicks, new_statut, selected_values, checkbox_ids, refresh_count):
+    if not n_clicks:
+        return no_update, no_update
+    if not is_admin():
+        return refused_alert("changement_statut_groupe"), no_update
+    # Sélection limitée aux lignes de la page affichée (100 au plus, MAX_PAGE_SIZE du stockage)
+    selected_ids = [cid["index"] for cid, selected in zip(checkbox_ids, selected_values) if selected]
+    if not selected_ids:
+        return dbc.Alert("Aucune réclamation sélectionnée.", color="info", duration=4000, className="mt-2"), no_update
+    try:
+        result = transition_reclamations(selected_ids, new_statut)
+    except (sqlite3.Error, OSError, ValueError):
+        logger.exception("Erreur lors du changement de statut groupé", extra={"count": len(selected_ids), "statut": new_statut})
+        return dbc.Alert("Erreur lors du changement de statut. Aucune réclamation modifiée.", color="danger", dismissable=True, className="mt-2"), no_update
+    messages = [html.P(f"{len(result['updated'])} réclamation(s) passée(s) en « {new_statut} ».", className="mb-0")]
+    if result["rejected"]:
+        messages.append(html.P(f"{len(result['rejected'])} ignorée(s) : transition non autorisée depuis leur statut actuel.", className="mb-0"))
+    color = "success" if not result["rejected"] else "warning"
+    return dbc.Alert(messages, color=color, dismissable=True, className="mt-2"), (refresh_count or 0) + 1
+
+# Callback pour la navigation entre les pages de réclamations
+@callback(
+    Output("reclamations-page-state", "data"),
+    Input("reclamations-prev-btn", "n_clicks"),
+    Input("reclamations-next-btn", "n_clicks"),
+    Input("reclamations-page-size", "value"),
+    State("reclamations-page-cursors", "data"),
+    State("reclamations-page-state", "data"),
+    prevent_initial_call=True
+)
+def paginate_reclamations(prev_clicks, next_clicks, page_size_value, page_cursors, page_state):
+    triggered_id = callback_context.triggered_id
+    page_state = page_state or DEFAULT_PAGE_STATE
+    page_cursors = page_cursors or {}
+    if triggered_id == "reclamations-page-size" and page_size_value:
+        # Nouvelle taille de page : on repart du début
+        return {"page_size": int(page_size_value), "after": None, "before": None}
+    if triggered_id == "reclamations-next-btn" and next_clicks and page_cursors.get("last"):
+        return {"page_size": page_state.get("page_size", DEFAULT_PAGE_SIZE), "after": page_cursors["last"], "before": None}
+    if triggered_id == "reclamations-prev-btn" and prev_clicks and page_cursors.get("first"):
+        return {"page_size": page_state.get("page_size", DEFAULT_PAGE_SIZE), "after": None, "before": page_cursors["first"]}
+    return no_update
 
 # ==================================================================
-# === CALLBACK POUR LA RECHERCHE EMAIL (MODIFIÉ POUR DROPDOWN RÔLE) ===
+# === CALLBACK POUR LA RECHERCHE DE COMPTES (PAGINÉE, DROPDOWN RÔLE) ===
 # ==================================================================
+def account_row(account):
+    client_id = account["id"]
+    current_role = account.get("role")
+    return html.Tr([
+        html.Td(client_id),
+        html.Td(account.get("username", "N/A")),
+        html.Td(account.get("email", "N/A")),
+        html.Td(dbc.InputGroup([
+            dbc.Select(
+                id={'type': 'role-select', 'index': client_id},
+                options=[{'label': role.capitalize(), 'value': role} for role in AVAILABLE_ROLES],
+                value=current_role if current_role in AVAILABLE_ROLES else None,
+                placeholder="Choisir un rôle..." if current_role not in AVAILABLE_ROLES else None,
+            ),
+            dbc.Button("Enregistrer", id={'type': 'save-role-btn', 'index': client_id}, color="success"),
+        ], size="sm")),
+        html.Td(dbc.Button("Supprimer", id={'type': 'delete-client-open-modal-btn', 'index': client_id}, color="danger", size="sm")),
+    ], key=str(client_id))
+
+def account_results(result, page_number):
+    # Comptages bornés par le stockage : "1000+" au-delà de SEARCH_COUNT_LIMIT
+    suffix = "" if result["total_is_exact"] else "+"
+    counts = [dbc.Badge(f"Total : {result['total']}{suffix}", color="primary", className="me-2")] + [
+        dbc.Badge(f"{role.capitalize()} : {count}{suffix}", color=ROLE_COLORS.get(role, "light"), className="me-2")
+        for role, count in sorted(result["counts"].items())
+    ]
+    header = html.Thead(html.Tr([html.Th("ID"), html.Th("Nom d'utilisateur"), html.Th("Email"), html.Th("Rôle"), html.Th("Action")]))
+    body = html.Tbody([account_row(account) for account in result["items"]])
+    return html.Div([
+        html.Div(counts + [html.Small(f"Page {page_number}", className="text-muted")], className="mb-2"),
+        dbc.Table([header, body], bordered=True, striped=True, hover=True, responsive=True, size="sm"),
+    ])
+
 @callback(
     Output("resultat-recherche", "children"),
+    Output("comptes-search-state", "data"),
+    Output("comptes-prev-btn", "disabled"),
+    Output("comptes-next-btn", "disabled"),
     Input("bouton-rechercher", "n_clicks"),
     Input("recherche-email", "n_submit"),
+    Input("comptes-prev-btn", "n_clicks"),
+    Input("comptes-next-btn", "n_clicks"),
     State("recherche-email", "value"),
+    State("recherche-comptes-champ", "value"),
+    State("recherche-comptes-mode", "value"),
+    State("recherche-comptes-role", "value"),
+    State("comptes-search-state", "data"),
     prevent_initial_call=True
 )
-def search_client_account(n_clicks, n_submit, email_to_search):
-    # ... (code de recherche et affichage modifié pour inclure le dropdown et bouton Enregistrer rôle) ...
+def search_client_account(n_clicks, n_submit, prev_clicks, next_clicks, query, field, mode, role, search_state):
+    if not is_admin():
+        return refused_alert("recherche_comptes"), DEFAULT_ACCOUNT_SEARCH, True, True
     triggered_id = callback_context.triggered_id
-    if (triggered_id == "bouton-rechercher" or triggered_id == "recherche-email") and email_to_search:
-        print(f"Recherche du compte pour l'email : {email_to_search}")
-        account_data = find_client_by_email(email_to_search)
-
-        if account_data:
-            client_id = account_data.get('id_client')
-            current_role = account_data.get('role')
-
-            result_layout = dbc.Card(dbc.CardBody([
-                html.H5("Compte trouvé", className="card-title"),
-                dbc.ListGroup([
-                    dbc.ListGroupItem(f"ID Client : {client_id}"),
-                    dbc.ListGroupItem(f"Nom d'utilisateur : {account_data.get('username', 'N/A')}"),
-                    dbc.ListGroupItem(f"Email : {account_data.get('email', 'N/A')}"),
-                    dbc.ListGroupItem([
-                        "Rôle : ",
-                        dbc.Select(
-                            id={'type': 'role-select', 'index': client_id},
-                            options=[
-                                {'label': role.capitalize(), 'value': role} for role in AVAILABLE_ROLES
-                            ],
-                            value=current_role if current_role in AVAILABLE_ROLES else None,
-                            placeholder="Choisir un rôle..." if current_role not in AVAILABLE_ROLES else None,
-                            size="sm",
-                            style={'display': 'inline-block', 'width': 'auto', 'marginLeft': '10px'}
-                        ),
-                        dbc.Button(
-                            "Enregistrer le rôle",
-                            id={'type': 'save-role-btn', 'index': client_id},
-                            color="success",
-                            size="sm",
-                            className="ms-2"
-                        )
-                    ]),
-                ], flush=True, className="mb-3"),
-                dbc.Button(
-                    "Supprimer ce compte",
-                    id={'type': 'delete-client-open-modal-btn', 'index': client_id},
-                    color="danger",
-                    size="sm",
-                    className="mt-2"
-                )
-            ]), className="mt-3")
-            return result_layout
-        else:
-            return dbc.Alert(f"Aucun compte trouvé pour l'adresse e-mail : {email_to_search}", color="warning", className="mt-3")
-    elif (triggered_id == "bouton-rechercher" or triggered_id == "recherche-email") and not email_to_search:
-        return dbc.Alert("Veuillez entrer une adresse e-mail à rechercher.", color="info", className="mt-3")
+    search_state = search_state or DEFAULT_ACCOUNT_SEARCH
+    if triggered_id in ("bouton-rechercher", "recherche-email"):
+        if not query or not query.strip():
+            return dbc.Alert("Veuillez entrer un email ou un nom à rechercher.", color="info", className="mt-3"), DEFAULT_ACCOUNT_SEARCH, True, True
+        # Nouvelle recherche : première page
+        search_state = {"query": query.strip(), "field": field, "mode": mode, "role": role or None, "cursors": [None], "next": None}
+    elif triggered_id == "comptes-next-btn" and next_clicks and search_state.get("next"):
+        # Curseurs des pages déjà vues empilés : "Précédent" revient au curseur d'avant
+        search_state = dict(search_state, cursors=search_state["cursors"] + [search_state["next"]])
+    elif triggered_id == "comptes-prev-btn" and prev_clicks and len(search_state.get("cursors", [])) > 1:
+        search_state = dict(search_state, cursors=search_state["cursors"][:-1])
     else:
-        return no_update
+        return no_update, no_update, no_update, no_update
+
+    try:
+        result = search_client_accounts(search_state["query"], search_state["field"], search_state["mode"],
+                                        search_state["role"], search_state["cursors"][-1])
+    except ValueError as e:
+        return dbc.Alert(str(e), color="warning", className="mt-3"), DEFAULT_ACCOUNT_SEARCH, True, True
+    if result is None:
+        return dbc.Alert("Erreur lors de la recherche des comptes.", color="danger", className="mt-3"), DEFAULT_ACCOUNT_SEARCH, True, True
+    if not result["items"]:
+        return (dbc.Alert(f"Aucun compte trouvé pour « {search_state['query']} ».", color="warning", className="mt-3"),
+                DEFAULT_ACCOUNT_SEARCH, True, True)
+    search_state = dict(search_state, next=result["next"])
+    return (account_results(result, len(search_state["cursors"])), search_state,
+            len(search_state["cursors"]) <= 1, not result["next"])
 
 
 # ============================================================
@@ -433,6 +598,8 @@ def update_client_role(save_btn_n_clicks, role_select_values, role_select_ids):
     # Vérifier si un des boutons "Enregistrer" a été cliqué
     if not triggered or not any(click for click in save_btn_n_clicks if click):
         return no_update
+    if not is_admin():
+        return refused_alert("modification_role")
 
     # Obtenir l'ID du bouton qui a déclenché le callback
     triggered_button_id_dict = callback_context.triggered_id
@@ -456,7 +623,6 @@ def update_client_role(save_btn_n_clicks, role_select_values, role_select_ids):
                  break # On a trouvé la valeur correspondante
 
     if client_id and selected_role:
-        print(f"Tentative de mise à jour du rôle pour client ID {client_id} à '{selected_role}'")
         # Appeler la fonction de mise à jour en BDD
         update_success = update_client_role_in_db(client_id, selected_role)
 
@@ -497,7 +663,6 @@ def open_delete_confirmation_modal(n_clicks, button_ids):
     if button_id_dict and button_id_dict.get('type') == 'delete-client-open-modal-btn':
         client_id_to_delete = button_id_dict.get('index')
         modal_body_text = f"Êtes-vous sûr de vouloir supprimer le compte ID: {client_id_to_delete}? Cette action est irréversible."
-        print(f"Ouverture du modal de suppression pour l'ID client : {client_id_to_delete}")
         return True, client_id_to_delete, modal_body_text
     else:
         return no_update, no_update, no_update
@@ -514,8 +679,9 @@ def open_delete_confirmation_modal(n_clicks, button_ids):
 def handle_delete_confirmation(confirm_clicks, cancel_clicks, client_id_to_delete):
     # ... (code inchangé) ...
     triggered_id = callback_context.triggered_id
+    if triggered_id == "confirm-delete-client-button" and not is_admin():
+        return False, refused_alert("suppression_compte"), None
     if triggered_id == "confirm-delete-client-button" and client_id_to_delete:
-        print(f"Confirmation de suppression reçue pour l'ID client : {client_id_to_delete}")
         delete_success = delete_client_by_id(client_id_to_delete)
         if delete_success:
             result_message = dbc.Alert(f"Le compte ID {client_id_to_delete} a été supprimé avec succès.", color="success", duration=5000, className="mt-3")
@@ -524,7 +690,6 @@ def handle_delete_confirmation(confirm_clicks, cancel_clicks, client_id_to_delet
         # Vide la zone de résultat après suppression
         return False, result_message, None
     elif triggered_id == "cancel-delete-client-button":
-        print("Annulation de la suppression.")
         return False, no_update, None
     else:
         return no_update, no_update, no_update
\ No newline at end of file
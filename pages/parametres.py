@@ -5,10 +5,13 @@ import dash_bootstrap_components as dbc
 # from dash.dependencies import Input, Output, State, callback_context # Plus nécessaire
 import json
 import os
+from services.logs import get_logger
+from storage.files import get_json_writer
 
 # --- Enregistrement de la page ---
 # Définit l'URL pour accéder à cette page, par ex: /parametres
 dash.register_page(__name__, path='/parametres') # <-- AJOUTÉ
+logger = get_logger(__name__)
 
 # --- Gestion des Préférences (inchangée) ---
 PREFERENCES_FILE = "preferences.json"
@@ -29,17 +32,20 @@ def load_preferences():
                 preferences.setdefault(key, value)
             return preferences
     except (json.JSONDecodeError, IOError) as e:
-        print(f"Erreur lors de la lecture de {PREFERENCES_FILE}: {e}. Utilisation des préférences par défaut.")
+        logger.warning("Préférences illisibles, valeurs par défaut utilisées", extra={"file": PREFERENCES_FILE, "error": str(e)})
         return DEFAULT_PREFERENCES.copy()
 
-def save_preferences(preferences):
-    """Enregistre les préférences utilisateur dans le fichier."""
+def update_preference(key, value):
+    """Modifie une seule préférence sans écraser celles changées entre-temps par un autre worker."""
+    def set_key(current):
+        for default_key, default_value in DEFAULT_PREFERENCES.items():
+            current.setdefault(default_key, default_value)
+        current[key] = value
     try:
-        with open(PREFERENCES_FILE, "w", encoding='utf-8') as f:
-            json.dump(preferences, f, indent=4, ensure_ascii=False)
-        print(f"Préférences sauvegardées: {preferences}")
-    except IOError as e:
-        print(f"Erreur lors de l'écriture dans {PREFERENCES_FILE}: {e}")
+        get_json_writer(PREFERENCES_FILE, dict).update(set_key)
+        logger.debug("Préférence sauvegardée", extra={"key": key, "value": value})
+    except OSError:
+        logger.exception("Erreur lors de l'écriture des préférences", extra={"file": PREFERENCES_FILE})
 
 # --- Layout Principal de la Page Paramètres (inchangé) ---
 layout = dbc.Container([
@@ -125,29 +131,21 @@ def update_preferences_and_theme(selected_theme, selected_language):
     triggered_id = ctx.triggered_id
 
     if not triggered_id:
-        print("Callback préférences déclenché sans input spécifique.")
         # Utiliser no_update importé de dash
         return no_update, no_update
 
-    # Charger les préférences actuelles
-    preferences = load_preferences()
     feedback_message = ""
     theme_to_store = no_update # Par défaut, on ne met pas à jour le store
 
-    # Mettre à jour la préférence qui a changé
+    # Mettre à jour (et sauvegarder) uniquement la préférence qui a changé
     if triggered_id == "theme-dropdown":
-        print(f"Theme dropdown changed to: {selected_theme}")
-        preferences["theme"] = selected_theme
+        update_preference("theme", selected_theme)
         theme_to_store = selected_theme # Préparer la mise à jour du store
         feedback_message = f"Thème '{selected_theme}' appliqué et enregistré."
     elif triggered_id == "language-dropdown":
-        print(f"Language dropdown changed to: {selected_language}")
-        preferences["language"] = selected_language
+        update_preference("language", selected_language)
         feedback_message = f"Langue '{selected_language}' enregistrée."
         # Pas de mise à jour du store de thème si seule la langue change
 
-    # Sauvegarder les préférences mises à jour
-    save_preferences(preferences)
-
     # Retourner la valeur pour le store et le message de feedback
     return theme_to_store, feedback_message
\ No newline at end of file
@@ -3,16 +3,15 @@ import dash
 from dash import html, dcc, callback, callback_context, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 # from dash.dependencies import Input, Output, State # Plus nécessaire car importé de dash
-import json
-import os
 import uuid
 from datetime import datetime
 import re # Import pour les expressions régulières
+from services.logs import get_logger
+from storage.reclamations import add_reclamation
 
 # Enregistrement de la page auprès de Dash Pages
 dash.register_page(__name__, path='/reclamations')
-
-DATA_FILE = "reclamations.json"  # Nom du fichier JSON
+logger = get_logger(__name__)
 
 # --- Layout de la page (INCHANGÉ) ---
 layout = dbc.Container([
@@ -95,29 +94,13 @@ def submit_reclamation(n_clicks, nom, email, description):
             "statut": "En attente"
         }
         try:
-            reclamations = []
-            if os.path.exists(DATA_FILE):
-                if os.path.getsize(DATA_FILE) > 0:
-                    with open(DATA_FILE, "r", encoding='utf-8') as f:
-                        try:
-                            reclamations = json.load(f)
-                            if not isinstance(reclamations, list):
-                                print(f"Avertissement: {DATA_FILE} ne contient pas une liste JSON. Réinitialisation.")
-                                reclamations = []
-                        except json.JSONDecodeError:
-                            print(f"Avertissement: Erreur de décodage JSON dans {DATA_FILE}. Réinitialisation.")
-                            reclamations = []
-
-            reclamations.append(reclamation)
-
-            with open(DATA_FILE, "w", encoding='utf-8') as f:
-                json.dump(reclamations, f, indent=4, ensure_ascii=False)
+            add_reclamation(reclamation) # Une seule ligne insérée dans la table 'reclamations'
 
             # Retourner un message succès clair
             return dbc.Alert("Réclamation soumise avec succès !", color="success", dismissable=True)
 
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde de la réclamation : {e}")
+        except Exception:
+            logger.exception("Erreur lors de la sauvegarde de la réclamation")
             return dbc.Alert(f"Une erreur s'est produite lors de la sauvegarde. Veuillez réessayer.", color="danger", dismissable=True)
 
     # Si le callback est déclenché sans clic (ne devrait pas arriver avec prevent_initial_call)
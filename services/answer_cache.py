@@ -0,0 +1,81 @@
+import os
+import threading
+
+from services.responses import normalize
+from storage.cache import LRUCache
+
+# --- Configuration ---
+ANSWER_CACHE_TTL = float(os.environ.get("CIRACBOT_ANSWER_CACHE_TTL", "600")) # Secondes
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("CIRACBOT_ANSWER_CACHE_MAX_ENTRIES", "5000"))
+
+
+class AnswerCache:
+    """Réponses du chatbot déjà calculées, par question normalisée.
+
+    "Solde ?", "solde" et " SOLDE !" partagent une entrée : le moteur ne voit que le
+    texte normalisé (minuscules, sans accents, ponctuation et espaces réduits), sa
+    réponse n'en dépend donc pas. La réponse ne dépend pas non plus de la langue du
+    navigateur (FAQ en français, moteurs sans paramètre de langue) : une seule
+    entrée par question. Les entrées sont oubliées dès que la version du moteur
+    change (FAQ rechargée) ou sur invalidate().
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl=ANSWER_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._lock = threading.Lock()
+        self._engine_version = None
+        self.invalidations = 0
+
+    def _check_engine(self, engine):
+        engine.refresh() # Aussi sur un hit : une FAQ modifiée doit être vue même si tout est en cache
+        version = (id(engine), engine.version)
+        if version != self._engine_version:
+            if self._engine_version is not None:
+                self.invalidate()
+            self._engine_version = version
+        return version
+
+    def reply(self, engine, message):
+        """Réponse du moteur à 'message', servie depuis le cache si la même question a déjà été posée."""
+        key = normalize(message or "")
+        if not key: # Rien à comparer (emojis, ponctuation seule) : pas d'entrée pour ça
+            return engine.reply(message)
+        version = self._check_engine(engine)
+        reply = self._entries.get(key)
+        if reply is None:
+            reply = engine.reply(message)
+            # FAQ rechargée pendant le calcul : la réponse vient peut-être de l'ancienne, on ne la garde pas
+            if reply.cacheable and (id(engine), engine.version) == version:
+                self._entries.set(key, reply)
+        return reply
+
+    def invalidate(self):
+        """Oublie toutes les réponses en cache."""
+        with self._lock:
+            self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self):
+        """Compteurs du cache (taille, hits, misses, évictions, taux de hit) et nombre d'invalidations."""
+        with self._lock:
+            invalidations = self.invalidations
+        return dict(self._entries.stats(), invalidations=invalidations, ttl=self.ttl)
+
+
+_answer_cache = AnswerCache()
+
+
+def cached_reply(engine, message):
+    """Réponse de 'engine' à 'message' via le cache de réponses du processus."""
+    return _answer_cache.reply(engine, message)
+
+
+def invalidate_answers():
+    """À appeler quand la source des réponses change hors du moteur (ex. réponses modifiées en base)."""
+    _answer_cache.invalidate()
+
+
+def answer_cache_stats():
+    """Compteurs du cache de réponses du chatbot."""
+    return _answer_cache.stats()
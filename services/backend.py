@@ -0,0 +1,265 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+from services.logs import get_logger
+from services.responses import Reply, ResponseEngine, get_engine, register_engine
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+# Service de réponse externe (NLU/LLM) : POST JSON {"message", "language"} -> {"answer"}
+BACKEND_URL = os.environ.get("CIRACBOT_BACKEND_URL", "http://127.0.0.1:8099/reply")
+BACKEND_TIMEOUT = float(os.environ.get("CIRACBOT_BACKEND_TIMEOUT", "3")) # Secondes par appel, connexion comprise
+# Appels simultanés par processus ; au-delà, réponse de repli immédiate plutôt qu'une file d'attente
+# (sous gunicorn, threads - 1 par défaut : voir gunicorn.conf.py)
+BACKEND_MAX_CONCURRENCY = int(os.environ.get("CIRACBOT_BACKEND_MAX_CONCURRENCY", "32"))
+BACKEND_MAX_RESPONSE_BYTES = 1024 * 1024
+# Disjoncteur : ouvert après N échecs consécutifs, un appel d'essai après RESET secondes
+BACKEND_BREAKER_FAILURES = int(os.environ.get("CIRACBOT_BACKEND_BREAKER_FAILURES", "5"))
+BACKEND_BREAKER_RESET = float(os.environ.get("CIRACBOT_BACKEND_BREAKER_RESET", "30"))
+# Appel réussi mais plus lent que ça (secondes) : compté comme un échec par le disjoncteur
+BACKEND_SLOW_CALL = float(os.environ.get("CIRACBOT_BACKEND_SLOW_CALL", str(BACKEND_TIMEOUT / 2)))
+BACKEND_FALLBACK_RESPONSE = "🤖 Je ne peux pas répondre pour le moment. Réessayez dans quelques instants, ou contactez votre conseiller au 01 23 45 67 89."
+
+
+class BackendError(Exception):
+    """Réponse invalide ou erreur HTTP du service de réponse."""
+
+
+class CircuitBreaker:
+    """Disjoncteur : après 'failures' échecs consécutifs, plus aucun appel pendant 'reset_timeout' secondes.
+
+    Passé ce délai, un seul appel d'essai est autorisé (demi-ouvert) : un succès
+    referme le disjoncteur, un échec le rouvre pour un nouveau délai. Un appel plus
+    long que 'slow_call' secondes compte comme un échec même s'il a abouti : un
+    service qui répond juste sous le délai maximal occupe quand même les threads.
+    """
+
+    def __init__(self, failures=BACKEND_BREAKER_FAILURES, reset_timeout=BACKEND_BREAKER_RESET, slow_call=BACKEND_SLOW_CALL):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.slow_call = slow_call
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        """True si un appel peut être tenté maintenant."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True # Demi-ouvert : un seul appel d'essai à la fois
+            return True
+
+    def record_call(self, duration):
+        """Enregistre un appel abouti en 'duration' secondes. Retourne False s'il a été compté comme un échec (trop lent)."""
+        if self.slow_call is not None and duration >= self.slow_call:
+            self.record_failure()
+            return False
+        self.record_success()
+        return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Backend circuit closed")
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._trial_running or self._consecutive_failures >= self.failures:
+                if self._opened_at is None or self._trial_running:
+                    logger.warning("Backend circuit opened", extra={"consecutive_failures": self._consecutive_failures})
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+async def _read_body(reader, headers):
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                return body
+            body += await reader.readexactly(size)
+            await reader.readline() # \r\n de fin de morceau
+            if len(body) > BACKEND_MAX_RESPONSE_BYTES:
+                raise BackendError("Réponse trop volumineuse.")
+    length = headers.get("content-length")
+    if length is not None:
+        if int(length) > BACKEND_MAX_RESPONSE_BYTES:
+            raise BackendError("Réponse trop volumineuse.")
+        return await reader.readexactly(int(length))
+    return await reader.read(BACKEND_MAX_RESPONSE_BYTES)
+
+
+async def post_json(url, payload):
+    """POST JSON sans bloquer la boucle asyncio (connexion, envoi et lecture non bloquants). Retourne le JSON reçu."""
+    parts = urlsplit(url)
+    https = parts.scheme == "https"
+    reader, writer = await asyncio.open_connection(
+        parts.hostname, parts.port or (443 if https else 80), ssl=ssl.create_default_context() if https else None
+    )
+    try:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        writer.write(
+            f"POST {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nContent-Type: application/json\r\n"
+            f"Accept: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise BackendError(f"Réponse HTTP invalide : {status_line[:80]!r}")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = await _read_body(reader, headers)
+    finally:
+        writer.close()
+    if status != 200:
+        raise BackendError(f"HTTP {status}")
+    try:
+        return json.loads(data)
+    except ValueError:
+        raise BackendError("Réponse JSON invalide.")
+
+
+class BackendClient:
+    """Appels au service de réponse depuis les threads web, exécutés sur une boucle asyncio dédiée.
+
+    Tous les appels du processus partagent un thread et sa boucle : un appel lent
+    n'occupe qu'une coroutine, pas un thread. Le thread web qui attend la réponse
+    est libéré au plus tard après 'timeout' secondes. Au-delà de 'max_concurrency'
+    appels en cours, ou disjoncteur ouvert, la réponse de repli est renvoyée tout de
+    suite : un service lent ou en panne ne peut pas bloquer tous les workers.
+    """
+
+    def __init__(self, url=BACKEND_URL, timeout=BACKEND_TIMEOUT, max_concurrency=BACKEND_MAX_CONCURRENCY, breaker=None):
+        self.url = url
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._loop = None
+        self._loop_pid = None
+        self._slots = threading.BoundedSemaphore(max_concurrency) # Appels en cours, tous threads confondus
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "successes": 0, "failures": 0, "timeouts": 0, "slow": 0, "busy": 0, "short_circuited": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _get_loop(self):
+        # Boucle créée au premier appel du processus (et recréée après un fork : le thread n'est pas copié)
+        with self._lock:
+            if self._loop is None or self._loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="backend-client", daemon=True).start()
+                self._loop, self._loop_pid = loop, os.getpid()
+                self._slots = threading.BoundedSemaphore(self.max_concurrency)
+            return self._loop
+
+    async def _call(self, message, language):
+        data = await asyncio.wait_for(post_json(self.url, {"message": message, "language": language}), self.timeout)
+        answer = data.get("answer") if isinstance(data, dict) else None
+        if not isinstance(answer, str) or not answer.strip():
+            raise BackendError("Champ 'answer' absent ou vide.")
+        return answer
+
+    def ask(self, message, language="fr"):
+        """Réponse du service à 'message', ou None (repli) en cas d'échec, de surcharge ou de disjoncteur ouvert."""
+        loop = self._get_loop()
+        slots = self._slots
+        if not slots.acquire(blocking=False): # Tous les créneaux pris : pas de file d'attente, repli immédiat
+            self._count("busy")
+            return None
+        if not self.breaker.allow():
+            slots.release()
+            self._count("short_circuited")
+            return None
+        self._count("calls")
+        start = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(self._call(message, language), loop)
+        future.add_done_callback(lambda _: slots.release()) # Créneau rendu à la fin réelle de l'appel
+        try:
+            # Marge : le délai est appliqué dans la boucle (wait_for), celui-ci n'est qu'une garantie
+            answer = future.result(self.timeout + 0.5)
+        except (asyncio.TimeoutError, concurrent.futures.TimeoutError):
+            future.cancel()
+            self._count("timeouts")
+            self.breaker.record_failure()
+            logger.warning("Backend call timed out", extra={"timeout": self.timeout})
+            return None
+        except (OSError, EOFError, BackendError, ValueError) as e: # EOFError : connexion coupée en pleine réponse
+            self._count("failures")
+            self.breaker.record_failure()
+            logger.warning("Backend call failed", extra={"error": str(e) or type(e).__name__})
+            return None
+        duration = time.perf_counter() - start
+        self._count("successes")
+        if not self.breaker.record_call(duration):
+            self._count("slow")
+            logger.warning("Backend call slow", extra={"duration_ms": round(duration * 1000, 1), "slow_call": self.breaker.slow_call})
+        else:
+            logger.debug("Backend call succeeded", extra={"duration_ms": round(duration * 1000, 1)})
+        return answer
+
+    def stats(self):
+        """Compteurs des appels (succès, lents, échecs, délais dépassés, refus) et état du disjoncteur."""
+        with self._lock:
+            counters = dict(self._counters)
+        counters["circuit"] = self.breaker.state
+        counters["max_concurrency"] = self.max_concurrency
+        return counters
+
+
+class BackendEngine(ResponseEngine):
+    """Moteur de réponse délégué au service externe BACKEND_URL, avec réponse de repli en cas de problème."""
+
+    name = "backend"
+
+    def __init__(self, client=None):
+        self.client = client if client is not None else BackendClient()
+
+    def reply(self, message):
+        answer = self.client.ask(message)
+        if answer is None:
+            return Reply(BACKEND_FALLBACK_RESPONSE, None, 0.0, cacheable=False)
+        return Reply(answer, "backend", 1.0)
+
+
+register_engine(BackendEngine.name, BackendEngine)
+
+
+def backend_stats():
+    """Compteurs du client du service de réponse (si le moteur 'backend' est utilisé), sinon None."""
+    engine = get_engine()
+    return engine.client.stats() if isinstance(engine, BackendEngine) else None
@@ -0,0 +1,149 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+# --- Configuration ---
+LOG_LEVEL = os.environ.get("CIRACBOT_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("CIRACBOT_LOG_FORMAT", "json") # "json" ou "text" (développement)
+# Part des messages DEBUG conservés (1 = tous) ; un appel peut préciser extra={"sample_rate": ...}
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("CIRACBOT_LOG_DEBUG_SAMPLE_RATE", "1"))
+LOG_QUEUE_SIZE = 10000 # Au-delà, les messages sont abandonnés (et comptés) plutôt que de bloquer une requête
+ROOT_LOGGER = "ciracbot"
+
+# Attributs standard d'un LogRecord : tout le reste (passé via 'extra') devient un champ JSON
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample_rate"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par message : horodatage, niveau, logger, message et champs 'extra'."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text # Trace déjà formatée avant la file (voir NonBlockingQueueHandler)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Ne garde qu'une fraction des messages DEBUG (les niveaux supérieurs passent tous)."""
+
+    def __init__(self, rate=LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = getattr(record, "sample_rate", self.rate)
+        return rate >= 1 or random.random() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui abandonne le message si la file est pleine, au lieu de bloquer l'appelant."""
+
+    dropped = 0
+    _dropped_lock = threading.Lock() # "+= 1" n'est pas atomique : plusieurs threads peuvent trouver la file pleine
+
+    def prepare(self, record):
+        # Le QueueHandler standard fusionne la trace dans le message : on la garde dans exc_text
+        exc_text = None
+        if record.exc_info:
+            exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record = logging.makeLogRecord(dict(vars(record), exc_info=None, exc_text=None))
+        record = super().prepare(record)
+        record.exc_text = exc_text
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with NonBlockingQueueHandler._dropped_lock:
+                NonBlockingQueueHandler.dropped += 1
+
+
+_listener = None
+_setup_lock = threading.Lock()
+_pid = None
+
+
+def setup_logging():
+    """Installe la file de logs du processus (idempotent ; réinstallée automatiquement après un fork).
+
+    Les appels de log ne font que poser le message dans une file en mémoire ;
+    un thread dédié le formate et l'écrit sur stderr. Une requête n'attend donc
+    jamais le terminal ou le pipe de sortie.
+    """
+    global _listener, _pid
+    with _setup_lock:
+        if _listener is not None and _pid == os.getpid():
+            return
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s: %(message)s"
+        ))
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.addFilter(SamplingFilter())
+        root.addHandler(handler)
+
+        # Thread du listener : non hérité par un processus enfant, d'où le contrôle du pid
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        _pid = os.getpid()
+
+
+def _stop_listener():
+    # Vide la file à l'arrêt du processus
+    if _listener is not None and _pid == os.getpid():
+        _listener.stop()
+
+
+def _after_fork_in_child():
+    # Le thread du listener n'existe pas dans l'enfant : on réinstalle une file neuve
+    global _setup_lock, _listener
+    _setup_lock = threading.Lock()
+    if _listener is not None:
+        _listener = None
+        setup_logging()
+
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_logger(name):
+    """Logger du module 'name' (ex. get_logger(__name__) -> 'ciracbot.pages.agent')."""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def dropped_messages():
+    """Nombre de messages abandonnés faute de place dans la file (suivi)."""
+    return NonBlockingQueueHandler.dropped
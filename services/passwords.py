@@ -0,0 +1,140 @@
+import functools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# --- Configuration ---
+# Méthode et coût au format Werkzeug, ex. "scrypt:32768:8:1" ou "pbkdf2:sha256:600000".
+# Les hashs stockés avec d'autres paramètres sont recalculés à la connexion suivante.
+HASH_METHOD = os.environ.get("CIRACBOT_PASSWORD_HASH", "scrypt:32768:8:1")
+# Processus de hachage par worker web (0 = hachage dans le thread de la requête)
+HASH_WORKERS = int(os.environ.get("CIRACBOT_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Hachages en cours ou en attente au-delà desquels on refuse tout de suite (HashingBusy)
+HASH_MAX_PENDING = int(os.environ.get("CIRACBOT_HASH_MAX_PENDING", str(max(1, HASH_WORKERS) * 4)))
+HASH_TIMEOUT = float(os.environ.get("CIRACBOT_HASH_TIMEOUT", "5")) # Secondes
+
+
+class HashingBusy(RuntimeError):
+    """Le service de hachage est saturé (file pleine) ou n'a pas répondu à temps."""
+
+
+# --- Fonctions exécutées dans les processus de hachage ---
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored_hash, password, method):
+    """Vérifie le mot de passe ; si valide et hash aux anciens paramètres, retourne aussi le nouveau hash."""
+    if not check_password_hash(stored_hash, password):
+        return False, None
+    if hash_needs_update(stored_hash, method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+def hash_many(executor, passwords, workers, method=None):
+    """Hache une liste de mots de passe en parallèle sur 'executor' (imports en masse : pas de limite de file)."""
+    method = method or HASH_METHOD
+    # Quelques lots par processus : peu d'aller-retours, charge tout de même équilibrée
+    chunksize = max(1, len(passwords) // (max(1, workers) * 4))
+    return list(executor.map(_hash, passwords, [method] * len(passwords), chunksize=chunksize))
+
+
+@functools.lru_cache(maxsize=8)
+def _hash_prefix(method):
+    """Préfixe complet des hashs produits par 'method' ("scrypt" -> "scrypt:32768:8:1"), calculé une fois."""
+    # Werkzeug complète les paramètres omis : seul un vrai hash donne le préfixe à comparer
+    return generate_password_hash("x", method=method).split("$", 1)[0]
+
+
+def hash_needs_update(stored_hash, method=None):
+    """True si 'stored_hash' n'a pas été produit avec la méthode/coût configurés."""
+    return stored_hash.split("$", 1)[0] != _hash_prefix(method or HASH_METHOD)
+
+
+class PasswordHasher:
+    """Pool de processus dédié au hachage des mots de passe.
+
+    Le travail CPU (scrypt/pbkdf2) quitte le worker web : une rafale de connexions
+    n'immobilise plus les autres requêtes. La file est bornée (HashingBusy au-delà)
+    et chaque appel a un délai maximal. Le pool est créé au premier usage, donc
+    après le fork des workers du serveur.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING, timeout=HASH_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+
+    def _submit(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        with self._lock:
+            if self._pid == os.getpid() and self._pending >= self.max_pending:
+                raise HashingBusy(f"{self._pending} hachages déjà en attente.")
+            if self._executor is None or self._pid != os.getpid():
+                # Premier usage, ou processus enfant d'un fork : le pool du parent n'est pas utilisable ici
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+                self._pending = 0
+            self._pending += 1
+            try:
+                future = self._executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._pending -= 1
+                self._executor = None # Un processus de hachage est mort : pool recréé au prochain appel
+                raise HashingBusy("Pool de hachage indisponible.")
+        # La place n'est libérée qu'à la fin réelle du calcul (même après un dépassement de délai)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel() # Sans effet si le calcul a déjà commencé
+            raise HashingBusy(f"Hachage non terminé après {self.timeout}s.")
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise HashingBusy("Pool de hachage indisponible.")
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def hash(self, password):
+        """Hash du mot de passe avec HASH_METHOD. Lève HashingBusy si le service est saturé."""
+        return self._submit(_hash, password, HASH_METHOD)
+
+    def verify(self, stored_hash, password):
+        """Retourne (valide, nouveau_hash_ou_None). Un seul aller-retour vers le pool, rehash compris."""
+        return self._submit(_verify, stored_hash, password, HASH_METHOD)
+
+    def start(self):
+        """Démarre le pool de processus tout de suite (démarrage d'un worker web) plutôt qu'au premier hachage."""
+        if self.workers > 0:
+            self._submit(os.getpid)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher():
+    """Retourne le service de hachage partagé par le processus."""
+    global _hasher
+    with _hasher_lock:
+        if _hasher is None:
+            _hasher = PasswordHasher()
+        return _hasher
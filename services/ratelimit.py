@@ -0,0 +1,139 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from storage.db import connection
+
+# --- Configuration ---
+# Règles "tentatives/secondes" (seau à jetons : 'tentatives' d'affilée, puis rechargement régulier)
+DEFAULT_RULES = {
+    "login_ip": "20/60", # Connexions par adresse client
+    "login_email": "5/300", # Connexions par compte visé
+    "register_ip": "5/600", # Inscriptions par adresse client
+}
+RATELIMIT_MAX_KEYS = 100000 # Seaux gardés en mémoire par processus (les plus anciens sont oubliés)
+# "memory" (par processus) ou "sqlite" (partagé entre les workers de la machine, fichier RATELIMIT_DB_FILE)
+RATELIMIT_BACKEND = os.environ.get("CIRACBOT_RATELIMIT_BACKEND", "memory")
+RATELIMIT_DB_FILE = "ratelimit.db"
+SQLITE_PURGE_INTERVAL = 60 # Secondes entre deux purges des seaux pleins
+
+Rule = namedtuple("Rule", ["capacity", "refill_per_second"])
+
+
+def parse_rule(spec):
+    """'5/300' -> Rule(capacity=5, refill_per_second=5/300)."""
+    count, seconds = spec.split("/")
+    return Rule(int(count), int(count) / float(seconds))
+
+
+def _load_rules():
+    # Surcharge possible par variable d'environnement, ex. CIRACBOT_RATELIMIT_LOGIN_IP="50/60"
+    return {
+        name: parse_rule(os.environ.get(f"CIRACBOT_RATELIMIT_{name.upper()}", spec))
+        for name, spec in DEFAULT_RULES.items()
+    }
+
+
+def _take(tokens, updated, rule, now):
+    """Recharge le seau puis tente de prendre un jeton. Retourne (jetons, attente en secondes ou 0)."""
+    tokens = min(rule.capacity, tokens + (now - updated) * rule.refill_per_second)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rule.refill_per_second
+
+
+class MemoryBackend:
+    """Seaux en mémoire du processus, bornés en nombre (LRU)."""
+
+    def __init__(self, max_keys=RATELIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict() # clé -> (jetons, horodatage)
+        self._lock = threading.Lock()
+
+    def take(self, key, rule, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (rule.capacity, now))
+            tokens, retry_after = _take(tokens, updated, rule, now)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class SQLiteBackend:
+    """Seaux partagés par tous les workers de la machine (petite base dédiée, hors ciracbot.db)."""
+
+    def __init__(self, path=RATELIMIT_DB_FILE):
+        self.path = path
+        self._last_purge = 0
+        with connection(self.path) as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_buckets_full_at ON buckets (full_at)')
+            conn.commit()
+
+    def take(self, key, rule, now):
+        with connection(self.path) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = (row["tokens"], row["updated"]) if row else (rule.capacity, now)
+            tokens, retry_after = _take(tokens, updated, rule, now)
+            full_at = now + (rule.capacity - tokens) / rule.refill_per_second # Au-delà, la ligne est inutile
+            conn.execute(
+                'INSERT INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated, full_at = excluded.full_at',
+                (key, tokens, now, full_at)
+            )
+            if now - self._last_purge > SQLITE_PURGE_INTERVAL:
+                # Taille bornée : un seau redevenu plein équivaut à une absence de ligne
+                conn.execute('DELETE FROM buckets WHERE full_at < ?', (now,))
+                self._last_purge = now
+            conn.commit()
+            return retry_after
+
+    def reset(self, key):
+        with connection(self.path) as conn:
+            conn.execute('DELETE FROM buckets WHERE key = ?', (key,))
+            conn.commit()
+
+
+class RateLimiter:
+    """Limiteur par seaux à jetons, une règle par type de tentative (voir DEFAULT_RULES)."""
+
+    def __init__(self, backend, rules=None):
+        self.backend = backend
+        self.rules = rules or _load_rules()
+
+    def hit(self, rule_name, *keys):
+        """Compte une tentative pour chaque clé ; retourne l'attente (s, arrondie au-dessus) si l'une dépasse, sinon 0."""
+        rule = self.rules[rule_name]
+        now = time.time()
+        retry_after = 0.0
+        for key in keys:
+            if key:
+                retry_after = max(retry_after, self.backend.take(f"{rule_name}:{key}", rule, now))
+        return math.ceil(retry_after)
+
+    def reset(self, rule_name, key):
+        """Oublie les tentatives d'une clé (ex. après une connexion réussie)."""
+        self.backend.reset(f"{rule_name}:{key}")
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Retourne le limiteur du processus (backend choisi par CIRACBOT_RATELIMIT_BACKEND)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            backend = SQLiteBackend() if RATELIMIT_BACKEND == "sqlite" else MemoryBackend()
+            _limiter = RateLimiter(backend)
+        return _limiter
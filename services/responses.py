@@ -0,0 +1,324 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from services.logs import get_logger
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+# Moteur de réponse du chatbot : "faq" (classifieur d'intentions sur FAQ_FILE), "static" (réponse fixe),
+# "fake" (modèle génératif simulé, réponses en flux) ou "backend" (service externe, services/backend.py)
+RESPONSE_ENGINE = os.environ.get("CIRACBOT_RESPONSE_ENGINE", "faq")
+FAQ_FILE = os.environ.get("CIRACBOT_FAQ_FILE", "faq.json")
+# Similarité cosinus minimale avec la question d'exemple la plus proche pour répondre
+FAQ_MIN_SCORE = float(os.environ.get("CIRACBOT_FAQ_MIN_SCORE", "0.3"))
+FAQ_RELOAD_INTERVAL = 2.0 # Secondes entre deux vérifications de modification du fichier FAQ
+CHAR_NGRAM_RANGE = (3, 5) # N-grammes de caractères par mot (mot entouré d'espaces)
+# N-grammes présents dans plus de cette part des questions d'exemple ignorés ("de", "mon", " co"...) :
+# ils ne départagent pas les intentions et domineraient le coût du calcul sur une grande FAQ.
+# Jamais en dessous de FAQ_MAX_DF_MIN_COUNT questions : une petite FAQ garde tous ses n-grammes
+FAQ_MAX_DF = float(os.environ.get("CIRACBOT_FAQ_MAX_DF", "0.05"))
+FAQ_MAX_DF_MIN_COUNT = 100
+# Modèle génératif simulé ("fake") : délai avant le premier morceau (lecture du prompt) puis entre morceaux
+FAKE_MODEL_FIRST_TOKEN_DELAY = float(os.environ.get("CIRACBOT_FAKE_MODEL_FIRST_TOKEN_DELAY", "0.3"))
+FAKE_MODEL_TOKEN_DELAY = float(os.environ.get("CIRACBOT_FAKE_MODEL_TOKEN_DELAY", "0.05"))
+STATIC_RESPONSE = "🤖 Bonjour et bienvenue sur CIRACBot, votre assistant bancaire intelligent disponible 24/7. Je suis actuellement en développement, revenez plus tard !"
+FALLBACK_RESPONSE = "🤖 Je n'ai pas bien compris votre question. Pouvez-vous la reformuler ? Vous pouvez aussi contacter votre conseiller ou déposer une réclamation."
+
+# 'cacheable' faux : réponse de repli (panne, surcharge) à ne pas garder dans le cache de réponses
+Reply = namedtuple("Reply", ["text", "intent", "score", "cacheable"], defaults=(True,))
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_TOKEN = re.compile(r"\S+\s*")
+
+
+def normalize(text):
+    """Texte comparable : minuscules, sans accents ni ponctuation, espaces simples."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def _features(text):
+    # Mots entiers + n-grammes de caractères de chaque mot : robuste aux fautes de frappe,
+    # pluriels et conjugaisons ("bloquee", "bloquer", "bloqué")
+    low, high = CHAR_NGRAM_RANGE
+    features = []
+    for word in normalize(text).split():
+        features.append("w:" + word)
+        padded = f" {word} "
+        for n in range(low, high + 1):
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return Counter(features)
+
+
+def load_faq(path):
+    """Lit et valide le fichier FAQ : liste de {'intent', 'questions': [...], 'answer'}."""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError("Le fichier FAQ doit contenir une liste d'intentions.")
+    for position, entry in enumerate(entries):
+        if not (isinstance(entry, dict) and isinstance(entry.get("intent"), str) and isinstance(entry.get("answer"), str)
+                and isinstance(entry.get("questions"), list) and entry["questions"]
+                and all(isinstance(q, str) for q in entry["questions"])):
+            raise ValueError(f"Intention FAQ invalide en position {position} : 'intent', 'questions' et 'answer' requis.")
+    return entries
+
+
+class FaqIndex:
+    """Matrice TF-IDF (questions d'exemple x n-grammes), précalculée et immuable.
+
+    Stockée par colonne (comme une matrice CSC) : pour chaque n-gramme, les questions
+    qui le contiennent et leurs poids normalisés. Le score d'une requête contre toutes
+    les questions est un seul produit creux vectorisé (np.bincount), dont le coût ne
+    dépend que des n-grammes de la requête et de leur fréquence, pas du nombre d'intentions.
+    """
+
+    def __init__(self, entries, max_df=FAQ_MAX_DF):
+        self.intents = [entry["intent"] for entry in entries]
+        self.answers = [entry["answer"] for entry in entries]
+        vocabulary = {}
+        rows, cols, counts, example_intents = [], [], [], []
+        for intent_index, entry in enumerate(entries):
+            for question in entry["questions"]:
+                row = len(example_intents)
+                example_intents.append(intent_index)
+                for feature, count in _features(question).items():
+                    rows.append(row)
+                    cols.append(vocabulary.setdefault(feature, len(vocabulary)))
+                    counts.append(count)
+        n_examples = len(example_intents)
+        rows = np.array(rows, dtype=np.int32)
+        cols = np.array(cols, dtype=np.int32)
+        counts = np.array(counts, dtype=np.float64)
+        document_frequency = np.bincount(cols, minlength=len(vocabulary))
+        kept = document_frequency <= max(FAQ_MAX_DF_MIN_COUNT, max_df * n_examples)
+        self.stop_features = {feature for feature, column in vocabulary.items() if not kept[column]}
+        if self.stop_features:
+            # Renumérotation des n-grammes conservés ; les autres sont ignorés, dans la FAQ comme dans les requêtes
+            new_column = np.cumsum(kept) - 1
+            vocabulary = {feature: int(new_column[column]) for feature, column in vocabulary.items() if kept[column]}
+            mask = kept[cols]
+            rows, cols, counts = rows[mask], new_column[cols[mask]].astype(np.int32), counts[mask]
+            document_frequency = document_frequency[kept]
+        # IDF lissé ; un n-gramme absent de la FAQ aurait le poids maximal (compte dans la norme de la requête)
+        self.idf = np.log((1 + n_examples) / (1 + document_frequency)) + 1
+        self.unknown_idf = math.log(1 + n_examples) + 1
+        values = (1 + np.log(counts)) * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=n_examples))
+        values /= norms[rows] # Question réduite à des n-grammes ignorés : aucune entrée, pas de division par 0
+        order = np.argsort(cols, kind="stable")
+        self._rows = rows[order]
+        self._values = values[order]
+        self._indptr = np.concatenate(([0], np.cumsum(document_frequency))).tolist()
+        self._example_intents = np.array(example_intents, dtype=np.int32)
+        self.vocabulary = vocabulary
+        self.n_examples = n_examples
+
+    def best_match(self, text):
+        """(indice d'intention, similarité cosinus) de la question d'exemple la plus proche, ou None."""
+        columns, weights, unknown_norm = [], [], 0.0
+        for feature, count in _features(text).items():
+            tf = 1 + math.log(count)
+            column = self.vocabulary.get(feature)
+            if column is None:
+                if feature in self.stop_features:
+                    continue
+                unknown_norm += (tf * self.unknown_idf) ** 2
+            else:
+                columns.append(column)
+                weights.append(tf)
+        if not columns or not self.n_examples:
+            return None
+        query = np.array(weights) * self.idf[columns]
+        query /= math.sqrt(float(query @ query) + unknown_norm)
+        # Colonnes de la requête mises bout à bout (tranches contiguës), puis un seul bincount :
+        # scores[question] = somme des poids(question, n-gramme) x poids(requête, n-gramme)
+        indptr = self._indptr
+        rows = np.concatenate([self._rows[indptr[c]:indptr[c + 1]] for c in columns])
+        products = np.concatenate([self._values[indptr[c]:indptr[c + 1]] * w for c, w in zip(columns, query.tolist())])
+        scores = np.bincount(rows, weights=products, minlength=self.n_examples)
+        best = int(scores.argmax())
+        return int(self._example_intents[best]), float(scores[best])
+
+
+class ResponseEngine:
+    """Interface des moteurs de réponse : reply(message) -> Reply(texte, intention ou None, score).
+
+    'version' change à chaque modification de la source des réponses (les réponses déjà
+    données ne sont plus valables) ; refresh() vérifie si elle a changé. Un moteur
+    génératif ('streaming' vrai) produit sa réponse morceau par morceau avec stream().
+    """
+
+    name = None
+    version = 0
+    streaming = False
+
+    def refresh(self):
+        pass
+
+    def reply(self, message):
+        raise NotImplementedError
+
+    def stream(self, message):
+        """Morceaux de texte successifs de la réponse (par défaut : la réponse entière, en un morceau)."""
+        yield self.reply(message).text
+
+
+class StaticEngine(ResponseEngine):
+    """Toujours la même réponse (moteur de secours, tests de charge)."""
+
+    name = "static"
+
+    def __init__(self, text=STATIC_RESPONSE):
+        self.text = text
+
+    def reply(self, message):
+        return Reply(self.text, None, 0.0)
+
+
+class FaqEngine(ResponseEngine):
+    """Classifieur d'intentions TF-IDF (mots et n-grammes de caractères) sur une FAQ JSON.
+
+    L'index est construit au démarrage puis reconstruit, sans redémarrage, quand le
+    fichier change (vérifié au plus toutes les 'reload_interval' secondes). Un seul
+    thread reconstruit l'index puis le remplace d'un bloc : les autres continuent de
+    répondre avec l'ancien. Un fichier invalide garde l'index précédent.
+    """
+
+    name = "faq"
+
+    def __init__(self, path=FAQ_FILE, min_score=FAQ_MIN_SCORE, reload_interval=FAQ_RELOAD_INTERVAL):
+        self.path = path
+        self.min_score = min_score
+        self.reload_interval = reload_interval
+        self._index = FaqIndex([])
+        self._signature = None
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+        self.reload()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force=True):
+        """Reconstruit l'index depuis le fichier (si modifié, sauf force). Retourne True si l'index a changé."""
+        with self._reload_lock:
+            self._checked_at = time.monotonic()
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return False
+            start = time.perf_counter()
+            try:
+                index = FaqIndex(load_faq(self.path))
+            except (OSError, ValueError) as e: # ValueError couvre aussi un JSON invalide
+                logger.error("FAQ non chargée, index précédent conservé", extra={"file": self.path, "error": str(e)})
+                self._signature = signature # Pas de nouvelle tentative avant la prochaine modification
+                return False
+            self._index, self._signature = index, signature
+            self.version += 1
+        logger.info("FAQ chargée", extra={
+            "file": self.path, "intents": len(index.intents), "examples": index.n_examples,
+            "features": len(index.vocabulary), "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        })
+        return True
+
+    def refresh(self):
+        """Recharge la FAQ si le fichier a changé (au plus une vérification par 'reload_interval')."""
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        if self._reload_lock.locked(): # Rechargement en cours dans un autre thread : on répond avec l'index actuel
+            return
+        self.reload(force=False)
+
+    def reply(self, message):
+        self.refresh()
+        index = self._index
+        match = index.best_match(message or "")
+        if match is None or match[1] < self.min_score:
+            return Reply(FALLBACK_RESPONSE, None, match[1] if match else 0.0)
+        intent, score = match
+        return Reply(index.answers[intent], index.intents[intent], score)
+
+
+def fake_model_tokens(text, first_token_delay=FAKE_MODEL_FIRST_TOKEN_DELAY, token_delay=FAKE_MODEL_TOKEN_DELAY):
+    """Générateur imitant un modèle génératif : 'text' mot par mot (espaces compris), avec ses délais."""
+    delay = first_token_delay
+    for token in _TOKEN.findall(text):
+        if delay:
+            time.sleep(delay)
+        yield token
+        delay = token_delay
+
+
+class FakeModelEngine(ResponseEngine):
+    """Modèle génératif simulé, pour développer et tester le mode flux sans modèle réel.
+
+    Le contenu vient de la FAQ ; il est rendu morceau par morceau avec les délais
+    d'un modèle (premier morceau après FAKE_MODEL_FIRST_TOKEN_DELAY secondes).
+    """
+
+    name = "fake"
+    streaming = True
+
+    def __init__(self, source=None, first_token_delay=FAKE_MODEL_FIRST_TOKEN_DELAY, token_delay=FAKE_MODEL_TOKEN_DELAY):
+        self.source = source if source is not None else FaqEngine()
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+    @property
+    def version(self):
+        return self.source.version
+
+    def refresh(self):
+        self.source.refresh()
+
+    def stream(self, message):
+        return fake_model_tokens(self.source.reply(message).text, self.first_token_delay, self.token_delay)
+
+    def reply(self, message):
+        source_reply = self.source.reply(message)
+        text = "".join(fake_model_tokens(source_reply.text, self.first_token_delay, self.token_delay))
+        return source_reply._replace(text=text)
+
+
+# Moteurs disponibles par nom ; register_engine() permet d'en brancher d'autres
+ENGINES = {
+    StaticEngine.name: StaticEngine,
+    FaqEngine.name: FaqEngine,
+    FakeModelEngine.name: FakeModelEngine,
+}
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def register_engine(name, factory):
+    """Ajoute un moteur sélectionnable par CIRACBOT_RESPONSE_ENGINE=name (factory() -> ResponseEngine)."""
+    ENGINES[name] = factory
+
+
+def get_engine():
+    """Retourne le moteur de réponse du processus (construit au premier appel, partagé après un fork)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            factory = ENGINES.get(RESPONSE_ENGINE)
+            if factory is None:
+                logger.error("Moteur de réponse inconnu, moteur statique utilisé", extra={"engine": RESPONSE_ENGINE})
+                factory = StaticEngine
+            _engine = factory()
+        return _engine
@@ -0,0 +1,44 @@
+import json
+
+from services.answer_cache import cached_reply
+from services.logs import get_logger
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+STREAM_ERROR_MESSAGE = "Le service de réponse est momentanément indisponible, veuillez réessayer."
+
+
+def sse_event(event, data):
+    """Un événement server-sent events : 'event: <nom>' puis 'data: <json>' et une ligne vide."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def reply_events(engine, message, on_complete=None):
+    """Réponse du moteur à 'message' en événements SSE : 'token' ({'text'}) par morceau, puis 'done'.
+
+    Chaque morceau est envoyé dès qu'il est produit : l'utilisateur voit le début de
+    la réponse sans attendre la fin de la génération. Un moteur non génératif répond
+    en un seul morceau, via le cache de réponses. on_complete(texte) est appelé avant
+    'done' avec la réponse complète ; en cas d'erreur, un événement 'error' termine le flux.
+    """
+    parts = []
+    try:
+        if engine.streaming:
+            chunks = engine.stream(message)
+        else:
+            chunks = [cached_reply(engine, message).text]
+        for chunk in chunks:
+            parts.append(chunk)
+            yield sse_event("token", {"text": chunk})
+        text = "".join(parts)
+        if on_complete is not None:
+            on_complete(text)
+    except GeneratorExit: # Client parti en cours de réponse : rien à envoyer ni à enregistrer
+        logger.info("Chat stream closed by client", extra={"chunks": len(parts)})
+        raise
+    except Exception:
+        logger.exception("Chat stream failed", extra={"engine": engine.name, "chunks": len(parts)})
+        yield sse_event("error", {"error": STREAM_ERROR_MESSAGE})
+        return
+    yield sse_event("done", {"chunks": len(parts), "chars": len(text)})
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+
+from storage.db import connection
+
+# --- Configuration ---
+DB_FILE = "ciracbot.db"
+# Messages chargés à l'ouverture de la conversation, puis à chaque "messages précédents"
+CHAT_PAGE_SIZE = int(os.environ.get("CIRACBOT_CHAT_PAGE_SIZE", "20"))
+MAX_CHAT_PAGE_SIZE = 100
+SENDERS = ("user", "bot")
+
+
+def _now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def get_conversation(user_id):
+    """Conversation en cours de l'utilisateur (la plus récente), créée au premier appel. Retourne son id."""
+    with connection(DB_FILE) as conn:
+        row = conn.execute(
+            'SELECT id FROM conversations WHERE user_id = ? ORDER BY updated_at DESC, id DESC LIMIT 1', (user_id,)
+        ).fetchone()
+        if row:
+            return row["id"]
+        conn.execute('BEGIN IMMEDIATE') # Deux workers ne créent pas chacun une conversation
+        row = conn.execute(
+            'SELECT id FROM conversations WHERE user_id = ? ORDER BY updated_at DESC, id DESC LIMIT 1', (user_id,)
+        ).fetchone()
+        if row:
+            conn.rollback()
+            return row["id"]
+        now = _now_ms()
+        cursor = conn.execute('INSERT INTO conversations (user_id, created_at, updated_at) VALUES (?, ?, ?)', (user_id, now, now))
+        conn.commit()
+        return cursor.lastrowid
+
+
+def load_messages(conversation_id, before=None, limit=CHAT_PAGE_SIZE):
+    """Les 'limit' messages précédant le curseur 'before' (les derniers si None), du plus ancien au plus récent.
+
+    Pagination par curseur sur l'index (conversation_id, ts) : rouvrir une longue
+    conversation ne lit que sa dernière page. Retourne {'messages', 'older'} où
+    'older' est le curseur de la page précédente (None s'il n'y a rien avant).
+    """
+    limit = max(1, min(int(limit), MAX_CHAT_PAGE_SIZE))
+    sql = 'SELECT id, ts, sender, body FROM chat_messages WHERE conversation_id = ?'
+    params = [conversation_id]
+    if before:
+        sql += ' AND (ts, id) < (?, ?)'
+        params += [before[0], before[1]]
+    sql += ' ORDER BY ts DESC, id DESC LIMIT ?'
+    params.append(limit + 1)
+    with connection(DB_FILE) as conn:
+        rows = conn.execute(sql, params).fetchall()
+    page = [dict(row) for row in rows[:limit]]
+    page.reverse()
+    older = [page[0]["ts"], page[0]["id"]] if len(rows) > limit else None
+    return {"messages": page, "older": older}
+
+
+class _Append:
+    __slots__ = ("rows", "done", "error")
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.done = False
+        self.error = None
+
+
+class ChatWriter:
+    """Écriture groupée des messages de chat (même principe que JsonFileWriter).
+
+    Les messages envoyés en même temps par plusieurs threads du processus sont
+    insérés ensemble : un seul thread prend la main, écrit tout le lot en une
+    transaction (executemany) puis réveille les autres. Chaque appel retourne
+    une fois ses messages validés en base.
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._cond = threading.Condition()
+        self._pending = []
+        self._writing = False
+
+    def append(self, conversation_id, messages):
+        """Ajoute [(expéditeur, texte), ...] à la conversation et attend leur écriture."""
+        ts = _now_ms()
+        rows = []
+        for sender, body in messages:
+            if sender not in SENDERS:
+                raise ValueError(f"Expéditeur inconnu : {sender}")
+            rows.append((conversation_id, ts, sender, body))
+        request = _Append(rows)
+        with self._cond:
+            self._pending.append(request)
+            while not request.done:
+                if self._writing:
+                    self._cond.wait()
+                    continue
+                batch, self._pending = self._pending, []
+                self._writing = True
+                self._cond.release()
+                try:
+                    self._apply(batch)
+                finally:
+                    self._cond.acquire()
+                    self._writing = False
+                    for item in batch:
+                        item.done = True
+                    self._cond.notify_all()
+        if request.error is not None:
+            raise request.error
+
+    def _apply(self, batch):
+        rows = [row for item in batch for row in item.rows]
+        latest = {} # conversation -> horodatage de son dernier message du lot
+        for conversation_id, ts, _, _ in rows:
+            latest[conversation_id] = max(ts, latest.get(conversation_id, 0))
+        try:
+            with connection(self.path) as conn:
+                conn.executemany('INSERT INTO chat_messages (conversation_id, ts, sender, body) VALUES (?, ?, ?, ?)', rows)
+                conn.executemany('UPDATE conversations SET updated_at = ? WHERE id = ?', [(ts, cid) for cid, ts in latest.items()])
+                conn.commit()
+        except Exception as e:
+            for item in batch:
+                item.error = e
+
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def get_chat_writer():
+    """Retourne l'écrivain de messages du processus (recréé après un fork)."""
+    global _writer, _writer_pid
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = ChatWriter()
+            _writer_pid = os.getpid()
+        return _writer
+
+
+def save_messages(user_id, messages):
+    """Ajoute [(expéditeur, texte), ...] à la conversation en cours de l'utilisateur (écriture groupée)."""
+    get_chat_writer().append(get_conversation(user_id), messages)
@@ -0,0 +1,141 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# --- Configuration ---
+DB_FILE = "ciracbot.db"
+POOL_SIZE = int(os.environ.get("CIRACBOT_DB_POOL_SIZE", "8")) # Connexions ouvertes au plus par processus (gunicorn : 2 par thread)
+POOL_TIMEOUT = 10 # Secondes d'attente d'une connexion libre avant d'abandonner
+BUSY_TIMEOUT_MS = 5000 # Attente d'un verrou d'écriture tenu par un autre processus
+MMAP_SIZE = 256 * 1024 * 1024 # Lectures via mmap (octets)
+CACHE_SIZE_KB = 16 * 1024 # Cache de pages par connexion
+STATEMENT_CACHE_SIZE = 256 # Requêtes préparées gardées par connexion
+
+# Appliqués à chaque nouvelle connexion (journal_mode=WAL est persistant dans le fichier)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL", # Les lecteurs ne bloquent plus sur l'écrivain (et inversement)
+    "PRAGMA synchronous=NORMAL", # Sûr en WAL : fsync aux checkpoints, pas à chaque commit
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    f"PRAGMA mmap_size={MMAP_SIZE}",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _open_connection(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False, # Une connexion passe d'un thread à l'autre via le pool (jamais en parallèle)
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """Pool de connexions SQLite partagé par les threads d'un processus.
+
+    Les connexions sont créées à la demande (au plus 'max_size') puis réutilisées :
+    les PRAGMA et les requêtes préparées ne sont payés qu'une fois par connexion.
+    Une connexion rendue au pool n'a jamais de transaction ouverte. Après un fork,
+    le processus enfant repart d'un pool vide (une connexion SQLite ne se partage pas).
+    """
+
+    def __init__(self, path, max_size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue() # LIFO : la connexion la plus récente a le cache le plus chaud
+        self._created = 0
+
+    def acquire(self):
+        """Retourne une connexion libre (à rendre avec release). Lève sqlite3.OperationalError si le pool reste plein."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._created < self.max_size:
+                conn = _open_connection(self.path)
+                self._created += 1
+                return conn
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"Aucune connexion libre vers {self.path} après {self.timeout}s.")
+
+    def release(self, conn):
+        if self._pid != os.getpid():
+            return # Connexion héritée du parent : on l'abandonne sans la toucher
+        try:
+            if conn.in_transaction:
+                conn.rollback() # Transaction laissée ouverte par l'appelant (erreur) : annulée
+        except sqlite3.Error:
+            # Connexion inutilisable : on la remplace au prochain acquire
+            with self._lock:
+                self._created -= 1
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def warm(self, count):
+        """Ouvre jusqu'à 'count' connexions à l'avance (PRAGMA et lecture du schéma payés hors requête)."""
+        conns = []
+        try:
+            for _ in range(min(count, self.max_size)):
+                conn = self.acquire()
+                conn.execute('SELECT name FROM sqlite_master LIMIT 1').fetchall()
+                conns.append(conn)
+        finally:
+            for conn in conns:
+                self.release(conn)
+        return len(conns)
+
+    def close_all(self):
+        """Ferme les connexions libres (arrêt du processus, tests)."""
+        with self._lock:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DB_FILE):
+    """Retourne le pool partagé par le processus pour la base 'path'."""
+    key = os.path.abspath(path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(key)
+        return _pools[key]
+
+
+def connection(path=DB_FILE):
+    """Context manager : emprunte une connexion au pool de 'path' et la rend à la sortie."""
+    return get_pool(path).connection()
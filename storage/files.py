@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from services.logs import get_logger
+
+try:
+    import fcntl
+except ImportError: # Windows : verrou exclusif uniquement (msvcrt)
+    fcntl = None
+    import msvcrt
+
+logger = get_logger(__name__)
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Verrou consultatif inter-processus sur 'path + .lock' (partagé ou exclusif).
+
+    Un descripteur est ouvert à chaque acquisition : le verrou exclut donc aussi
+    les autres threads du même processus.
+    """
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)
+
+
+@contextmanager
+def try_file_lock(path):
+    """Comme file_lock (exclusif) mais sans attendre : cède False si le verrou est déjà pris."""
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(path):
+    """fsync du dossier contenant 'path' (rend un renommage durable). Sans effet sous Windows."""
+    if fcntl is None:
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path, data):
+    """Écrit 'data' dans un fichier temporaire du même dossier puis le renomme à la place de 'path'."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_dir(path)
+
+
+class _Update:
+    __slots__ = ("mutate", "done", "result", "error")
+
+    def __init__(self, mutate):
+        self.mutate = mutate
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class JsonFileWriter:
+    """Coordinateur d'écriture d'un fichier JSON partagé entre threads et processus.
+
+    Chaque mise à jour est une fonction qui modifie le contenu sur place. Les mises à
+    jour concurrentes d'un même processus sont regroupées : un seul thread prend le
+    verrou de fichier, relit le contenu, applique tout le lot et réécrit le fichier
+    une seule fois (renommage atomique). Aucune mise à jour n'est perdue entre processus.
+    """
+
+    def __init__(self, path, default_factory=list):
+        self.path = path
+        self.default_factory = default_factory
+        self._cond = threading.Condition()
+        self._pending = []
+        self._writing = False
+
+    def read(self):
+        """Contenu actuel du fichier, ou la valeur par défaut s'il est absent, vide ou invalide."""
+        default = self.default_factory()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                content = f.read()
+            data = json.loads(content) if content else default
+        except FileNotFoundError:
+            return default
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning("Fichier JSON illisible, contenu réinitialisé", extra={"file": self.path, "error": str(e)})
+            return default
+        if not isinstance(data, type(default)):
+            logger.warning("Fichier JSON au type inattendu, contenu réinitialisé", extra={"file": self.path})
+            return default
+        return data
+
+    def update(self, mutate):
+        """Applique mutate(contenu) sous verrou et attend que le fichier soit écrit. Retourne le résultat de mutate."""
+        request = _Update(mutate)
+        with self._cond:
+            self._pending.append(request)
+            while not request.done:
+                if self._writing:
+                    self._cond.wait()
+                    continue
+                batch, self._pending = self._pending, []
+                self._writing = True
+                self._cond.release()
+                try:
+                    self._apply(batch)
+                finally:
+                    self._cond.acquire()
+                    self._writing = False
+                    for item in batch:
+                        item.done = True
+                    self._cond.notify_all()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _apply(self, batch):
+        try:
+            with file_lock(self.path):
+                data = self.read()
+                for item in batch:
+                    try:
+                        item.result = item.mutate(data)
+                    except Exception as e: # Une mise à jour invalide n'annule pas les autres
+                        item.error = e
+                atomic_write_json(self.path, data)
+        except Exception as e:
+            for item in batch:
+                if item.error is None:
+                    item.error = e
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_json_writer(path, default_factory=list):
+    """Retourne le coordinateur partagé par le processus pour 'path'."""
+    key = os.path.abspath(path)
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = JsonFileWriter(path, default_factory)
+        return _writers[key]
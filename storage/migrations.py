@@ -0,0 +1,139 @@
+import time
+
+from services.logs import get_logger
+from storage.user_search import create_search_index
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+SCHEMA_VERSION_TABLE = "schema_version"
+
+
+def _has_column(conn, table, column):
+    return any(row["name"] == column for row in conn.execute(f'PRAGMA table_info({table})'))
+
+
+def _add_users_age(conn):
+    # Colonne déjà ajoutée à la main sur certaines bases : la migration reste rejouable
+    if not _has_column(conn, "users", "age"):
+        conn.execute('ALTER TABLE users ADD COLUMN age INTEGER CHECK(age IS NULL OR age BETWEEN 0 AND 150)')
+
+
+# Migrations dans l'ordre d'application : (version, nom, instructions SQL ou fonction(conn)).
+# Ne jamais modifier ni renuméroter une migration publiée : en ajouter une nouvelle à la fin.
+MIGRATIONS = [
+    (1, "create_users", (
+        '''CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            username TEXT NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'user' CHECK(role IN ('user', 'admin'))
+        )''',
+    )),
+    # Filtres et comptages par rôle de l'interface agent
+    (2, "users_role_index", (
+        'CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)',
+    )),
+    # Recherche de comptes par email sans tenir compte de la casse
+    (3, "users_email_nocase_index", (
+        'CREATE INDEX IF NOT EXISTS idx_users_email_nocase ON users(email COLLATE NOCASE)',
+    )),
+    # L'âge saisi à l'inscription était jusqu'ici perdu
+    (4, "users_age", _add_users_age),
+    # Recherche de comptes : "commence par" sur le nom (index NOCASE), "contient" sur email et nom (trigrammes)
+    (5, "users_username_nocase_index", (
+        'CREATE INDEX IF NOT EXISTS idx_users_username_nocase ON users(username COLLATE NOCASE)',
+    )),
+    (6, "users_search_trigram", create_search_index),
+    # Historique des conversations du chatbot (storage/chat.py), supprimé avec le compte
+    (7, "chat_history", (
+        '''CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_conversations_user_updated ON conversations(user_id, updated_at)',
+        '''CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER NOT NULL REFERENCES conversations(id),
+            ts INTEGER NOT NULL,
+            sender TEXT NOT NULL CHECK(sender IN ('user', 'bot')),
+            body TEXT NOT NULL
+        )''',
+        # (conversation_id, ts) + rowid implicite : pagination "messages précédents" par curseur (ts, id)
+        'CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_ts ON chat_messages(conversation_id, ts)',
+        '''CREATE TRIGGER IF NOT EXISTS users_delete_conversations AFTER DELETE ON users BEGIN
+            DELETE FROM chat_messages WHERE conversation_id IN (SELECT id FROM conversations WHERE user_id = old.id);
+            DELETE FROM conversations WHERE user_id = old.id;
+        END''',
+    )),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at INTEGER NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def current_version(conn):
+    """Dernière migration appliquée (0 pour une base vierge)."""
+    _ensure_version_table(conn)
+    row = conn.execute(f'SELECT MAX(version) AS version FROM {SCHEMA_VERSION_TABLE}').fetchone()
+    return row["version"] or 0
+
+
+def pending_migrations(conn, migrations=MIGRATIONS):
+    """Migrations pas encore appliquées, dans l'ordre : liste de (version, nom)."""
+    version = current_version(conn)
+    return [(v, name) for v, name, _ in migrations if v > version]
+
+
+def upgrade(conn, migrations=MIGRATIONS, target=None):
+    """Applique les migrations en attente (jusqu'à 'target' inclus si fourni).
+
+    Chaque migration tourne dans sa propre transaction (BEGIN IMMEDIATE) avec
+    l'enregistrement de sa version : en cas d'erreur elle est entièrement annulée,
+    les précédentes restent acquises. Plusieurs workers peuvent démarrer en même
+    temps : la version est relue sous le verrou d'écriture, chaque migration n'est
+    appliquée qu'une fois. Retourne la liste des (version, nom) appliquées.
+    """
+    versions = [v for v, _, _ in migrations]
+    if versions != sorted(set(versions)):
+        raise ValueError("Les versions de migration doivent être uniques et croissantes.")
+    _ensure_version_table(conn)
+    applied = []
+    for version, name, step in migrations:
+        if target is not None and version > target:
+            break
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            done = conn.execute(f'SELECT 1 FROM {SCHEMA_VERSION_TABLE} WHERE version = ?', (version,)).fetchone()
+            if done:
+                conn.rollback()
+                continue
+            if callable(step):
+                step(conn)
+            else:
+                # Pas d'executescript : il validerait la transaction en cours
+                for statement in step:
+                    conn.execute(statement)
+            conn.execute(
+                f'INSERT INTO {SCHEMA_VERSION_TABLE} (version, name, applied_at) VALUES (?, ?, ?)',
+                (version, name, int(time.time()))
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            logger.exception("Migration failed", extra={"version": version, "migration": name})
+            raise
+        logger.info("Migration applied", extra={"version": version, "migration": name})
+        applied.append((version, name))
+    return applied
@@ -0,0 +1,627 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime, timezone
+from enum import Enum
+
+from services.logs import get_logger
+from storage.cache import LRUCache
+from storage.db import connection
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+# "sqlite" (table 'reclamations' dans ciracbot.db) ou "journal" (snapshot JSON + journal en ajout seul,
+# pour les déploiements qui restent sur fichiers, voir storage/reclamations_journal.py)
+STORAGE_MODE = os.environ.get("RECLAMATIONS_STORAGE", "sqlite")
+DB_FILE = "ciracbot.db"
+LEGACY_DATA_FILE = "reclamations.json" # Ancien stockage, importé une seule fois dans la table
+DISPLAY_DATE_FORMAT = "%d/%m/%Y %H:%M" # Format affiché dans l'interface
+DB_DATE_FORMAT = "%Y-%m-%d %H:%M" # Format stocké (triable directement par l'index)
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+CACHE_MAX_ENTRIES = 5000 # Réclamations + pages gardées en mémoire par processus (éviction LRU)
+SEARCH_LIMIT = 20
+# Marqueurs entourant les termes trouvés dans les extraits (caractères de contrôle, absents des saisies)
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+class Statut(str, Enum):
+    """Statuts possibles d'une réclamation (valeurs stockées telles quelles)."""
+    EN_ATTENTE = "En attente"
+    EN_COURS = "En cours"
+    RESOLUE = "Résolue"
+    REJETEE = "Rejetée"
+
+
+DEFAULT_STATUT = Statut.EN_ATTENTE.value
+# Transitions autorisées : En attente -> En cours -> Résolue / Rejetée
+STATUT_TRANSITIONS = {
+    Statut.EN_ATTENTE: {Statut.EN_COURS},
+    Statut.EN_COURS: {Statut.RESOLUE, Statut.REJETEE},
+    Statut.RESOLUE: set(),
+    Statut.REJETEE: set(),
+}
+# Statut atteint -> colonne recevant l'horodatage (epoch) de la transition
+TRANSITION_TS_COLUMNS = {
+    Statut.EN_COURS: "en_cours_ts",
+    Statut.RESOLUE: "resolue_ts",
+    Statut.REJETEE: "rejetee_ts",
+}
+MAX_SQL_PARAMS = 500 # Taille des lots pour les requêtes "IN (...)"
+
+# Colonnes triables -> clé de tri précalculée à l'écriture (chacune couverte par un index composite avec 'id')
+SORT_KEY_COLUMNS = {
+    "date": "date_ts", # Horodatage epoch (entier)
+    "nom": "nom_key", # Nom casefold
+}
+
+VERSION_KEY = "reclamations_version" # Ligne de la table 'meta' incrémentée à chaque écriture dans 'reclamations'
+
+RECLAMATION_COLUMNS = "id, nom, email, description, date, statut, date_ts, nom_key, en_cours_ts, resolue_ts, rejetee_ts"
+
+_schema_ready = False
+_fts_available = True
+
+# Cache partagé par le processus : les clés incluent la version des réclamations,
+# une écriture (locale ou d'un autre processus) rend donc les anciennes entrées inaccessibles
+_cache = LRUCache(max_entries=CACHE_MAX_ENTRIES)
+_cache_version = None
+_version_lock = threading.Lock()
+_local_writes = 0
+
+
+def _journal():
+    # Import local : le module journal importe lui-même des constantes de ce module
+    from storage.reclamations_journal import get_journal
+    return get_journal()
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def store_version():
+    """Version courante des réclamations : compteur d'écritures locales + compteur tenu par triggers (ou signature des fichiers du journal).
+
+    Seules les écritures dans 'reclamations' changent la version : une inscription,
+    un message de chat ou un rehash (même base, même WAL) ne vident pas le cache.
+    """
+    if STORAGE_MODE == "journal":
+        from storage.reclamations_journal import JOURNAL_FILE, SNAPSHOT_FILE
+        return (_local_writes,) + tuple(_file_signature(path) for path in (SNAPSHOT_FILE, JOURNAL_FILE))
+    with _connect() as conn:
+        _ensure_schema(conn) # Avant la lecture : la création du schéma ne change pas une version déjà lue
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (VERSION_KEY,)).fetchone()
+    return (_local_writes, row[0] if row else 0)
+
+
+def _current_cache_version():
+    global _cache_version
+    version = store_version()
+    with _version_lock:
+        if version != _cache_version:
+            # Libère tout de suite la mémoire occupée par les entrées d'une version périmée
+            _cache.clear()
+            _cache_version = version
+    return version
+
+
+def cache_stats():
+    """Compteurs du cache des réclamations (hits, misses, évictions...)."""
+    return _cache.stats()
+
+
+def _connect():
+    # Connexion empruntée au pool du processus (WAL, requêtes préparées en cache), rendue à la sortie du 'with'
+    return connection(DB_FILE)
+
+
+def init_reclamations_table(conn):
+    """Crée la table 'reclamations' et ses index, puis importe l'ancien fichier JSON si la table est vide."""
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS reclamations (
+            id TEXT PRIMARY KEY,
+            nom TEXT NOT NULL,
+            email TEXT NOT NULL,
+            description TEXT NOT NULL,
+            date TEXT NOT NULL,
+            statut TEXT NOT NULL DEFAULT 'En attente',
+            date_ts INTEGER NOT NULL DEFAULT 0,
+            nom_key TEXT NOT NULL DEFAULT '',
+            en_cours_ts INTEGER,
+            resolue_ts INTEGER,
+            rejetee_ts INTEGER
+        );
+    ''')
+    _add_sort_key_columns(conn)
+    _add_transition_columns(conn)
+    conn.executescript('''
+        DROP INDEX IF EXISTS idx_reclamations_date_id;
+        DROP INDEX IF EXISTS idx_reclamations_nom_id;
+        CREATE INDEX IF NOT EXISTS idx_reclamations_date_ts_id ON reclamations(date_ts, id);
+        CREATE INDEX IF NOT EXISTS idx_reclamations_nom_key_id ON reclamations(nom_key, id);
+        CREATE INDEX IF NOT EXISTS idx_reclamations_statut ON reclamations(statut);
+        CREATE INDEX IF NOT EXISTS idx_reclamations_email ON reclamations(email);
+    ''')
+    _init_search_index(conn)
+    _init_version_counter(conn)
+    if conn.execute('SELECT 1 FROM reclamations LIMIT 1').fetchone() is None:
+        _import_legacy_file(conn)
+    conn.commit()
+
+
+def _init_search_index(conn):
+    """Index plein texte FTS5 sur nom, email et description, tenu à jour par triggers.
+
+    Tokenisation unicode61 sans diacritiques ("débité" = "debite"), index de préfixes
+    pour la recherche par début de mot. L'index référence le rowid de 'reclamations' :
+    après un VACUUM, appeler rebuild_search_index().
+    """
+    global _fts_available
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'reclamations_fts'").fetchone()
+    try:
+        conn.executescript('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS reclamations_fts USING fts5(
+                nom, email, description,
+                content='reclamations', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            );
+            CREATE TRIGGER IF NOT EXISTS reclamations_fts_ai AFTER INSERT ON reclamations BEGIN
+                INSERT INTO reclamations_fts(rowid, nom, email, description)
+                VALUES (new.rowid, new.nom, new.email, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS reclamations_fts_ad AFTER DELETE ON reclamations BEGIN
+                INSERT INTO reclamations_fts(reclamations_fts, rowid, nom, email, description)
+                VALUES ('delete', old.rowid, old.nom, old.email, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS reclamations_fts_au AFTER UPDATE OF nom, email, description ON reclamations BEGIN
+                INSERT INTO reclamations_fts(reclamations_fts, rowid, nom, email, description)
+                VALUES ('delete', old.rowid, old.nom, old.email, old.description);
+                INSERT INTO reclamations_fts(rowid, nom, email, description)
+                VALUES (new.rowid, new.nom, new.email, new.description);
+            END;
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite compilé sans FTS5 : la recherche se rabat sur un LIKE
+        logger.warning("FTS5 indisponible, recherche des réclamations sans index", extra={"error": str(e)})
+        _fts_available = False
+        return
+    if not exists:
+        # Lignes déjà présentes avant la création de l'index
+        conn.execute("INSERT INTO reclamations_fts(reclamations_fts) VALUES ('rebuild')")
+
+
+def _init_version_counter(conn):
+    # Compteur lu par store_version() : incrémenté par triggers, donc aussi pour les écritures d'autres processus
+    conn.executescript(f'''
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('{VERSION_KEY}', 0);
+        CREATE TRIGGER IF NOT EXISTS reclamations_version_ai AFTER INSERT ON reclamations BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = '{VERSION_KEY}';
+        END;
+        CREATE TRIGGER IF NOT EXISTS reclamations_version_au AFTER UPDATE ON reclamations BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = '{VERSION_KEY}';
+        END;
+        CREATE TRIGGER IF NOT EXISTS reclamations_version_ad AFTER DELETE ON reclamations BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = '{VERSION_KEY}';
+        END;
+    ''')
+
+
+def rebuild_search_index():
+    """Reconstruit entièrement l'index plein texte à partir de la table 'reclamations'."""
+    with _connect() as conn:
+        _ensure_schema(conn)
+        if _fts_available:
+            conn.execute("INSERT INTO reclamations_fts(reclamations_fts) VALUES ('rebuild')")
+            conn.commit()
+
+
+def _add_sort_key_columns(conn):
+    # Tables créées avant l'ajout des clés de tri : ajout des colonnes puis calcul pour les lignes existantes
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(reclamations)')}
+    if "date_ts" in columns and "nom_key" in columns:
+        return
+    if "date_ts" not in columns:
+        conn.execute('ALTER TABLE reclamations ADD COLUMN date_ts INTEGER NOT NULL DEFAULT 0')
+    if "nom_key" not in columns:
+        conn.execute("ALTER TABLE reclamations ADD COLUMN nom_key TEXT NOT NULL DEFAULT ''")
+    rows = conn.execute('SELECT id, nom, date FROM reclamations').fetchall()
+    conn.executemany(
+        'UPDATE reclamations SET date_ts = ?, nom_key = ? WHERE id = ?',
+        [(_date_to_ts(datetime.strptime(date, DB_DATE_FORMAT)), nom.casefold(), rid) for rid, nom, date in rows]
+    )
+
+
+def _add_transition_columns(conn):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(reclamations)')}
+    for column in TRANSITION_TS_COLUMNS.values():
+        if column not in columns:
+            conn.execute(f'ALTER TABLE reclamations ADD COLUMN {column} INTEGER')
+    # Statuts historiques hors énumération (casse, accents...) ramenés à une valeur connue
+    known = tuple(s.value for s in Statut)
+    rows = conn.execute(
+        f'SELECT id, statut FROM reclamations WHERE statut NOT IN ({", ".join("?" for _ in known)})', known
+    ).fetchall()
+    conn.executemany('UPDATE reclamations SET statut = ? WHERE id = ?', [(normalize_statut(statut), rid) for rid, statut in rows])
+
+
+def _ensure_schema(conn):
+    global _schema_ready
+    if not _schema_ready:
+        init_reclamations_table(conn)
+        _schema_ready = True
+
+
+def _import_legacy_file(conn):
+    if not os.path.exists(LEGACY_DATA_FILE) or os.path.getsize(LEGACY_DATA_FILE) == 0:
+        return
+    try:
+        with open(LEGACY_DATA_FILE, "r", encoding='utf-8') as f:
+            legacy = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        logger.warning("Import de l'ancien fichier de réclamations impossible", extra={"file": LEGACY_DATA_FILE, "error": str(e)})
+        return
+    if not isinstance(legacy, list):
+        return
+    rows = [_to_db_row(r) for r in legacy if isinstance(r, dict) and r.get("id")]
+    conn.executemany(
+        'INSERT OR IGNORE INTO reclamations (id, nom, email, description, date, statut, date_ts, nom_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        rows
+    )
+    logger.info("Réclamations importées", extra={"count": len(rows), "file": LEGACY_DATA_FILE})
+
+
+def normalize_statut(statut):
+    """Ramène un statut stocké à une valeur de Statut (listes historiques, casse, accents)."""
+    # Les anciens enregistrements stockent parfois le statut sous forme de liste (["En cours"])
+    if isinstance(statut, list):
+        statut = statut[0] if statut else None
+    folded = fold_text(statut).strip()
+    for candidate in Statut:
+        if fold_text(candidate.value) == folded:
+            return candidate.value
+    return DEFAULT_STATUT
+
+
+def now_ts():
+    """Horodatage courant, sur la même base que 'date_ts' (heure locale figée en UTC)."""
+    return _date_to_ts(datetime.now().replace(microsecond=0))
+
+
+def format_ts(ts):
+    """Horodatage epoch -> texte au format d'affichage (None si absent)."""
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(DISPLAY_DATE_FORMAT)
+
+
+def _date_to_ts(date):
+    # Les dates sont saisies en heure locale sans fuseau : on les fige en UTC pour un epoch stable
+    return int(date.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _parse_display_date(value):
+    try:
+        return datetime.strptime(value or "", DISPLAY_DATE_FORMAT)
+    except (ValueError, TypeError):
+        return datetime(1900, 1, 1)
+
+
+def sort_keys(reclamation):
+    """Clés de tri normalisées, calculées une seule fois à l'écriture : 'date_ts' (epoch) et 'nom_key' (casefold)."""
+    return {
+        "date_ts": _date_to_ts(_parse_display_date(reclamation.get("date"))),
+        "nom_key": str(reclamation.get("nom", "")).casefold(),
+    }
+
+
+def _to_db_row(reclamation):
+    keys = sort_keys(reclamation)
+    return (
+        reclamation["id"],
+        reclamation.get("nom", ""),
+        reclamation.get("email", ""),
+        reclamation.get("description", ""),
+        _parse_display_date(reclamation.get("date")).strftime(DB_DATE_FORMAT),
+        normalize_statut(reclamation.get("statut")),
+        keys["date_ts"],
+        keys["nom_key"],
+    )
+
+
+def _row_to_dict(row):
+    reclamation = dict(row)
+    reclamation["date"] = datetime.strptime(row["date"], DB_DATE_FORMAT).strftime(DISPLAY_DATE_FORMAT)
+    return reclamation
+
+
+# --- Fonctions d'accès aux réclamations ---
+def add_reclamation(reclamation):
+    """Insère une réclamation (une seule ligne). Lève sqlite3.Error (ou OSError en mode journal) en cas d'échec."""
+    global _local_writes
+    try:
+        if STORAGE_MODE == "journal":
+            return _journal().append(dict(reclamation, **sort_keys(reclamation)))
+        with _connect() as conn:
+            _ensure_schema(conn)
+            conn.execute(
+                'INSERT INTO reclamations (id, nom, email, description, date, statut, date_ts, nom_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                _to_db_row(reclamation)
+            )
+            conn.commit()
+    finally:
+        with _version_lock:
+            _local_writes += 1
+
+
+def list_reclamations(sort_column="date", descending=False):
+    """Retourne toutes les réclamations triées par 'date' ou 'nom' (via index)."""
+    if STORAGE_MODE == "journal":
+        return _journal().list_all(sort_column, descending)
+    key_column = SORT_KEY_COLUMNS.get(sort_column, SORT_KEY_COLUMNS["date"])
+    direction = "DESC" if descending else "ASC"
+    with _connect() as conn:
+        _ensure_schema(conn)
+        rows = conn.execute(
+            f'SELECT {RECLAMATION_COLUMNS} FROM reclamations ORDER BY {key_column} {direction}, id {direction}'
+        ).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+
+def list_reclamations_page(sort_column="date", descending=False, page_size=DEFAULT_PAGE_SIZE, after=None, before=None):
+    """Retourne une seule page de réclamations par pagination keyset sur (colonne de tri, id).
+
+    'after' / 'before' sont les curseurs [valeur, id] de la dernière / première ligne
+    de la page affichée. Retourne un dict avec 'items', 'first', 'last',
+    'has_previous' et 'has_next'. Le résultat est mis en cache : ne pas le modifier.
+    """
+    page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    version = _current_cache_version()
+    cache_key = ("page", version, sort_column, bool(descending), page_size,
+                 tuple(after) if after else None, tuple(before) if before else None)
+    page = _cache.get(cache_key)
+    if page is None:
+        page = _fetch_page(sort_column, descending, page_size, after, before)
+        _cache.set(cache_key, page)
+        # Les lignes de la page servent aussi au modal "Voir" sans nouvelle lecture
+        for reclamation in page["items"]:
+            _cache.set(("id", version, reclamation["id"]), reclamation)
+    return page
+
+
+def _fetch_page(sort_column, descending, page_size, after, before):
+    if STORAGE_MODE == "journal":
+        return _journal().page(sort_column, descending, page_size, after, before)
+    key_column = SORT_KEY_COLUMNS.get(sort_column, SORT_KEY_COLUMNS["date"])
+    backward = before is not None and after is None
+    cursor = before if backward else after
+    # En arrière, on parcourt l'index dans le sens inverse puis on remet la page à l'endroit
+    scan_descending = descending != backward
+    direction = "DESC" if scan_descending else "ASC"
+    comparison = "<" if scan_descending else ">"
+
+    query = f'SELECT {RECLAMATION_COLUMNS} FROM reclamations'
+    params = []
+    if cursor:
+        query += f' WHERE ({key_column}, id) {comparison} (?, ?)'
+        params.extend(cursor[:2])
+    query += f' ORDER BY {key_column} {direction}, id {direction} LIMIT ?'
+    params.append(page_size + 1)
+
+    with _connect() as conn:
+        _ensure_schema(conn)
+        rows = conn.execute(query, params).fetchall()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backward:
+        rows.reverse()
+    return {
+        "items": [_row_to_dict(row) for row in rows],
+        "first": [rows[0][key_column], rows[0]["id"]] if rows else None,
+        "last": [rows[-1][key_column], rows[-1]["id"]] if rows else None,
+        "has_previous": has_more if backward else cursor is not None,
+        "has_next": True if backward else has_more,
+    }
+
+
+def get_reclamation(reclamation_id):
+    """Retourne une réclamation par son ID, ou None (servie par le cache du processus si possible)."""
+    cache_key = ("id", _current_cache_version(), reclamation_id)
+    reclamation = _cache.get(cache_key)
+    if reclamation is None:
+        reclamation = _fetch_reclamation(reclamation_id)
+        if reclamation is not None:
+            _cache.set(cache_key, reclamation)
+    return reclamation
+
+
+def get_reclamation_document(reclamation_id):
+    """Réclamation sérialisée pour l'API JSON : (corps en bytes, empreinte du contenu), ou None.
+
+    L'empreinte ne dépend que du contenu (identique d'un worker à l'autre) et sert d'ETag.
+    Le couple est mis en cache : une réouverture ne relit ni ne resérialise rien.
+    """
+    cache_key = ("json", _current_cache_version(), reclamation_id)
+    document = _cache.get(cache_key)
+    if document is None:
+        reclamation = get_reclamation(reclamation_id)
+        if reclamation is None:
+            return None
+        payload = {
+            "id": reclamation["id"],
+            "nom": reclamation.get("nom"),
+            "email": reclamation.get("email"),
+            "description": reclamation.get("description"),
+            "date": reclamation.get("date"),
+            "statut": reclamation.get("statut"),
+            "historique": [
+                {"statut": statut.value, "ts": reclamation[column], "date": format_ts(reclamation[column])}
+                for statut, column in TRANSITION_TS_COLUMNS.items()
+                if reclamation.get(column)
+            ],
+        }
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        document = (body, hashlib.sha1(body).hexdigest()[:20])
+        _cache.set(cache_key, document)
+    return document
+
+
+def _fetch_reclamation(reclamation_id):
+    if STORAGE_MODE == "journal":
+        return _journal().get(reclamation_id)
+    with _connect() as conn:
+        _ensure_schema(conn)
+        row = conn.execute(
+            f'SELECT {RECLAMATION_COLUMNS} FROM reclamations WHERE id = ?',
+            (reclamation_id,)
+        ).fetchone()
+        return _row_to_dict(row) if row else None
+
+
+# --- Recherche plein texte ---
+def fold_text(text):
+    """Minuscules sans accents, pour comparer des saisies en français ("Débité" -> "debite")."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def search_terms(query):
+    """Découpe une saisie libre en termes (lettres/chiffres), sans syntaxe FTS exploitable par l'utilisateur."""
+    return re.findall(r"\w+", fold_text(query))
+
+
+def highlight_excerpt(text, terms, width=120):
+    """Extrait autour du premier terme trouvé, termes entourés par HIGHLIGHT_START / HIGHLIGHT_END."""
+    text = str(text or "")
+    folded = fold_text(text)
+    # fold_text peut changer la longueur (ligatures...) : on ne surligne que si les positions concordent
+    if len(folded) != len(text):
+        return text[:width]
+    positions = [folded.find(term) for term in terms if term in folded]
+    start = max(0, min(positions) - width // 3) if positions else 0
+    excerpt, folded_excerpt = text[start:start + width], folded[start:start + width]
+    pattern = re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)))
+    parts, last = [], 0
+    for match in pattern.finditer(folded_excerpt) if terms else []:
+        parts.append(excerpt[last:match.start()])
+        parts.append(HIGHLIGHT_START + excerpt[match.start():match.end()] + HIGHLIGHT_END)
+        last = match.end()
+    parts.append(excerpt[last:])
+    return ("…" if start else "") + "".join(parts) + ("…" if start + width < len(text) else "")
+
+
+def search_reclamations(query, limit=SEARCH_LIMIT):
+    """Recherche plein texte sur nom, email et description, classée par pertinence (BM25).
+
+    Chaque terme est cherché comme début de mot ; tous les termes doivent être présents.
+    Retourne des dicts (id, nom, email, date, statut, extrait) où 'extrait' contient
+    les marqueurs HIGHLIGHT_START / HIGHLIGHT_END autour des termes trouvés.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    cache_key = ("search", _current_cache_version(), tuple(terms), limit)
+    results = _cache.get(cache_key)
+    if results is None:
+        results = _fetch_search(terms, limit)
+        _cache.set(cache_key, results)
+    return results
+
+
+def _fetch_search(terms, limit):
+    if STORAGE_MODE == "journal":
+        return _journal().search(terms, limit)
+    with _connect() as conn:
+        _ensure_schema(conn)
+        if _fts_available:
+            match = " ".join(f'"{term}"*' for term in terms)
+            rows = conn.execute(
+                f'''SELECT r.id, r.nom, r.email, r.date, r.statut,
+                          snippet(reclamations_fts, -1, ?, ?, '…', 16) AS extrait
+                   FROM reclamations_fts JOIN reclamations r ON r.rowid = reclamations_fts.rowid
+                   WHERE reclamations_fts MATCH ?
+                   ORDER BY bm25(reclamations_fts, 5.0, 3.0, 1.0)
+                   LIMIT ?''',
+                (HIGHLIGHT_START, HIGHLIGHT_END, match, limit)
+            ).fetchall()
+            return [_row_to_dict(row) for row in rows]
+        # Sans FTS5 : parcours complet, sans classement
+        where = " AND ".join("(nom || ' ' || email || ' ' || description) LIKE ?" for _ in terms)
+        rows = conn.execute(
+            f'SELECT id, nom, email, description, date, statut FROM reclamations WHERE {where} ORDER BY date_ts DESC LIMIT ?',
+            [f"%{term}%" for term in terms] + [limit]
+        ).fetchall()
+        results = []
+        for row in rows:
+            reclamation = _row_to_dict(row)
+            reclamation["extrait"] = highlight_excerpt(reclamation.pop("description"), terms)
+            results.append(reclamation)
+        return results
+
+
+# --- Workflow des statuts ---
+def transition_reclamations(reclamation_ids, new_statut):
+    """Applique une transition de statut à plusieurs réclamations en une seule transaction.
+
+    Seules les réclamations dont le statut actuel autorise la transition sont modifiées ;
+    l'horodatage de la transition est enregistré dans la colonne correspondante.
+    Retourne un dict {'updated': [ids], 'rejected': {id: raison}}.
+    """
+    global _local_writes
+    new_statut = Statut(new_statut)
+    ids = list(dict.fromkeys(reclamation_ids))
+    ts_column = TRANSITION_TS_COLUMNS.get(new_statut)
+    ts = now_ts()
+    try:
+        if STORAGE_MODE == "journal":
+            return _journal().transition(ids, new_statut, ts_column, ts)
+        with _connect() as conn:
+            try:
+                _ensure_schema(conn)
+                conn.execute('BEGIN IMMEDIATE') # Verrou d'écriture pris avant de lire les statuts actuels
+                current = {}
+                for i in range(0, len(ids), MAX_SQL_PARAMS):
+                    chunk = ids[i:i + MAX_SQL_PARAMS]
+                    current.update(conn.execute(
+                        f'SELECT id, statut FROM reclamations WHERE id IN ({", ".join("?" for _ in chunk)})', chunk
+                    ).fetchall())
+                updated, rejected = check_transitions(ids, current, new_statut)
+                if updated:
+                    conn.executemany(
+                        f'UPDATE reclamations SET statut = ?, {ts_column} = ? WHERE id = ?',
+                        [(new_statut.value, ts, rid) for rid in updated]
+                    )
+                conn.commit()
+                return {"updated": updated, "rejected": rejected}
+            except BaseException:
+                conn.rollback()
+                raise
+    finally:
+        with _version_lock:
+            _local_writes += 1
+
+
+def check_transitions(ids, current_statuts, new_statut):
+    """Sépare les ids dont la transition vers 'new_statut' est autorisée de ceux qui ne le sont pas."""
+    updated, rejected = [], {}
+    for rid in ids:
+        if rid not in current_statuts:
+            rejected[rid] = "introuvable"
+            continue
+        current = Statut(normalize_statut(current_statuts[rid]))
+        if new_statut in STATUT_TRANSITIONS[current]:
+            updated.append(rid)
+        else:
+            rejected[rid] = f"transition {current.value} -> {new_statut.value} non autorisée"
+    return updated, rejected
@@ -0,0 +1,365 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from services.logs import get_logger
+from storage.files import file_lock, fsync_dir, try_file_lock
+from storage.reclamations import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SORT_KEY_COLUMNS, check_transitions, fold_text, highlight_excerpt,
+    normalize_statut, sort_keys,
+)
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+SNAPSHOT_FILE = "reclamations.json" # Même format que l'ancien fichier (liste JSON)
+JOURNAL_FILE = "reclamations.journal" # Une réclamation JSON par ligne, en ajout seul
+GROUP_COMMIT_WINDOW = 0.002 # Secondes pendant lesquelles le leader attend d'autres écritures avant le fsync
+COMPACT_INTERVAL = 60 # Secondes entre deux passages du compacteur (0 pour le désactiver)
+COMPACT_MIN_BYTES = 1024 * 1024 # Taille de journal à partir de laquelle on compacte
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class ReclamationJournal:
+    """Stockage fichier des réclamations : snapshot JSON + journal en ajout seul.
+
+    Chaque écriture ajoute une ligne au journal ; les fsync sont regroupés entre
+    écrivains concurrents (group commit). Un compacteur en arrière-plan replie
+    le journal dans le snapshot. Les lecteurs reconstruisent l'état à partir du
+    snapshot puis ne relisent que la fin du journal.
+
+    Plusieurs processus peuvent partager les mêmes fichiers : écritures et lectures
+    prennent un verrou de fichier partagé, la rotation et le remplacement du
+    snapshot un verrou exclusif, et un seul processus compacte à la fois.
+    """
+
+    def __init__(self, snapshot_file=SNAPSHOT_FILE, journal_file=JOURNAL_FILE, compact_interval=COMPACT_INTERVAL):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self.segment_file = journal_file + ".compacting" # Journal gelé en cours de compaction
+        self.compact_interval = compact_interval
+
+        # Écriture + group commit
+        self._write_lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._file = open(journal_file, "a", encoding="utf-8")
+        self._written = 0
+        self._durable = 0
+        self._syncing = False
+
+        # État reconstruit côté lecture
+        self._read_lock = threading.Lock()
+        self._records = {}
+        self._snapshot_sig = None
+        self._journal_inode = None
+        self._offset = 0
+        self.version = 0 # Incrémenté à chaque changement de l'état lu
+        self._sorted_views = {} # colonne -> (clés triées, réclamations), valables pour self._views_version
+        self._views_version = None
+
+        self._transition_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        if compact_interval:
+            threading.Thread(target=self._compact_loop, name="reclamations-compactor", daemon=True).start()
+
+    # --- Écriture ---
+    def append(self, reclamation):
+        """Ajoute une réclamation (ou une mise à jour partielle par 'id') et attend qu'elle soit sur disque."""
+        self.append_many([reclamation])
+
+    def append_many(self, entries):
+        """Ajoute plusieurs lignes en une seule écriture, couvertes par un même fsync."""
+        if not entries:
+            return
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        with self._write_lock, file_lock(self.journal_file, shared=True):
+            self._reopen_if_rotated()
+            self._file.write(data)
+            self._file.flush()
+            self._written += 1
+            seq = self._written
+        self._wait_durable(seq)
+
+    def _reopen_if_rotated(self):
+        # Appelé avec self._write_lock et le verrou de fichier tenus : un autre processus a pu tourner le journal
+        try:
+            current_inode = os.stat(self.journal_file).st_ino
+        except FileNotFoundError:
+            current_inode = None
+        if current_inode != os.fstat(self._file.fileno()).st_ino:
+            os.fsync(self._file.fileno()) # Les lignes déjà écrites dans l'ancien fichier restent durables
+            self._file.close()
+            self._file = open(self.journal_file, "a", encoding="utf-8")
+
+    def _wait_durable(self, seq):
+        with self._sync_cond:
+            while self._durable < seq:
+                if self._syncing:
+                    # Un autre écrivain fait déjà le fsync : on sera couvert par celui-ci ou le suivant
+                    self._sync_cond.wait()
+                    continue
+                self._syncing = True
+                self._sync_cond.release()
+                synced = None
+                try:
+                    time.sleep(GROUP_COMMIT_WINDOW)
+                    with self._write_lock:
+                        target = self._written
+                        # Copie du descripteur : le fichier peut être rouvert (rotation) pendant le fsync
+                        fd = os.dup(self._file.fileno())
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                    synced = target
+                finally:
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    if synced is not None:
+                        self._durable = max(self._durable, synced)
+                    self._sync_cond.notify_all()
+
+    # --- Lecture ---
+    def _apply_line(self, records, raw_line):
+        if not raw_line.strip():
+            return
+        try:
+            entry = json.loads(raw_line.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            logger.warning("Ligne illisible ignorée dans le journal", extra={"file": self.journal_file})
+            return
+        if not isinstance(entry, dict) or not entry.get("id"):
+            return
+        if "statut" in entry:
+            entry["statut"] = normalize_statut(entry["statut"])
+        existing = records.get(entry["id"])
+        if existing is not None:
+            existing.update(entry)
+        else:
+            records[entry["id"]] = entry
+            existing = entry
+        if "date_ts" not in existing or "nom_key" not in existing or "nom" in entry or "date" in entry:
+            existing.update(sort_keys(existing))
+
+    def _replay(self, records, path, offset=0):
+        """Rejoue les lignes complètes de 'path' à partir de 'offset'. Retourne (inode, nouvel offset)."""
+        try:
+            with open(path, "rb") as f:
+                inode = os.fstat(f.fileno()).st_ino
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return None, 0
+        # Une dernière ligne sans '\n' est une écriture en cours (ou interrompue) : on la relira plus tard
+        complete = data[:data.rfind(b"\n") + 1]
+        for raw_line in complete.split(b"\n"):
+            self._apply_line(records, raw_line)
+        return inode, offset + len(complete)
+
+    def _load_snapshot(self):
+        records = {}
+        if os.path.exists(self.snapshot_file) and os.path.getsize(self.snapshot_file) > 0:
+            try:
+                with open(self.snapshot_file, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning("Snapshot illisible", extra={"file": self.snapshot_file, "error": str(e)})
+                snapshot = []
+            for reclamation in snapshot if isinstance(snapshot, list) else []:
+                if isinstance(reclamation, dict) and reclamation.get("id"):
+                    reclamation["statut"] = normalize_statut(reclamation.get("statut"))
+                    if "date_ts" not in reclamation or "nom_key" not in reclamation:
+                        # Snapshot écrit avant l'ajout des clés de tri
+                        reclamation.update(sort_keys(reclamation))
+                    records[reclamation["id"]] = reclamation
+        return records
+
+    def _refresh(self):
+        # Appelé avec self._read_lock tenu
+        with file_lock(self.journal_file, shared=True):
+            return self._refresh_locked()
+
+    def _refresh_locked(self):
+        snapshot_sig = _file_signature(self.snapshot_file)
+        journal_sig = _file_signature(self.journal_file)
+        journal_inode = journal_sig[0] if journal_sig else None
+        if snapshot_sig != self._snapshot_sig or journal_inode != self._journal_inode or (journal_sig and journal_sig[2] < self._offset):
+            # Snapshot remplacé ou journal tourné : reconstruction complète
+            records = self._load_snapshot()
+            self._replay(records, self.segment_file)
+            self._journal_inode, self._offset = self._replay(records, self.journal_file)
+            self._records = records
+            self._snapshot_sig = snapshot_sig
+            self.version += 1
+        elif journal_sig and journal_sig[2] > self._offset:
+            # Seule la fin du journal est nouvelle
+            _, self._offset = self._replay(self._records, self.journal_file, self._offset)
+            self.version += 1
+        return self._records
+
+    def get(self, reclamation_id):
+        with self._read_lock:
+            reclamation = self._refresh().get(reclamation_id)
+            return dict(reclamation) if reclamation else None
+
+    def _sorted_view(self, sort_column):
+        """Vue triée (clés, réclamations) pour une colonne, reconstruite seulement si une réclamation a changé."""
+        key_column = SORT_KEY_COLUMNS[sort_column]
+        with self._read_lock:
+            records = self._refresh()
+            if self._views_version != self.version:
+                self._sorted_views = {}
+                self._views_version = self.version
+            view = self._sorted_views.get(sort_column)
+            if view is None:
+                ordered = sorted(records.values(), key=lambda r: (r[key_column], r["id"]))
+                view = ([(r[key_column], r["id"]) for r in ordered], ordered)
+                self._sorted_views[sort_column] = view
+            return view
+
+    def list_all(self, sort_column="date", descending=False):
+        _, ordered = self._sorted_view(sort_column if sort_column in SORT_KEY_COLUMNS else "date")
+        return [dict(r) for r in (reversed(ordered) if descending else ordered)]
+
+    def page(self, sort_column="date", descending=False, page_size=DEFAULT_PAGE_SIZE, after=None, before=None):
+        """Même contrat que storage.reclamations.list_reclamations_page (curseurs [clé de tri, id])."""
+        if sort_column not in SORT_KEY_COLUMNS:
+            sort_column = "date"
+        page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        keys, ordered = self._sorted_view(sort_column)
+        total = len(keys)
+        after = tuple(after[:2]) if after else None
+        before = tuple(before[:2]) if before and not after else None
+
+        if not descending:
+            if after:
+                start = bisect_right(keys, after)
+                end = min(total, start + page_size)
+                has_previous, has_next = True, end < total
+            elif before:
+                end = bisect_left(keys, before)
+                start = max(0, end - page_size)
+                has_previous, has_next = start > 0, True
+            else:
+                start, end = 0, min(total, page_size)
+                has_previous, has_next = False, end < total
+            window = list(range(start, end))
+        else:
+            if after:
+                end = bisect_left(keys, after)
+                start = max(0, end - page_size)
+                has_previous, has_next = True, start > 0
+            elif before:
+                start = bisect_right(keys, before)
+                end = min(total, start + page_size)
+                has_previous, has_next = end < total, True
+            else:
+                start, end = max(0, total - page_size), total
+                has_previous, has_next = False, start > 0
+            window = list(range(end - 1, start - 1, -1))
+
+        return {
+            "items": [dict(ordered[i]) for i in window],
+            "first": list(keys[window[0]]) if window else None,
+            "last": list(keys[window[-1]]) if window else None,
+            "has_previous": has_previous,
+            "has_next": has_next,
+        }
+
+    def search(self, terms, limit):
+        """Recherche sans index (mode fichier) : tous les termes présents dans nom, email ou description."""
+        results = []
+        with self._read_lock:
+            records = self._refresh()
+            for r in reversed(list(records.values())): # Les plus récentes d'abord
+                haystack = fold_text(f"{r.get('nom', '')} {r.get('email', '')} {r.get('description', '')}")
+                if all(term in haystack for term in terms):
+                    result = {key: r.get(key) for key in ("id", "nom", "email", "date", "statut")}
+                    result["extrait"] = highlight_excerpt(r.get("description", ""), terms)
+                    results.append(result)
+                    if len(results) >= limit:
+                        break
+        return results
+
+    def transition(self, ids, new_statut, ts_column, ts):
+        """Transition de statut groupée : une ligne de mise à jour partielle par réclamation, un seul fsync."""
+        with self._transition_lock:
+            with self._read_lock:
+                records = self._refresh()
+                current = {rid: records[rid].get("statut") for rid in ids if rid in records}
+            updated, rejected = check_transitions(ids, current, new_statut)
+            self.append_many([{"id": rid, "statut": new_statut.value, ts_column: ts} for rid in updated])
+        return {"updated": updated, "rejected": rejected}
+
+    # --- Compaction ---
+    def _rotate(self):
+        """Gèle le journal courant en segment et ouvre un journal vide. Retourne False s'il n'y a rien à compacter."""
+        with self._sync_cond:
+            while self._syncing:
+                self._sync_cond.wait()
+            with self._write_lock, self._read_lock, file_lock(self.journal_file):
+                self._reopen_if_rotated()
+                self._file.flush()
+                if os.fstat(self._file.fileno()).st_size == 0:
+                    return False
+                os.fsync(self._file.fileno())
+                self._durable = self._written
+                self._file.close()
+                os.replace(self.journal_file, self.segment_file)
+                self._file = open(self.journal_file, "a", encoding="utf-8")
+            self._sync_cond.notify_all()
+        return True
+
+    def compact(self):
+        """Replie le journal dans le snapshot. Sûr en cas d'arrêt brutal à n'importe quelle étape."""
+        with self._compact_lock, try_file_lock(self.journal_file + ".compact") as acquired:
+            if not acquired:
+                return False # Un autre processus compacte déjà
+            # Un segment restant provient d'une compaction interrompue : on le replie d'abord
+            if not os.path.exists(self.segment_file) and not self._rotate():
+                return False
+            records = self._load_snapshot()
+            self._replay(records, self.segment_file)
+            tmp_file = self.snapshot_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(list(records.values()), f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._read_lock, file_lock(self.journal_file):
+                os.replace(tmp_file, self.snapshot_file)
+                os.remove(self.segment_file)
+            fsync_dir(self.snapshot_file)
+            logger.info("Journal des réclamations compacté", extra={"count": len(records), "file": self.snapshot_file})
+            return True
+
+    def _compact_loop(self):
+        while True:
+            time.sleep(self.compact_interval)
+            try:
+                journal_sig = _file_signature(self.journal_file)
+                if os.path.exists(self.segment_file) or (journal_sig and journal_sig[2] >= COMPACT_MIN_BYTES):
+                    self.compact()
+            except OSError:
+                logger.exception("Erreur lors de la compaction du journal des réclamations")
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Retourne le journal partagé par le processus (créé au premier appel)."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = ReclamationJournal()
+        return _journal
@@ -0,0 +1,144 @@
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from services.passwords import hash_many
+
+# --- Configuration ---
+IMPORT_BATCH_SIZE = 1000 # Lignes hachées puis insérées par transaction
+EMAIL_REGEX = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$" # Même règle que l'inscription
+VALID_ROLES = ("user", "admin")
+MAX_SQL_PARAMS = 500
+
+
+def iter_user_records(path):
+    """Lit un fichier CSV (en-tête) ou JSONL ligne à ligne. Produit (numéro de ligne, dict)."""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, {"_error": f"JSON invalide ({e.msg})"}
+                    continue
+                yield line_number, record if isinstance(record, dict) else {"_error": "objet JSON attendu"}
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            # Ligne 1 = en-tête : la première donnée est en ligne 2
+            for line_number, record in enumerate(csv.DictReader(f), start=2):
+                yield line_number, record
+
+
+def _field(record, name):
+    # Les valeurs JSON peuvent être des nombres ou null : tout est ramené à une chaîne nettoyée
+    value = record.get(name)
+    return "" if value is None else str(value).strip()
+
+
+def _normalize(record):
+    """Retourne (email, username, role, password, password_hash) ou lève ValueError."""
+    if "_error" in record:
+        raise ValueError(record["_error"])
+    email = _field(record, "email")
+    if not re.match(EMAIL_REGEX, email):
+        raise ValueError("email invalide")
+    full_name = f"{_field(record, 'first_name')} {_field(record, 'last_name')}".strip()
+    username = _field(record, "username") or full_name or email
+    role = _field(record, "role") or "user"
+    if role not in VALID_ROLES:
+        raise ValueError(f"rôle inconnu '{role}'")
+    password = record.get("password")
+    password = str(password) if password not in (None, "") else None # Pas de strip : espaces significatifs
+    password_hash = _field(record, "password_hash") or None # Hash existant (Werkzeug) repris tel quel
+    if not password and not password_hash:
+        raise ValueError("mot de passe manquant")
+    return email, username, role, password, password_hash
+
+
+def _existing_emails(conn, emails):
+    existing = set()
+    for i in range(0, len(emails), MAX_SQL_PARAMS):
+        chunk = emails[i:i + MAX_SQL_PARAMS]
+        existing.update(row[0] for row in conn.execute(
+            f'SELECT email FROM users WHERE email IN ({", ".join("?" for _ in chunk)})', chunk
+        ))
+    return existing
+
+
+def _batches(records, size):
+    batch = []
+    for item in records:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_users(conn, path, workers=None, batch_size=IMPORT_BATCH_SIZE, method=None, report=None, progress=None):
+    """Importe les utilisateurs de 'path' dans la table users.
+
+    Les doublons (dans le fichier ou déjà en base) et les lignes invalides sont
+    signalés via report(numéro de ligne, email, raison) sans interrompre l'import.
+    Les mots de passe sont hachés en parallèle sur 'workers' processus, les
+    insertions sont groupées (executemany, une transaction par lot).
+    progress(compteurs), si fourni, est appelé après chaque lot.
+    Retourne les compteurs {'read', 'inserted', 'duplicates', 'invalid', 'seconds'}.
+    """
+    report = report or (lambda line_number, email, reason: None)
+    workers = workers or os.cpu_count() or 1
+    stats = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+    seen = set() # Emails déjà rencontrés dans le fichier
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in _batches(iter_user_records(path), batch_size):
+            rows = []
+            for line_number, record in batch:
+                stats["read"] += 1
+                try:
+                    email, username, role, password, password_hash = _normalize(record)
+                except ValueError as e:
+                    stats["invalid"] += 1
+                    report(line_number, record.get("email"), str(e))
+                    continue
+                if email in seen:
+                    stats["duplicates"] += 1
+                    report(line_number, email, "doublon dans le fichier")
+                    continue
+                seen.add(email)
+                rows.append([line_number, email, username, role, password, password_hash])
+
+            # Les comptes déjà en base sont écartés avant le hachage (le plus coûteux)
+            existing = _existing_emails(conn, [row[1] for row in rows])
+            for row in rows:
+                if row[1] in existing:
+                    stats["duplicates"] += 1
+                    report(row[0], row[1], "email déjà présent en base")
+            rows = [row for row in rows if row[1] not in existing]
+
+            to_hash = [row for row in rows if not row[5]]
+            for row, password_hash in zip(to_hash, hash_many(executor, [row[4] for row in to_hash], workers, method)):
+                row[5] = password_hash
+
+            before = conn.total_changes
+            # OR IGNORE : un compte créé entre-temps (inscription concurrente) ne fait pas échouer le lot
+            conn.executemany(
+                'INSERT OR IGNORE INTO users (email, username, password_hash, role) VALUES (?, ?, ?, ?)',
+                [(row[1], row[2], row[5], row[3]) for row in rows]
+            )
+            conn.commit()
+            inserted = conn.total_changes - before
+            stats["inserted"] += inserted
+            if inserted < len(rows):
+                stats["duplicates"] += len(rows) - inserted
+                report(None, None, f"{len(rows) - inserted} compte(s) créé(s) entre-temps, ignoré(s)")
+            if progress:
+                progress(dict(stats, seconds=time.perf_counter() - start))
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
@@ -0,0 +1,173 @@
+import sqlite3
+
+from services.logs import get_logger
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+SEARCH_FIELDS = ("email", "username")
+SEARCH_MODES = ("prefix", "contains") # "commence par" (index NOCASE) / "contient" (index trigramme)
+DEFAULT_SEARCH_PAGE_SIZE = 25
+MAX_SEARCH_PAGE_SIZE = 100
+MIN_CONTAINS_LENGTH = 3 # Un trigramme : en dessous, l'index ne peut pas servir
+# Comptages par rôle arrêtés à cette valeur ("1000+") : un terme très courant ne doit pas parcourir
+# toute la table à chaque recherche
+SEARCH_COUNT_LIMIT = 1000
+# Rôle filtré comptant moins de comptes que ceci (ex. admins) : on parcourt ces comptes plutôt que
+# toutes les correspondances trigrammes d'un terme courant
+SELECTIVE_ROLE_LIMIT = 10000
+_PREFIX_UPPER = chr(0x10FFFF) # Après tout caractère : borne haute de la plage "commence par"
+
+
+def _has_trigram_index(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'users_search'").fetchone() is not None
+
+
+def _role_is_selective(conn, role):
+    # Comptage borné sur idx_users_role : quelques millisecondes au plus
+    row = conn.execute('SELECT COUNT(*) FROM (SELECT 1 FROM users WHERE role = ? LIMIT ?)', (role, SELECTIVE_ROLE_LIMIT)).fetchone()
+    return row[0] < SELECTIVE_ROLE_LIMIT
+
+
+def _fts_phrase(text):
+    # Chaîne FTS5 entre guillemets : aucun caractère n'y est interprété comme opérateur
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _role_clause(column, selective):
+    # Rôle courant : le "+" empêche SQLite de parcourir idx_users_role (presque toute la table)
+    # au lieu de l'index de recherche
+    return f' AND {column} = ?' if selective else f' AND +{column} = ?'
+
+
+def _prefix_query(field, query, role, after, limit, selective=False):
+    # Plage [préfixe, préfixe + U+10FFFF[ sur l'index NOCASE du champ, reprise après le dernier
+    # (valeur, id) affiché : chaque page est une simple lecture d'index, quelle que soit sa position
+    sql = f'SELECT id, username, email, role FROM users WHERE {field} < ? COLLATE NOCASE'
+    params = [query + _PREFIX_UPPER]
+    # Borne basse explicite (en plus de la comparaison de tuples) : l'index démarre au curseur
+    sql += f' AND {field} >= ? COLLATE NOCASE'
+    params.append(after[0] if after else query)
+    if after:
+        sql += f' AND ({field} COLLATE NOCASE, id) > (?, ?)'
+        params += [after[0], after[1]]
+    if role:
+        sql += _role_clause('role', selective)
+        params.append(role)
+    sql += f' ORDER BY {field} COLLATE NOCASE, id LIMIT ?'
+    params.append(limit)
+    return sql, params
+
+
+def _prefix_count_query(field, query, role, selective=False):
+    sql = f'SELECT role FROM users WHERE {field} >= ? COLLATE NOCASE AND {field} < ? COLLATE NOCASE'
+    params = [query, query + _PREFIX_UPPER]
+    if role:
+        sql += _role_clause('role', selective)
+        params.append(role)
+    return sql, params
+
+
+def _contains_query(field, query, role, after, limit, use_index, selective=False):
+    # Index trigramme (FTS5) : sous-chaîne insensible à la casse, résultats dans l'ordre des id
+    if use_index:
+        sql = ('SELECT u.id, u.username, u.email, u.role FROM users_search s JOIN users u ON u.id = s.rowid '
+               'WHERE users_search MATCH ?')
+        params = [f'{field} : {_fts_phrase(query)}']
+        id_column = 's.rowid'
+    else:
+        # Rôle peu fréquent (parcours de ses seuls comptes), ou SQLite sans FTS5 trigram (< 3.34) :
+        # parcours de la table, correct mais lent sur un terme courant
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        sql = f"SELECT u.id, u.username, u.email, u.role FROM users u WHERE u.{field} LIKE ? ESCAPE '\\'"
+        params = [f'%{escaped}%']
+        id_column = 'u.id'
+    if after:
+        sql += f' AND {id_column} > ?'
+        params.append(after[1])
+    if role:
+        sql += _role_clause('u.role', selective)
+        params.append(role)
+    if limit is not None:
+        sql += f' ORDER BY {id_column} LIMIT ?'
+        params.append(limit)
+    return sql, params
+
+
+def search_users(conn, query, field="email", mode="prefix", role=None, after=None, page_size=DEFAULT_SEARCH_PAGE_SIZE):
+    """Recherche de comptes par début ("prefix") ou partie ("contains") de l'email ou du nom d'utilisateur.
+
+    Pagination par curseur : 'after' est le curseur 'next' de la page précédente.
+    Retourne {'items', 'next', 'counts': {rôle: nombre}, 'total', 'total_is_exact'} ;
+    les comptages s'arrêtent à SEARCH_COUNT_LIMIT (total_is_exact=False au-delà).
+    Lève ValueError si la recherche est invalide (champ, mode, terme trop court).
+    """
+    query = (query or "").strip()
+    if field not in SEARCH_FIELDS:
+        raise ValueError(f"Champ de recherche inconnu : {field}")
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Mode de recherche inconnu : {mode}")
+    if not query:
+        raise ValueError("Terme de recherche vide.")
+    if mode == "contains" and len(query) < MIN_CONTAINS_LENGTH:
+        raise ValueError(f"La recherche « contient » demande au moins {MIN_CONTAINS_LENGTH} caractères.")
+    page_size = max(1, min(int(page_size), MAX_SEARCH_PAGE_SIZE))
+
+    selective = bool(role) and _role_is_selective(conn, role)
+    if mode == "prefix":
+        sql, params = _prefix_query(field, query, role, after, page_size + 1, selective)
+        count_sql, count_params = _prefix_count_query(field, query, role, selective)
+    else:
+        use_index = _has_trigram_index(conn) and not selective
+        sql, params = _contains_query(field, query, role, after, page_size + 1, use_index, selective)
+        count_sql, count_params = _contains_query(field, query, role, None, None, use_index, selective)
+
+    rows = conn.execute(sql, params).fetchall()
+    items = [dict(row) for row in rows[:page_size]]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = items[-1]
+        next_cursor = [last[field], last["id"]]
+
+    # Comptage borné : seules les SEARCH_COUNT_LIMIT + 1 premières correspondances sont lues
+    counts = {}
+    for row in conn.execute(f'SELECT role, COUNT(*) AS n FROM ({count_sql} LIMIT ?) GROUP BY role',
+                            count_params + [SEARCH_COUNT_LIMIT + 1]):
+        counts[row["role"]] = row["n"]
+    total = sum(counts.values())
+    total_is_exact = total <= SEARCH_COUNT_LIMIT
+    if not total_is_exact:
+        total = SEARCH_COUNT_LIMIT
+    return {"items": items, "next": next_cursor, "counts": counts, "total": total, "total_is_exact": total_is_exact}
+
+
+def create_search_index(conn):
+    """Index trigramme FTS5 sur email et username, tenu à jour par triggers (migration)."""
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS users_search USING fts5(
+                email, username, content='users', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # FTS5 ou tokenizer trigram absent : la recherche "contient" parcourt la table
+        logger.warning("Index trigramme des comptes indisponible", extra={"error": str(e)})
+        return False
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_search_ai AFTER INSERT ON users BEGIN
+            INSERT INTO users_search(rowid, email, username) VALUES (new.id, new.email, new.username);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_search_ad AFTER DELETE ON users BEGIN
+            INSERT INTO users_search(users_search, rowid, email, username) VALUES ('delete', old.id, old.email, old.username);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_search_au AFTER UPDATE OF email, username ON users BEGIN
+            INSERT INTO users_search(users_search, rowid, email, username) VALUES ('delete', old.id, old.email, old.username);
+            INSERT INTO users_search(rowid, email, username) VALUES (new.id, new.email, new.username);
+        END
+    ''')
+    conn.execute("INSERT INTO users_search(users_search) VALUES ('rebuild')") # Comptes déjà présents
+    return True
@@ -0,0 +1,79 @@
+import os
+import threading
+
+from storage.cache import LRUCache
+from storage.files import atomic_write_json
+
+# --- Configuration ---
+USER_CACHE_TTL = float(os.environ.get("CIRACBOT_USER_CACHE_TTL", "60")) # Secondes
+USER_CACHE_MAX_ENTRIES = 10000
+# Touché à chaque invalidation : les autres workers voient le changement au prochain accès
+USER_CACHE_STAMP_FILE = "ciracbot.users.stamp"
+USER_CACHE_STAMP_MAX_BYTES = 64 * 1024
+
+USER_CACHE_FIELDS = ("id", "email", "role", "username") # Jamais le hash du mot de passe
+
+_user_cache = LRUCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL)
+_stamp = None
+_generation = 0 # Incrémenté à chaque vidage du cache
+_stamp_lock = threading.Lock()
+
+
+def _stamp_signature():
+    try:
+        st = os.stat(USER_CACHE_STAMP_FILE)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _check_stamp():
+    # Un os.stat par lecture : bien moins cher qu'une requête, et suffit à voir les invalidations des autres processus
+    global _stamp, _generation
+    signature = _stamp_signature()
+    with _stamp_lock:
+        if signature != _stamp:
+            _user_cache.clear()
+            _stamp = signature
+            _generation += 1
+        return _generation
+
+
+def get_cached_user(user_id, loader):
+    """Retourne le dict utilisateur (id, email, role, username) pour 'user_id', ou None.
+
+    'loader(user_id)' n'est appelé qu'en cas d'absence ou d'expiration (TTL) dans le cache.
+    Les utilisateurs introuvables ne sont pas mis en cache.
+    """
+    generation = _check_stamp()
+    key = str(user_id)
+    user = _user_cache.get(key)
+    if user is None:
+        row = loader(user_id)
+        if row is None:
+            return None
+        user = {field: row[field] for field in USER_CACHE_FIELDS}
+        # Une invalidation pendant la lecture : la ligne lue est peut-être déjà périmée, on ne la garde pas
+        if _check_stamp() == generation:
+            _user_cache.set(key, user)
+    return user
+
+
+def invalidate_user(user_id):
+    """À appeler après toute modification ou suppression d'un utilisateur (tous les workers sont prévenus)."""
+    global _stamp
+    _user_cache.pop(str(user_id))
+    with _stamp_lock:
+        if _stamp_signature() is not None and os.path.getsize(USER_CACHE_STAMP_FILE) > USER_CACHE_STAMP_MAX_BYTES:
+            # Remplacement par un nouveau fichier (nouvel inode) : la signature change quand même
+            atomic_write_json(USER_CACHE_STAMP_FILE, [str(user_id)])
+        else:
+            # Ajout seul : la taille change à chaque appel, même si le mtime ne bouge pas
+            with open(USER_CACHE_STAMP_FILE, "a", encoding="utf-8") as f:
+                f.write(f"{user_id}\n")
+        _stamp = None # Force le vidage local au prochain accès (comme dans les autres workers)
+
+
+def user_cache_stats():
+    """Compteurs du cache utilisateurs (hits, misses, évictions, taux de hit)."""
+    return _user_cache.stats()
@@ -0,0 +1,111 @@
+"""Test de charge des écritures concurrentes (réclamations, notes, préférences).
+
+Lance plusieurs processus qui écrivent en même temps dans un dossier temporaire,
+puis vérifie qu'aucune écriture n'a été perdue. Code de sortie 1 en cas de perte.
+
+    python stress_writes.py --workers 8 --writes 200
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def worker(worker_id, writes, storage_mode, barrier):
+    os.environ["RECLAMATIONS_STORAGE"] = storage_mode
+    os.environ.setdefault("CIRACBOT_LOG_LEVEL", "WARNING") # Pas de ligne de log par écriture
+    sys.path.insert(0, REPO_DIR)
+    import app # noqa: F401 (enregistre les pages Dash)
+    import storage.reclamations_journal as reclamations_journal
+    from pages.accueil import save_rating
+    from pages.parametres import update_preference
+    from storage.reclamations import add_reclamation
+
+    # Compactions fréquentes pour les faire se croiser avec les écritures des autres processus
+    reclamations_journal.COMPACT_INTERVAL = 0.05
+    reclamations_journal.COMPACT_MIN_BYTES = 0
+
+    barrier.wait()
+    for i in range(writes):
+        add_reclamation({
+            "id": str(uuid.uuid4()),
+            "nom": f"Stress {worker_id}-{i}",
+            "email": f"stress{worker_id}@example.com",
+            "description": "Réclamation générée par stress_writes.py",
+            "date": time.strftime("%d/%m/%Y %H:%M"),
+            "statut": "En attente",
+        })
+        save_rating(1 + i % 5)
+        update_preference(f"stress_{worker_id}", i)
+
+
+def count_results(storage_mode):
+    os.environ["RECLAMATIONS_STORAGE"] = storage_mode
+    sys.path.insert(0, REPO_DIR)
+    import app # noqa: F401
+    import storage.reclamations as reclamations
+    from pages.parametres import load_preferences
+    from storage.files import get_json_writer
+
+    return {
+        "reclamations": len(reclamations.list_reclamations()),
+        "ratings": len(get_json_writer("conversation_ratings.json", list).read()),
+        "preferences": {key: value for key, value in load_preferences().items() if key.startswith("stress_")},
+    }
+
+
+def run(storage_mode, workers, writes):
+    workdir = tempfile.mkdtemp(prefix="ciracbot-stress-")
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    try:
+        barrier = multiprocessing.Barrier(workers)
+        processes = [multiprocessing.Process(target=worker, args=(w, writes, storage_mode, barrier)) for w in range(workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        if any(process.exitcode != 0 for process in processes):
+            print(f"[{storage_mode}] Un worker a échoué.")
+            return False
+
+        with multiprocessing.Pool(1) as pool: # Lecture dans un processus neuf (aucun cache)
+            results = pool.apply(count_results, (storage_mode,))
+        expected = workers * writes
+        expected_preferences = {f"stress_{w}": writes - 1 for w in range(workers)}
+        ok = (
+            results["reclamations"] == expected
+            and results["ratings"] == expected
+            and results["preferences"] == expected_preferences
+        )
+        print(
+            f"[{storage_mode}] {workers} workers x {writes} écritures en {elapsed:.2f}s "
+            f"({3 * expected / elapsed:.0f} écritures/s) : "
+            f"réclamations {results['reclamations']}/{expected}, notes {results['ratings']}/{expected}, "
+            f"préférences {'OK' if results['preferences'] == expected_preferences else results['preferences']} "
+            f"-> {'OK' if ok else 'PERTE DÉTECTÉE'}"
+        )
+        return ok
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=100, help="Écritures de chaque type par worker")
+    parser.add_argument("--storage", choices=["sqlite", "journal", "all"], default="all")
+    args = parser.parse_args()
+
+    modes = ["sqlite", "journal"] if args.storage == "all" else [args.storage]
+    all_ok = all([run(mode, args.workers, args.writes) for mode in modes])
+    sys.exit(0 if all_ok else 1)
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+from flask_login import login_user
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.environ.setdefault("CIRACBOT_LOG_LEVEL", "WARNING")
+os.environ.setdefault("CIRACBOT_FAQ_FILE", os.path.join(REPO_DIR, "faq.json"))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Répertoire de travail vide : ciracbot.db et fichiers JSON créés à neuf pour le test."""
+    from storage.db import get_pool
+
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    get_pool(os.path.join(tmp_path, "ciracbot.db")).close_all()
+
+
+@pytest.fixture
+def app_module(workdir, monkeypatch):
+    """Module app avec un schéma à (re)vérifier et un limiteur de tentatives neuf."""
+    import app
+    import services.ratelimit
+
+    monkeypatch.setattr(app, "_schema_ready", False)
+    monkeypatch.setattr(services.ratelimit, "_limiter", None)
+    app.server.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def as_user(app_module):
+    """Requête Flask avec un utilisateur connecté du rôle donné."""
+    contexts = []
+
+    def login(role):
+        context = app_module.server.test_request_context("/_dash-update-component", method="POST")
+        context.push()
+        contexts.append(context)
+        login_user(app_module.User(user_id=1, email="agent@example.com", role=role, username="Agent"))
+
+    yield login
+    for context in reversed(contexts):
+        context.pop()
@@ -0,0 +1,43 @@
+import pytest
+
+
+@pytest.fixture
+def agent(app_module):
+    import pages.agent as agent
+    return agent
+
+
+def _alert_text(component):
+    return str(component.children)
+
+
+def test_bulk_transition_refused_for_non_admin(agent, as_user, monkeypatch):
+    calls = []
+    monkeypatch.setattr(agent, "transition_reclamations", lambda *args: calls.append(args))
+    as_user("user")
+
+    feedback, refresh = agent.apply_bulk_transition(1, "En cours", [True], [{"type": "select-reclamation", "index": "REC-0001"}], 0)
+
+    assert calls == []
+    assert "administrateurs" in _alert_text(feedback)
+    assert refresh is agent.no_update
+
+
+def test_searches_refused_for_non_admin(agent, as_user, monkeypatch):
+    monkeypatch.setattr(agent, "search_reclamations", lambda *args: pytest.fail("recherche exécutée"))
+    monkeypatch.setattr(agent, "search_client_accounts", lambda *args: pytest.fail("recherche exécutée"))
+    as_user("user")
+
+    assert "administrateurs" in _alert_text(agent.search_reclamations_callback(1, None, "prélèvement"))
+    results = agent.search_client_account(1, None, None, None, "dupont", "email", "prefix", "", None)
+    assert "administrateurs" in _alert_text(results[0])
+
+
+def test_bulk_transition_allowed_for_admin(agent, as_user, monkeypatch):
+    monkeypatch.setattr(agent, "transition_reclamations", lambda ids, statut: {"updated": list(ids), "rejected": {}})
+    as_user("admin")
+
+    feedback, refresh = agent.apply_bulk_transition(1, "En cours", [True], [{"type": "select-reclamation", "index": "REC-0001"}], 0)
+
+    assert feedback.color == "success"
+    assert refresh == 1
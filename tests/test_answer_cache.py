@@ -0,0 +1,32 @@
+from services.answer_cache import AnswerCache
+from services.responses import Reply, ResponseEngine
+
+
+class CountingEngine(ResponseEngine):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def reply(self, message):
+        self.calls += 1
+        return Reply(f"réponse {self.calls}", "test", 1.0)
+
+
+def test_normalized_questions_share_one_entry():
+    cache, engine = AnswerCache(), CountingEngine()
+
+    first = cache.reply(engine, "Solde ?")
+    assert cache.reply(engine, "  SOLDE !") is first
+    assert cache.reply(engine, "solde") is first
+    assert engine.calls == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_engine_version_change_invalidates():
+    cache, engine = AnswerCache(), CountingEngine()
+    cache.reply(engine, "solde")
+
+    engine.version += 1 # FAQ rechargée
+    assert cache.reply(engine, "solde").text == "réponse 2"
+    assert cache.stats()["invalidations"] == 1
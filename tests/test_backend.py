@@ -0,0 +1,119 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from services.backend import BACKEND_FALLBACK_RESPONSE, BackendClient, BackendEngine, CircuitBreaker
+
+STUB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend_stub.py")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def backend_stub():
+    """Lance backend_stub.py avec les options données ; retourne l'URL de /reply."""
+    processes = []
+
+    def start(delay=0.0, fail_rate=0.0):
+        port = _free_port()
+        process = subprocess.Popen(
+            [sys.executable, STUB, "--port", str(port), "--delay", str(delay), "--jitter", "0", "--fail-rate", str(fail_rate)],
+            stdout=subprocess.DEVNULL,
+        )
+        processes.append(process)
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                return f"http://127.0.0.1:{port}/reply"
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("backend_stub.py n'a pas démarré")
+                time.sleep(0.05)
+
+    yield start
+    for process in processes:
+        process.terminate()
+        process.wait(5)
+
+
+def test_answer_from_backend(backend_stub):
+    client = BackendClient(backend_stub(), timeout=2, max_concurrency=2, breaker=CircuitBreaker(failures=2, reset_timeout=30))
+
+    reply = BackendEngine(client).reply("Comment consulter mon solde ?")
+
+    assert reply.text != BACKEND_FALLBACK_RESPONSE
+    assert reply.cacheable
+    assert client.stats()["successes"] == 1
+
+
+def test_timeout_returns_fallback(backend_stub):
+    client = BackendClient(backend_stub(delay=1.0), timeout=0.2, max_concurrency=2, breaker=CircuitBreaker(failures=5, reset_timeout=30))
+
+    start = time.perf_counter()
+    reply = BackendEngine(client).reply("solde")
+
+    assert time.perf_counter() - start < 0.9 # Thread libéré au délai, sans attendre la réponse du service
+    assert reply.text == BACKEND_FALLBACK_RESPONSE
+    assert not reply.cacheable
+    assert client.stats()["timeouts"] == 1
+
+
+def test_breaker_opens_after_failures(backend_stub):
+    client = BackendClient(backend_stub(fail_rate=1.0), timeout=2, max_concurrency=2, breaker=CircuitBreaker(failures=2, reset_timeout=30))
+
+    assert client.ask("solde") is None
+    assert client.ask("solde") is None
+    assert client.breaker.state == "open"
+    assert client.ask("solde") is None # Plus d'appel au service : repli immédiat
+
+    stats = client.stats()
+    assert stats["failures"] == 2
+    assert stats["short_circuited"] == 1
+
+
+def test_slow_calls_open_breaker(backend_stub):
+    breaker = CircuitBreaker(failures=2, reset_timeout=30, slow_call=0.1)
+    client = BackendClient(backend_stub(delay=0.3), timeout=2, max_concurrency=2, breaker=breaker)
+
+    # Réponses reçues sous le délai maximal, mais trop lentes : le disjoncteur s'ouvre quand même
+    assert client.ask("solde") is not None
+    assert client.ask("solde") is not None
+    assert breaker.state == "open"
+    assert BackendEngine(client).reply("solde").text == BACKEND_FALLBACK_RESPONSE
+
+    stats = client.stats()
+    assert stats["slow"] == 2
+    assert stats["short_circuited"] == 1
+
+
+def test_half_open_trial_closes_breaker(backend_stub):
+    breaker = CircuitBreaker(failures=1, reset_timeout=0.2)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    client = BackendClient(backend_stub(), timeout=2, max_concurrency=2, breaker=breaker)
+
+    time.sleep(0.25)
+    assert breaker.state == "half-open"
+    assert client.ask("solde") is not None
+    assert breaker.state == "closed"
+
+
+def test_busy_when_all_slots_taken(backend_stub):
+    client = BackendClient(backend_stub(delay=0.5), timeout=2, max_concurrency=1, breaker=CircuitBreaker(failures=5, reset_timeout=30))
+    first = threading.Thread(target=client.ask, args=("solde",))
+    first.start()
+    time.sleep(0.1)
+
+    assert client.ask("solde") is None # Seul créneau occupé : repli immédiat, pas de file d'attente
+    first.join()
+    assert client.stats()["busy"] == 1
@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.fixture
+def accueil(app_module, as_user, monkeypatch):
+    import pages.accueil as accueil
+    from storage.chat import save_messages
+
+    as_user("user")
+    app_module.ensure_schema()
+    monkeypatch.setattr(accueil, "CHAT_HISTORY_MAX_MESSAGES", 30)
+    for i in range(30): # 60 messages enregistrés, deux pages de 20 au-delà de la dernière
+        save_messages(1, [("user", f"question {i}"), ("bot", f"réponse {i}")])
+    return accueil
+
+
+def test_load_older_stops_at_history_cap(accueil):
+    history, cursor = accueil.load_history()
+    assert len(history) == 20
+
+    children, count, cursor, style = accueil.load_older_messages(1, cursor, len(history))
+    assert count == 30 # 10 messages seulement : la fenêtre est pleine
+    assert len(children._operations) == 10
+    assert style == {'display': 'none'}
+
+    # Bouton masqué, mais un appel direct ne dépasse pas non plus le plafond
+    children, count, _, style = accueil.load_older_messages(2, cursor, count)
+    assert children is accueil.dash.no_update
+    assert count is accueil.dash.no_update
+    assert style == {'display': 'none'}
+
+
+def test_load_older_keeps_button_below_cap(accueil, monkeypatch):
+    monkeypatch.setattr(accueil, "CHAT_HISTORY_MAX_MESSAGES", 200)
+    history, cursor = accueil.load_history()
+
+    _, count, cursor, style = accueil.load_older_messages(1, cursor, len(history))
+    assert count == 40
+    assert cursor is not None
+    assert style == {}
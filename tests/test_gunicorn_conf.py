@@ -0,0 +1,27 @@
+import os
+import runpy
+
+CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+def test_pool_raised_to_two_connections_per_thread(monkeypatch):
+    monkeypatch.setenv("CIRACBOT_THREADS", "8")
+    monkeypatch.setenv("CIRACBOT_DB_POOL_SIZE", "8")
+    monkeypatch.setenv("CIRACBOT_HASH_WORKERS", "1")
+    monkeypatch.setenv("CIRACBOT_BACKEND_MAX_CONCURRENCY", "1")
+
+    conf = runpy.run_path(CONF)
+
+    assert conf["threads"] == 8
+    assert os.environ["CIRACBOT_DB_POOL_SIZE"] == "16"
+
+
+def test_larger_configured_pool_kept(monkeypatch):
+    monkeypatch.setenv("CIRACBOT_THREADS", "4")
+    monkeypatch.setenv("CIRACBOT_DB_POOL_SIZE", "20")
+    monkeypatch.setenv("CIRACBOT_HASH_WORKERS", "1")
+    monkeypatch.setenv("CIRACBOT_BACKEND_MAX_CONCURRENCY", "1")
+
+    runpy.run_path(CONF)
+
+    assert os.environ["CIRACBOT_DB_POOL_SIZE"] == "20"
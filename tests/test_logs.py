@@ -0,0 +1,24 @@
+import logging
+import queue
+import threading
+
+from services.logs import NonBlockingQueueHandler, dropped_messages
+
+
+def test_dropped_messages_counted_across_threads():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.queue.put_nowait(None) # File pleine : chaque message suivant est abandonné
+    record = logging.makeLogRecord({"msg": "test"})
+    before = dropped_messages()
+
+    def log_many():
+        for _ in range(2000):
+            handler.enqueue(record)
+
+    threads = [threading.Thread(target=log_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert dropped_messages() - before == 8 * 2000
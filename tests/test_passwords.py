@@ -0,0 +1,19 @@
+from werkzeug.security import generate_password_hash
+
+from services.passwords import hash_needs_update
+
+
+def test_short_method_name_matches_full_prefix():
+    stored = generate_password_hash("secret", method="scrypt")
+
+    assert stored.startswith("scrypt:32768:8:1$")
+    assert not hash_needs_update(stored, "scrypt")
+    assert not hash_needs_update(stored, "scrypt:32768:8:1")
+
+
+def test_other_parameters_need_update():
+    stored = generate_password_hash("secret", method="pbkdf2:sha256:1000")
+
+    assert hash_needs_update(stored, "scrypt")
+    assert hash_needs_update(stored, "pbkdf2:sha256:2000")
+    assert not hash_needs_update(stored, "pbkdf2:sha256:1000")
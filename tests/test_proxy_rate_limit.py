@@ -0,0 +1,24 @@
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+
+def _register(client, forwarded_for):
+    # Formulaire incomplet : refusé après le limiteur, sans hachage ni écriture
+    return client.post("/register", data={"email": "x@example.com"}, headers={"X-Forwarded-For": forwarded_for},
+                       environ_base={"REMOTE_ADDR": "10.0.0.1"}) # Adresse du proxy
+
+
+def test_rate_limit_keyed_on_forwarded_client(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.server, "wsgi_app", ProxyFix(app_module.server.wsgi_app, x_for=1))
+    client = app_module.server.test_client()
+
+    statuses = [_register(client, "203.0.113.5").status_code for _ in range(6)]
+    assert statuses[-1] == 429 # register_ip : 5 tentatives par adresse client
+    assert 429 not in statuses[:-1]
+    assert _register(client, "203.0.113.6").status_code != 429 # Autre client derrière le même proxy
+
+
+def test_forwarded_header_ignored_without_proxy(app_module):
+    client = app_module.server.test_client()
+
+    statuses = [_register(client, f"203.0.113.{i}").status_code for i in range(6)]
+    assert statuses[-1] == 429 # En-tête non fiable : une seule adresse, celle de la connexion
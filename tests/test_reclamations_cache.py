@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+RECLAMATION = {
+    "id": "REC-0001",
+    "nom": "Jeanne Martin",
+    "email": "jeanne.martin@example.com",
+    "description": "Prélèvement débité deux fois",
+    "date": "02/03/2024 10:15",
+    "statut": "En attente",
+}
+
+
+@pytest.fixture
+def reclamations(workdir, monkeypatch):
+    import storage.reclamations as reclamations
+
+    monkeypatch.setattr(reclamations, "STORAGE_MODE", "sqlite")
+    monkeypatch.setattr(reclamations, "_schema_ready", False)
+    reclamations._cache.clear()
+    reclamations.add_reclamation(RECLAMATION)
+    return reclamations
+
+
+def _hits(reclamations):
+    return reclamations.cache_stats()["hits"]
+
+
+def test_unrelated_writes_keep_cache(reclamations, workdir):
+    assert reclamations.get_reclamation("REC-0001")["nom"] == "Jeanne Martin"
+    version = reclamations.store_version()
+
+    # Écriture d'un autre processus dans une autre table de la même base (même WAL)
+    conn = sqlite3.connect(workdir / "ciracbot.db")
+    conn.execute("CREATE TABLE IF NOT EXISTS autre (x INTEGER)")
+    conn.execute("INSERT INTO autre (x) VALUES (1)")
+    conn.commit()
+    conn.close()
+
+    hits = _hits(reclamations)
+    assert reclamations.store_version() == version
+    assert reclamations.get_reclamation("REC-0001")["nom"] == "Jeanne Martin"
+    assert _hits(reclamations) == hits + 1
+
+
+def test_complaint_write_from_other_process_invalidates(reclamations, workdir):
+    assert reclamations.get_reclamation("REC-0001")["statut"] == "En attente"
+
+    conn = sqlite3.connect(workdir / "ciracbot.db")
+    conn.execute("UPDATE reclamations SET statut = 'En cours' WHERE id = 'REC-0001'")
+    conn.commit()
+    conn.close()
+
+    assert reclamations.get_reclamation("REC-0001")["statut"] == "En cours"
+
+
+def test_local_transition_invalidates(reclamations):
+    assert reclamations.get_reclamation("REC-0001")["statut"] == "En attente"
+    result = reclamations.transition_reclamations(["REC-0001"], "En cours")
+
+    assert result["updated"] == ["REC-0001"]
+    assert reclamations.get_reclamation("REC-0001")["statut"] == "En cours"
@@ -0,0 +1,48 @@
+import sqlite3
+
+# Table 'users' telle que créée avant les migrations (sans colonne age)
+LEGACY_USERS_TABLE = """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        username TEXT NOT NULL,
+        password_hash TEXT NOT NULL,
+        role TEXT NOT NULL DEFAULT 'user' CHECK(role IN ('user', 'admin'))
+    )
+"""
+
+FORM = {
+    "first_name": "Jeanne",
+    "last_name": "Martin",
+    "email": "jeanne.martin@example.com",
+    "age": "34",
+    "password": "motdepasse-solide-42",
+    "confirm_password": "motdepasse-solide-42",
+}
+
+
+def test_register_on_unmigrated_database(app_module, workdir):
+    conn = sqlite3.connect(workdir / "ciracbot.db")
+    conn.execute(LEGACY_USERS_TABLE)
+    conn.commit()
+    conn.close()
+
+    response = app_module.server.test_client().post("/register", data=FORM)
+
+    assert response.status_code == 302
+    conn = sqlite3.connect(workdir / "ciracbot.db")
+    row = conn.execute("SELECT username, age, role FROM users WHERE email = ?", (FORM["email"],)).fetchone()
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert row == ("Jeanne Martin", 34, "user")
+    assert {"conversations", "chat_messages"} <= tables
+
+
+def test_register_on_empty_database(app_module, workdir):
+    response = app_module.server.test_client().post("/register", data=FORM)
+
+    assert response.status_code == 302
+    conn = sqlite3.connect(workdir / "ciracbot.db")
+    row = conn.execute("SELECT age FROM users WHERE email = ?", (FORM["email"],)).fetchone()
+    conn.close()
+    assert row == (34,)
@@ -0,0 +1,67 @@
+"""Point d'entrée de production : serveur WSGI pré-fork (gunicorn) sur l'objet Flask 'server' d'app.py.
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+    python wsgi.py                  # équivalent, mêmes réglages
+
+Le processus maître importe l'application (toutes les pages Dash enregistrées),
+applique les migrations, construit l'index du moteur de réponse et sert une
+première fois les ressources Dash avant de forker : les workers partagent ce
+travail en copie sur écriture. Chaque worker
+ouvre ensuite ses connexions SQLite et démarre son pool de hachage avant
+d'accepter des requêtes. Réglages par variables d'environnement : voir
+gunicorn.conf.py.
+"""
+import os
+
+from app import app, server, ensure_schema, DATABASE # noqa: F401 (importe et enregistre toutes les pages Dash)
+from services.logs import get_logger
+from services.passwords import get_hasher
+from services.responses import get_engine
+from services.ratelimit import get_limiter
+from storage.db import get_pool
+from storage.reclamations import list_reclamations_page, DEFAULT_PAGE_SIZE, STORAGE_MODE
+
+logger = get_logger(__name__)
+
+# URL servies une fois avant le fork : initialisation de Dash au premier appel (assets, validation
+# du layout, callbacks), gabarits et rendu JSON, hors de toute requête utilisateur
+WARM_UP_URLS = ("/", "/_dash-layout", "/_dash-dependencies")
+
+
+def warm_up_app():
+    """Dans le maître, avant le fork : schéma à jour, Dash initialisé, caches partagés remplis."""
+    with server.app_context():
+        ensure_schema() # Migrations appliquées une seule fois, pas par chaque worker au démarrage
+    client = server.test_client()
+    for url in WARM_UP_URLS:
+        response = client.get(url)
+        if response.status_code >= 400:
+            logger.warning("Warm-up request failed", extra={"url": url, "status": response.status_code})
+    get_engine() # Index de la FAQ construit une fois, partagé par les workers
+    if STORAGE_MODE == "sqlite":
+        # Pas en mode journal : le journal ouvre un fichier et lance un thread, à créer après le fork
+        try:
+            list_reclamations_page("date", descending=False, page_size=DEFAULT_PAGE_SIZE) # Page par défaut de l'interface agent
+        except Exception:
+            logger.exception("Warm-up of the reclamations cache failed")
+    # Aucune connexion SQLite ne doit traverser le fork
+    get_pool(DATABASE).close_all()
+
+
+def warm_up_worker(threads):
+    """Dans chaque worker, juste après le fork : ressources propres au processus."""
+    opened = get_pool(DATABASE).warm(threads) # Une connexion par thread de requête
+    get_hasher().start()
+    get_limiter()
+    logger.info("Worker ready", extra={"db_connections": opened, "threads": threads})
+
+
+warm_up_app()
+
+
+if __name__ == "__main__":
+    from gunicorn.app.wsgiapp import run
+    import sys
+
+    sys.argv = [sys.argv[0], "-c", os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")] + sys.argv[1:] + ["wsgi:server"]
+    run()